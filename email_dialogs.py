@@ -0,0 +1,416 @@
+"""Dialogs of the email separator that are only needed on demand.
+
+``email_separator`` imports this module when one of its dialogs is first
+opened, so the classes below (and the modules they need) are not loaded
+while the main window starts.
+"""
+
+import time
+from collections import OrderedDict
+
+from PyQt5.QtWidgets import (
+    QDialog, QHBoxLayout, QLabel, QLineEdit, QListView, QPushButton, QTabWidget, QTextBrowser, QVBoxLayout, QWidget
+)
+from PyQt5.QtCore import QAbstractListModel, QModelIndex, QThread, QTimer, pyqtSignal, Qt
+from PyQt5.QtGui import QFont
+
+from leadsievex import jobs, preview
+
+class AboutDialog(QDialog):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("📧 About LeadSieveX")
+        self.setFixedSize(400, 300)
+        self.setModal(True)
+        
+        layout = QVBoxLayout()
+        
+        # Title
+        title = QLabel("📧 LeadSieveX Email Separator")
+        title.setStyleSheet("font-size: 18px; font-weight: bold; color: #2196F3; margin: 10px;")
+        title.setAlignment(Qt.AlignCenter)
+        layout.addWidget(title)
+        
+        # Version info
+        version_info = QTextBrowser()
+        version_info.setMaximumHeight(200)
+        version_info.setHtml("""
+        <div style="font-family: Arial; font-size: 12px; line-height: 1.5;">
+            <p><b>Version:</b> 2.0.0</p>
+            <p><b>Release Date:</b> September 2025</p>
+            <p><b>Developer:</b> Star Signs</p>
+            
+            <h3 style="color: #4CAF50;">Features:</h3>
+            <ul>
+                <li>📂 Load and process large email lists (millions of emails)</li>
+                <li>🗑️ Remove unwanted emails by file or manual input</li>
+                <li>✂️ High-performance email separation using compact hash-indexed sets</li>
+                <li>📊 Real-time statistics and performance monitoring</li>
+                <li>🔬 Per-phase metrics, saved as JSON or Prometheus text</li>
+                <li>🎯 Drag & drop file support</li>
+                <li>⚡ Loads both lists side by side and separates as soon as they are ready</li>
+                <li>🗜️ Reads and writes gzip, bz2 and zstd compressed lists</li>
+                <li>📑 CSV / TSV lists by email column, exported as full rows</li>
+                <li>💾 Export results with detailed success confirmation</li>
+                <li>🎨 Modern, professional user interface</li>
+            </ul>
+            
+            <h3 style="color: #FF5722;">Technology Stack:</h3>
+            <ul>
+                <li>Python 3.6+</li>
+                <li>PyQt5 for GUI</li>
+                <li>Multi-threading for responsive UI</li>
+                <li>Git version control</li>
+            </ul>
+            
+            <p style="margin-top: 15px; color: #666;">
+                <b>GitHub:</b> 
+                <a href="https://github.com/starsigns/leadsievex_emailseperator">
+                    github.com/starsigns/leadsievex_emailseperator
+                </a>
+            </p>
+        </div>
+        """)
+        layout.addWidget(version_info)
+        
+        # Close button
+        close_btn = QPushButton("✅ Close")
+        close_btn.clicked.connect(self.accept)
+        close_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #4CAF50;
+                color: white;
+                border: none;
+                padding: 8px 16px;
+                font-size: 12px;
+                font-weight: bold;
+                border-radius: 4px;
+            }
+            QPushButton:hover {
+                background-color: #45a049;
+            }
+        """)
+        layout.addWidget(close_btn)
+        
+        self.setLayout(layout)
+
+class SearchProcessor(QThread):
+    """Search of a ``preview.EmailPages`` in the background
+
+    Like the ``Job`` threads of the main window, it hands
+    ``self.control.progress`` to the search, so ``cancel`` stops it between
+    blocks of rows.
+    """
+    progress = pyqtSignal(int)
+    finished = pyqtSignal(object, str)
+
+    def __init__(self, pages, text):
+        super().__init__()
+        self.control = jobs.JobControl(self.progress.emit)
+        self.pages = pages
+        self.text = text
+
+    def cancel(self):
+        self.control.cancel()
+
+    def run(self):
+        start_time = time.time()
+
+        try:
+            rows = self.pages.search(self.text, self.control.progress)
+            elapsed_time = time.time() - start_time
+            result_msg = f"Found {len(rows):,} of {len(self.pages):,} emails in {elapsed_time:.2f} seconds"
+            self.finished.emit(rows, result_msg)
+
+        except jobs.Cancelled:
+            self.finished.emit(None, "Search cancelled.")
+        except Exception as e:
+            self.finished.emit(None, f"Error: {str(e)}")
+
+class EmailListModel(QAbstractListModel):
+    """Virtual list over a ``preview.EmailPages``, paged in as the view scrolls
+
+    The view starts with one page of rows and fetches the next one when it
+    reaches the end, so opening or filtering a list of millions lays out a
+    page, not the whole list. Rows are decoded a page at a time when shown,
+    and only a few recently shown pages are kept decoded. After a search
+    only the matching rows are listed (``rows``, an index array).
+    """
+
+    PAGE_CACHE = 20  # Decoded pages kept
+
+    def __init__(self, pages, parent=None):
+        super().__init__(parent)
+        self.pages = pages
+        # Rows matching ``search_text``, None when showing every row
+        self.rows = None
+        self.search_text = ''
+        self.total = len(pages)
+        # Rows handed to the view so far
+        self.fetched = min(self.total, preview.PAGE_SIZE)
+        self._cache = OrderedDict()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.fetched
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self.fetched < self.total
+
+    def fetchMore(self, parent=QModelIndex()):
+        count = min(self.total - self.fetched, preview.PAGE_SIZE)
+        self.beginInsertRows(QModelIndex(), self.fetched, self.fetched + count - 1)
+        self.fetched += count
+        self.endInsertRows()
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid():
+            return None
+        row = index.row() if self.rows is None else int(self.rows[index.row()])
+        page = row // preview.PAGE_SIZE
+        emails = self._cache.get(page)
+        if emails is None:
+            emails = self.pages.page(page * preview.PAGE_SIZE, (page + 1) * preview.PAGE_SIZE)
+            self._cache[page] = emails
+            if len(self._cache) > self.PAGE_CACHE:
+                self._cache.popitem(last=False)
+        else:
+            self._cache.move_to_end(page)
+        return emails[row - page * preview.PAGE_SIZE]
+
+    def set_rows(self, rows, search_text=''):
+        """Show only ``rows`` (the matches of ``search_text``), or every row when ``rows`` is None"""
+        self.beginResetModel()
+        self.rows = rows
+        self.search_text = search_text
+        self.total = len(self.pages) if rows is None else len(rows)
+        self.fetched = min(self.total, preview.PAGE_SIZE)
+        self.endResetModel()
+
+class EmailPreviewDialog(QDialog):
+    """Dialog to preview emails that will be removed
+
+    The lists are virtual views over the full sets, so the dialog opens at
+    once and scrolls through millions of emails; the search runs in the
+    background and filters the list of the current tab.
+    """
+    
+    def __init__(self, emails_to_remove, emails_not_found, main_list_size, parent=None, emails_remaining=None):
+        super().__init__(parent)
+        self.emails_to_remove = emails_to_remove
+        self.emails_not_found = emails_not_found
+        self.emails_remaining = emails_remaining
+        self.main_list_size = main_list_size
+        # Latest search, and every search still running (cancelled ones finish in the background)
+        self.search_job = None
+        self.searches = []
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(250)
+        self.search_timer.timeout.connect(self.start_search)
+        self.setWindowTitle('👁️ Email Preview')
+        self.setWindowIcon(self.parent().windowIcon() if parent else None)
+        self.resize(700, 500)
+        self.setup_ui()
+    
+    def add_list_tab(self, tab_widget, emails, info_text, info_color, title):
+        """Add a tab listing ``emails`` in a virtual view"""
+        tab = QWidget()
+        tab_layout = QVBoxLayout()
+        
+        info = QLabel(info_text)
+        info.setStyleSheet(f"font-weight: bold; color: {info_color}; margin: 5px;")
+        tab_layout.addWidget(info)
+        
+        view = QListView()
+        view.setFont(QFont("Consolas", 10))
+        # Every row has the same height, so the view only asks for the rows it shows
+        view.setUniformItemSizes(True)
+        view.setModel(EmailListModel(preview.EmailPages(emails), view))
+        tab_layout.addWidget(view)
+        
+        tab.setLayout(tab_layout)
+        tab_widget.addTab(tab, title)
+        self.list_views.append(view)
+    
+    def setup_ui(self):
+        """Setup the preview dialog UI"""
+        layout = QVBoxLayout()
+        
+        # Header with statistics
+        header = QLabel()
+        header.setWordWrap(True)
+        header.setAlignment(Qt.AlignCenter)
+        
+        if self.main_list_size > 0:
+            removal_percentage = (len(self.emails_to_remove) / self.main_list_size) * 100 if self.main_list_size > 0 else 0
+            remaining_count = self.main_list_size - len(self.emails_to_remove)
+            remaining_percentage = (remaining_count / self.main_list_size) * 100 if self.main_list_size > 0 else 0
+            
+            header.setText(f"""
+            <div style="font-size: 14px; margin: 10px;">
+                <h3 style="color: #4CAF50;">📊 Preview Summary</h3>
+                <p><b>📧 Main List Size:</b> {self.main_list_size:,} emails</p>
+                <p><b>🗑️ Emails to Remove:</b> {len(self.emails_to_remove):,} emails ({removal_percentage:.1f}%)</p>
+                <p><b>✅ Emails Remaining:</b> {remaining_count:,} emails ({remaining_percentage:.1f}%)</p>
+                {f'<p><b>❌ Not Found in Main List:</b> {len(self.emails_not_found):,} emails</p>' if self.emails_not_found else ''}
+            </div>
+            """)
+        else:
+            header.setText(f"""
+            <div style="font-size: 14px; margin: 10px;">
+                <h3 style="color: #FF9800;">⚠️ No Main List Loaded</h3>
+                <p><b>🗑️ Emails to Remove:</b> {len(self.emails_to_remove):,} emails</p>
+                <p><i>Load a main list to see detailed removal statistics</i></p>
+            </div>
+            """)
+        
+        layout.addWidget(header)
+        
+        # Search box filtering the list of the current tab
+        search_layout = QHBoxLayout()
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText('🔍 Search the list below (e.g. a name or @domain.com)')
+        self.search_edit.setClearButtonEnabled(True)
+        self.search_edit.textChanged.connect(lambda: self.search_timer.start())
+        search_layout.addWidget(self.search_edit)
+        
+        self.search_label = QLabel()
+        self.search_label.setStyleSheet("color: #666; margin-left: 5px;")
+        search_layout.addWidget(self.search_label)
+        layout.addLayout(search_layout)
+        
+        # Tabs for different email lists
+        self.tab_widget = QTabWidget()
+        self.list_views = []
+        
+        # Tab 1: Emails to remove (found in main list)
+        if self.emails_to_remove:
+            self.add_list_tab(self.tab_widget, self.emails_to_remove,
+                              f'📧 These {len(self.emails_to_remove):,} emails will be removed from your main list:',
+                              '#d32f2f', f'🗑️ To Remove ({len(self.emails_to_remove):,})')
+        
+        # Tab 2: Emails not found in main list
+        if self.emails_not_found:
+            self.add_list_tab(self.tab_widget, self.emails_not_found,
+                              f'⚠️ These {len(self.emails_not_found):,} emails are not in your main list:',
+                              '#ff9800', f'❌ Not Found ({len(self.emails_not_found):,})')
+        
+        # Tab 3: Emails kept in the main list
+        if self.emails_remaining:
+            self.add_list_tab(self.tab_widget, self.emails_remaining,
+                              f'✅ These {len(self.emails_remaining):,} emails will stay in your main list:',
+                              '#4CAF50', f'✅ Remaining ({len(self.emails_remaining):,})')
+        
+        self.tab_widget.currentChanged.connect(lambda: self.start_search())
+        layout.addWidget(self.tab_widget)
+        
+        # Buttons
+        button_layout = QHBoxLayout()
+        
+        close_btn = QPushButton('📋 Close Preview')
+        close_btn.clicked.connect(self.accept)
+        close_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #6c757d;
+                color: white;
+                border: none;
+                padding: 10px 20px;
+                font-size: 12px;
+                font-weight: bold;
+                border-radius: 5px;
+            }
+            QPushButton:hover {
+                background-color: #5a6268;
+            }
+        """)
+        
+        if self.emails_to_remove and self.main_list_size > 0:
+            proceed_btn = QPushButton('✂️ Proceed with Separation')
+            proceed_btn.clicked.connect(self.proceed_separation)
+            proceed_btn.setStyleSheet("""
+                QPushButton {
+                    background-color: #28a745;
+                    color: white;
+                    border: none;
+                    padding: 10px 20px;
+                    font-size: 12px;
+                    font-weight: bold;
+                    border-radius: 5px;
+                }
+                QPushButton:hover {
+                    background-color: #218838;
+                }
+            """)
+            button_layout.addWidget(proceed_btn)
+        
+        button_layout.addWidget(close_btn)
+        layout.addLayout(button_layout)
+        
+        self.setLayout(layout)
+    
+    def current_model(self):
+        """Model of the list shown in the current tab, or None"""
+        index = self.tab_widget.currentIndex()
+        return self.list_views[index].model() if index >= 0 else None
+    
+    def show_match_count(self, model):
+        if model.rows is None:
+            self.search_label.setText('')
+        else:
+            self.search_label.setText(f'{model.total:,} of {len(model.pages):,} match')
+    
+    def start_search(self):
+        """Filter the current list by the search text, in the background"""
+        self.search_timer.stop()
+        model = self.current_model()
+        if model is None:
+            return
+        text = self.search_edit.text().strip()
+        if self.search_job is not None:
+            self.search_job.cancel()
+            self.search_job = None
+        if text == model.search_text:
+            self.show_match_count(model)
+            return
+        if not text:
+            model.set_rows(None)
+            self.show_match_count(model)
+            return
+        
+        self.search_job = SearchProcessor(model.pages, text)
+        self.search_job.model = model
+        self.search_job.progress.connect(lambda percent: self.search_label.setText(f'🔍 Searching... {percent}%'))
+        self.search_job.finished.connect(self.on_search_finished)
+        self.searches.append(self.search_job)
+        self.search_label.setText('🔍 Searching...')
+        self.search_job.start()
+    
+    def on_search_finished(self, rows, message):
+        """Show the matches of the latest search"""
+        job = self.sender()
+        if job in self.searches:
+            self.searches.remove(job)
+        if job is not self.search_job:
+            # Superseded by a newer search (or the tab changed)
+            return
+        self.search_job = None
+        if rows is None:
+            self.search_label.setText(f'❌ {message}' if message.startswith("Error") else '')
+            return
+        job.model.set_rows(rows, job.text)
+        self.show_match_count(job.model)
+    
+    def done(self, result):
+        """Stop the searches before closing"""
+        self.search_timer.stop()
+        for job in self.searches:
+            job.cancel()
+        for job in self.searches:
+            job.wait()
+        super().done(result)
+    
+    def proceed_separation(self):
+        """Close preview and trigger separation"""
+        self.accept()
+        if self.parent():
+            self.parent().separate_emails()
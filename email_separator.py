@@ -1,181 +1,424 @@
 
 import sys
 import time
+
+# (step, time) marks of the start-up, reported by --profile-startup
+STARTUP_MARKS = [('start', time.perf_counter())]
+PROFILE_STARTUP = '--profile-startup' in sys.argv[1:]
+
+if __name__ == '__main__' and len(sys.argv) > 1 and not PROFILE_STARTUP:
+    # Headless mode: run the Qt-free engine without importing PyQt5
+    import multiprocessing
+    multiprocessing.freeze_support()  # parallel engine workers in the frozen exe
+    from leadsievex.cli import main as cli_main
+    sys.exit(cli_main())
+
 from PyQt5.QtWidgets import (
-    QApplication, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QTextEdit, QLabel, 
+    QApplication, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QPlainTextEdit, QLabel, 
     QFileDialog, QMessageBox, QProgressBar, QGroupBox, QGridLayout, QFrame,
-    QMenuBar, QAction, QMainWindow, QShortcut, QDialog, QTextBrowser, QTabWidget
+    QMenuBar, QAction, QActionGroup, QMainWindow, QShortcut, QDialog,
+    QTableWidget, QTableWidgetItem, QHeaderView, QInputDialog
 )
-from PyQt5.QtCore import QThread, pyqtSignal, Qt
+from PyQt5.QtCore import QEvent, QObject, QThread, QTimer, pyqtSignal
 from PyQt5.QtGui import QFont, QPalette, QColor, QDragEnterEvent, QDropEvent, QKeySequence, QIcon
 import os
+import tempfile
+
+STARTUP_MARKS.append(('import PyQt5', time.perf_counter()))
+
+# The engine modules load NumPy, so they are imported by the jobs and handlers that use them
+from leadsievex import compress, core, jobs, metrics, normalize
+
+STARTUP_MARKS.append(('import leadsievex', time.perf_counter()))
 
-class FileProcessor(QThread):
+class Job(QThread):
+    """Background job that can be cancelled or paused between blocks of work
+
+    Subclasses hand ``self.control.progress`` to the operations they run: it
+    raises ``jobs.Cancelled`` once ``cancel`` was called, blocks while the
+    job is paused and emits ``progress`` at most every 100 ms.
+    """
     progress = pyqtSignal(int)
+
+    def __init__(self):
+        super().__init__()
+        self.control = jobs.JobControl(self.progress.emit)
+
+    def cancel(self):
+        self.control.cancel()
+
+    def set_paused(self, paused):
+        if paused:
+            self.control.pause()
+        else:
+            self.control.resume()
+
+class JobBar(QWidget):
+    """Progress bar with pause and cancel buttons, shown while its job runs
+
+    Each kind of background work gets its own bar, so a main list and an
+    unwanted list can load side by side.
+    """
+
+    def __init__(self, title=None, parent=None):
+        super().__init__(parent)
+        # Job shown on the bar, None while idle
+        self.job = None
+        layout = QHBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        if title:
+            layout.addWidget(QLabel(title))
+
+        self.progress_bar = QProgressBar()
+        layout.addWidget(self.progress_bar)
+
+        self.pause_btn = QPushButton('⏸️ Pause')
+        self.pause_btn.setCheckable(True)
+        self.pause_btn.setToolTip('Pause the running job; it stops between blocks of work')
+        self.pause_btn.toggled.connect(self.pause)
+        layout.addWidget(self.pause_btn)
+
+        self.cancel_btn = QPushButton('⏹️ Cancel')
+        self.cancel_btn.setToolTip('Stop the running job and remove its partial output')
+        self.cancel_btn.clicked.connect(self.cancel)
+        layout.addWidget(self.cancel_btn)
+
+        self.setLayout(layout)
+        self.setVisible(False)
+
+    def start(self, job):
+        """Show the bar and run ``job`` on it"""
+        self.job = job
+        self.progress_bar.setValue(0)
+        self.progress_bar.setFormat('%p%')
+        self.pause_btn.setChecked(False)
+        self.cancel_btn.setEnabled(True)
+        self.setVisible(True)
+        job.progress.connect(self.progress_bar.setValue)
+        job.finished.connect(self.on_done)
+        job.start()
+
+    def on_done(self, *args):
+        if self.sender() is self.job:
+            self.job = None
+            self.setVisible(False)
+
+    def pause(self, paused):
+        if self.job is None:
+            return
+        self.job.set_paused(paused)
+        self.pause_btn.setText('▶️ Resume' if paused else '⏸️ Pause')
+        self.progress_bar.setFormat('Paused - %p%' if paused else '%p%')
+
+    def cancel(self):
+        if self.job is None:
+            return
+        self.job.cancel()
+        self.cancel_btn.setEnabled(False)
+        self.pause_btn.setChecked(False)
+        self.progress_bar.setFormat('Cancelling...')
+
+class FileProcessor(Job):
+    measured = pyqtSignal(object)
     finished = pyqtSignal(object, str)
-    
-    def __init__(self, file_path, operation_type):
+
+    def __init__(self, file_path, operation_type, chunk_size=core.CHUNK_SIZE, normalizer=None,
+                 use_cache=True, rebuild=False, table=None, numbered=False):
         super().__init__()
         self.file_path = file_path
         self.operation_type = operation_type
-        
+        self.chunk_size = chunk_size
+        self.normalizer = normalizer
+        self.use_cache = use_cache
+        self.rebuild = rebuild
+        # Email column of a CSV / TSV file (delimited.TableFormat)
+        self.table = table
+        # Keep line numbers, for the removed-lines report
+        self.numbered = numbered
+
     def run(self):
-        start_time = time.time()
-        emails = set()
-        
+        from leadsievex import cache, delimited, store
+        run_metrics = metrics.Metrics('load', list=self.operation_type, file=os.path.basename(self.file_path))
+
         try:
-            with open(self.file_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-                total_lines = len(lines)
-                
-                for i, line in enumerate(lines):
-                    email = line.strip()
-                    if email:
-                        emails.add(email)
-                    
-                    # Update progress every 1000 lines or at the end
-                    if i % 1000 == 0 or i == total_lines - 1:
-                        progress_percent = int((i + 1) / total_lines * 100)
-                        self.progress.emit(progress_percent)
-                        
-            elapsed_time = time.time() - start_time
-            result_msg = f"Loaded {len(emails)} emails in {elapsed_time:.2f} seconds"
+            if self.table is not None:
+                emails, from_cache = delimited.load_column(self.file_path, self.table, self.chunk_size,
+                                                           self.control.progress, self.normalizer,
+                                                           run_metrics, self.numbered), False
+            elif self.use_cache:
+                emails, from_cache = cache.load(self.file_path, self.chunk_size, self.control.progress,
+                                                self.normalizer, rebuild=self.rebuild, metrics=run_metrics,
+                                                numbered=self.numbered)
+            else:
+                emails, from_cache = store.load_compact(self.file_path, self.chunk_size, self.control.progress,
+                                                        self.normalizer, run_metrics, self.numbered), False
+            self.measured.emit(run_metrics.finish())
+            source = " from index" if from_cache else ""
+            result_msg = f"Loaded {len(emails)} emails{source} in {run_metrics.seconds:.2f} seconds"
             self.finished.emit(emails, result_msg)
             
+        except jobs.Cancelled:
+            self.finished.emit(None, "Loading cancelled.")
         except Exception as e:
             self.finished.emit(None, f"Error: {str(e)}")
 
-class SeparatorProcessor(QThread):
-    progress = pyqtSignal(int)
+class SeparatorProcessor(Job):
+    measured = pyqtSignal(object)
     finished = pyqtSignal(object, str)
     
-    def __init__(self, main_emails, unwanted_emails):
+    def __init__(self, main_emails, unwanted_emails, engine=None, update=None,
+                 unwanted_count=None, suppression_filter=None, rule_set=None):
         super().__init__()
         self.main_emails = main_emails
         self.unwanted_emails = unwanted_emails
+        # In-memory engine name, engines.DEFAULT_ENGINE when None
+        self.engine = engine
+        self.suppression_filter = suppression_filter
+        self.rule_set = rule_set
+        # (previous result, newly unwanted, no longer unwanted) to patch instead of recomputing
+        self.update = update
+        self.unwanted_count = len(unwanted_emails) if unwanted_count is None else unwanted_count
         
     def run(self):
-        start_time = time.time()
+        from leadsievex import engines
+        engine = self.engine or engines.DEFAULT_ENGINE
+        run_metrics = metrics.Metrics('separate', engine='incremental' if self.update is not None else engine)
         
         try:
-            # Set difference operation is very fast
-            self.progress.emit(50)
-            remaining = self.main_emails - self.unwanted_emails
-            self.progress.emit(100)
+            if self.update is not None:
+                with run_metrics.phase('match'):
+                    remaining = engines.update_separation(self.update[0], self.main_emails, *self.update[1:])
+                self.control.progress(100)
+            elif self.suppression_filter is not None:
+                # Bloom filter first; only possible matches are looked up on disk
+                with run_metrics.phase('prefilter'):
+                    remaining = self.suppression_filter.separate(self.main_emails, self.control.progress)
+                remaining = engines.separate(remaining, self.unwanted_emails, engine, rules=self.rule_set,
+                                             metrics=run_metrics)
+                self.unwanted_count += len(self.suppression_filter)
+            else:
+                remaining = engines.separate(self.main_emails, self.unwanted_emails, engine, self.control.progress,
+                                             rules=self.rule_set, metrics=run_metrics)
             
-            elapsed_time = time.time() - start_time
-            result_msg = f"Separated {len(self.unwanted_emails)} emails. {len(remaining)} remain. Completed in {elapsed_time:.2f} seconds"
+            run_metrics.count_separation(len(self.main_emails), self.unwanted_count, len(remaining))
+            self.measured.emit(run_metrics.finish())
+            result_msg = f"Separated {self.unwanted_count} emails. {len(remaining)} remain. Completed in {run_metrics.seconds:.2f} seconds"
             self.finished.emit(remaining, result_msg)
             
+        except jobs.Cancelled:
+            self.finished.emit(None, "Separation cancelled.")
         except Exception as e:
             self.finished.emit(None, f"Error: {str(e)}")
 
-class ExportProcessor(QThread):
-    progress = pyqtSignal(int)
+class FilterBuildProcessor(Job):
+    finished = pyqtSignal(object, str)
+
+    def __init__(self, unwanted_sources, filter_path, normalizer=None):
+        super().__init__()
+        self.unwanted_sources = unwanted_sources
+        self.filter_path = filter_path
+        self.normalizer = normalizer
+
+    def run(self):
+        from leadsievex import prefilter
+        start_time = time.time()
+
+        try:
+            suppression_filter = prefilter.build_filter(self.unwanted_sources, self.filter_path, self.normalizer,
+                                                        progress=self.control.progress)
+            elapsed_time = time.time() - start_time
+            result_msg = (f"Built a suppression filter of {len(suppression_filter)} emails and "
+                          f"{len(suppression_filter.rules)} rules in {elapsed_time:.2f} seconds")
+            self.finished.emit(suppression_filter, result_msg)
+
+        except jobs.Cancelled:
+            jobs.remove_partial(self.filter_path, self.filter_path + prefilter.KEYS_SUFFIX)
+            self.finished.emit(None, "Building the suppression filter was cancelled.")
+        except Exception as e:
+            self.finished.emit(None, f"Error: {str(e)}")
+
+class ExternalSeparatorProcessor(Job):
+    measured = pyqtSignal(object)
+    finished = pyqtSignal(object, str)
+
+    def __init__(self, main_sources, unwanted_sources, out_path, max_memory=None, normalizer=None):
+        super().__init__()
+        self.main_sources = main_sources
+        self.unwanted_sources = unwanted_sources
+        self.out_path = out_path
+        # Sort buffer budget, external.DEFAULT_MAX_MEMORY when None
+        self.max_memory = max_memory
+        self.normalizer = normalizer
+
+    def run(self):
+        from leadsievex import external
+        run_metrics = metrics.Metrics('separate', engine='external')
+
+        try:
+            # Rule lines of the unwanted lists are collected while they are sorted
+            result = external.external_separate(
+                self.main_sources, self.unwanted_sources, self.out_path,
+                max_memory=self.max_memory or external.DEFAULT_MAX_MEMORY, progress=self.control.progress,
+                normalizer=self.normalizer
+            )
+
+            files = [source for source in self.main_sources + self.unwanted_sources if isinstance(source, str)]
+            run_metrics.count('bytes_read', sum(map(os.path.getsize, files)))
+            run_metrics.count('bytes_written', result.nbytes)
+            run_metrics.count_separation(result.main_count, result.unwanted_count, result.remaining_count)
+            self.measured.emit(run_metrics.finish())
+            result_msg = f"Separated {result.unwanted_count} emails on disk. {result.remaining_count} remain. Completed in {run_metrics.seconds:.2f} seconds"
+            self.finished.emit(result, result_msg)
+
+        except jobs.Cancelled:
+            jobs.remove_partial(self.out_path)
+            self.finished.emit(None, "Separation cancelled.")
+        except Exception as e:
+            self.finished.emit(None, f"Error: {str(e)}")
+
+class StreamProcessor(Job):
+    measured = pyqtSignal(object)
+    finished = pyqtSignal(object, str)
+
+    def __init__(self, main_file, unwanted_emails, out_path, rule_set=None, suppression_filter=None, normalizer=None):
+        super().__init__()
+        self.main_file = main_file
+        self.unwanted_emails = unwanted_emails
+        self.out_path = out_path
+        self.rule_set = rule_set
+        self.suppression_filter = suppression_filter
+        self.normalizer = normalizer
+
+    def run(self):
+        from leadsievex import stream
+        run_metrics = metrics.Metrics('separate', engine='stream')
+
+        try:
+            result = stream.stream_separate([self.main_file], self.unwanted_emails, self.out_path,
+                                            rules=self.rule_set, suppression=self.suppression_filter,
+                                            normalizer=self.normalizer, progress=self.control.progress,
+                                            metrics=run_metrics)
+            self.measured.emit(run_metrics.finish())
+            file_size = os.path.getsize(self.out_path) / (1024 * 1024)  # Size in MB
+            result_msg = (f"✅ Separated While Loading!\n\n"
+                          f"Saved {result.remaining_count} emails ({result.row_count} lines read) to:\n"
+                          f"{os.path.basename(self.out_path)}\n\n"
+                          f"File size: {file_size:.2f} MB\n"
+                          f"Time taken: {run_metrics.seconds:.2f} seconds")
+            self.finished.emit(result, result_msg)
+
+        except jobs.Cancelled:
+            jobs.remove_partial(self.out_path)
+            self.finished.emit(None, "Separation cancelled.")
+        except Exception as e:
+            self.finished.emit(None, f"Error: {str(e)}")
+
+class StatisticsProcessor(QThread):
+    finished = pyqtSignal(object, str)
+
+    def __init__(self, pasted_stats, text):
+        super().__init__()
+        self.pasted_stats = pasted_stats
+        self.text = text
+
+    def run(self):
+        start_time = time.time()
+
+        try:
+            changed = self.pasted_stats.update(self.text)
+            elapsed_time = time.time() - start_time
+            result_msg = f"Counted {changed} changed lines in {elapsed_time:.2f} seconds"
+            self.finished.emit(self.pasted_stats, result_msg)
+
+        except Exception as e:
+            self.finished.emit(None, f"Error: {str(e)}")
+
+class ExportProcessor(Job):
+    measured = pyqtSignal(object)
     finished = pyqtSignal(str)
     
-    def __init__(self, emails, file_path):
+    def __init__(self, emails, file_path, mode=None, main_emails=None, rows=None):
         super().__init__()
         self.emails = emails
         self.file_path = file_path
+        # One of export.EXPORT_MODES, export.DEFAULT_EXPORT_MODE when None
+        self.mode = mode
+        # Main list to report removed line numbers against, if wanted
+        self.main_emails = main_emails
+        # (main table file, TableFormat, normalizer) to write full rows instead of emails
+        self.rows = rows
         
     def run(self):
-        start_time = time.time()
-        
+        from leadsievex import export, store
+        mode = self.mode or export.DEFAULT_EXPORT_MODE
+        run_metrics = metrics.Metrics('export', mode='rows' if self.rows is not None else mode,
+                                      file=os.path.basename(self.file_path))
         try:
-            sorted_emails = sorted(self.emails)
-            total_emails = len(sorted_emails)
-            
-            with open(self.file_path, 'w', encoding='utf-8') as f:
-                for i, email in enumerate(sorted_emails):
-                    f.write(email + '\n')
-                    
-                    # Update progress every 1000 emails or at the end
-                    if i % 1000 == 0 or i == total_emails - 1:
-                        progress_percent = int((i + 1) / total_emails * 100)
-                        self.progress.emit(progress_percent)
+            if self.rows is not None:
+                result = export.write_rows(self.emails, *self.rows, self.file_path, self.control.progress,
+                                           metrics=run_metrics)
+                unit = 'rows'
+            else:
+                # A str is the result file of an on-disk separation, copied as it is
+                result = export.write_result(self.emails, self.file_path, mode, self.control.progress,
+                                             metrics=run_metrics)
+                unit = 'emails'
+            self.measured.emit(run_metrics.finish())
                         
-            elapsed_time = time.time() - start_time
-            file_size = os.path.getsize(self.file_path) / (1024 * 1024)  # Size in MB
-            result_msg = f"✅ Export Successful!\n\nSaved {total_emails} emails to:\n{os.path.basename(self.file_path)}\n\nFile size: {file_size:.2f} MB\nTime taken: {elapsed_time:.2f} seconds"
+            file_size = result.file_bytes / (1024 * 1024)  # Size in MB
+            result_msg = f"✅ Export Successful!\n\nSaved {result.count} {unit} to:\n{os.path.basename(self.file_path)}\n\nFile size: {file_size:.2f} MB\nTime taken: {result.seconds:.2f} seconds\nThroughput: {result.mb_per_second:.1f} MB/s"
+            if self.main_emails is not None:
+                if not (isinstance(self.emails, store.CompactEmailSet) and isinstance(self.main_emails, store.CompactEmailSet)):
+                    result_msg += "\n\nRemoved line numbers are only available for in-memory separations."
+                elif self.main_emails.line_numbers is None:
+                    result_msg += "\n\nRemoved line numbers were not recorded; load the main list again to save them."
+                else:
+                    sidecar = export.removed_lines_path(self.file_path)
+                    removed_count = export.write_removed_lines(self.main_emails, self.emails, sidecar)
+                    result_msg += f"\n\nRemoved line numbers ({removed_count}) saved to:\n{os.path.basename(sidecar)}"
             self.finished.emit(result_msg)
             
+        except jobs.Cancelled:
+            jobs.remove_partial(self.file_path)
+            self.finished.emit("Export cancelled.")
         except Exception as e:
             self.finished.emit(f"❌ Export Failed: {str(e)}")
 
-class AboutDialog(QDialog):
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self.setWindowTitle("📧 About LeadSieveX")
-        self.setFixedSize(400, 300)
-        self.setModal(True)
-        
-        layout = QVBoxLayout()
-        
-        # Title
-        title = QLabel("📧 LeadSieveX Email Separator")
-        title.setStyleSheet("font-size: 18px; font-weight: bold; color: #2196F3; margin: 10px;")
-        title.setAlignment(Qt.AlignCenter)
-        layout.addWidget(title)
-        
-        # Version info
-        version_info = QTextBrowser()
-        version_info.setMaximumHeight(200)
-        version_info.setHtml("""
-        <div style="font-family: Arial; font-size: 12px; line-height: 1.5;">
-            <p><b>Version:</b> 2.0.0</p>
-            <p><b>Release Date:</b> September 2025</p>
-            <p><b>Developer:</b> Star Signs</p>
-            
-            <h3 style="color: #4CAF50;">Features:</h3>
-            <ul>
-                <li>📂 Load and process large email lists (millions of emails)</li>
-                <li>🗑️ Remove unwanted emails by file or manual input</li>
-                <li>✂️ High-performance email separation using Python sets</li>
-                <li>📊 Real-time statistics and performance monitoring</li>
-                <li>🎯 Drag & drop file support</li>
-                <li>💾 Export results with detailed success confirmation</li>
-                <li>🎨 Modern, professional user interface</li>
-            </ul>
-            
-            <h3 style="color: #FF5722;">Technology Stack:</h3>
-            <ul>
-                <li>Python 3.6+</li>
-                <li>PyQt5 for GUI</li>
-                <li>Multi-threading for responsive UI</li>
-                <li>Git version control</li>
-            </ul>
-            
-            <p style="margin-top: 15px; color: #666;">
-                <b>GitHub:</b> 
-                <a href="https://github.com/starsigns/leadsievex_emailseperator">
-                    github.com/starsigns/leadsievex_emailseperator
-                </a>
-            </p>
-        </div>
-        """)
-        layout.addWidget(version_info)
-        
-        # Close button
-        close_btn = QPushButton("✅ Close")
-        close_btn.clicked.connect(self.accept)
-        close_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #4CAF50;
-                color: white;
-                border: none;
-                padding: 8px 16px;
-                font-size: 12px;
-                font-weight: bold;
-                border-radius: 4px;
-            }
-            QPushButton:hover {
-                background-color: #45a049;
-            }
-        """)
-        layout.addWidget(close_btn)
-        
-        self.setLayout(layout)
+class BatchProcessor(Job):
+    file_done = pyqtSignal(object)
+    finished = pyqtSignal(object, str)
+
+    def __init__(self, main_files, unwanted_sources, out_dir, normalizer=None, export_mode=None):
+        super().__init__()
+        self.main_files = main_files
+        self.unwanted_sources = unwanted_sources
+        self.out_dir = out_dir
+        self.normalizer = normalizer
+        # One of export.EXPORT_MODES, export.DEFAULT_EXPORT_MODE when None
+        self.export_mode = export_mode
+
+    def run(self):
+        from leadsievex import batch, export
+        start_time = time.time()
+
+        try:
+            # The suppression set is built once and shared by every job
+            suppression = batch.build_suppression(self.unwanted_sources, self.normalizer)
+            results = batch.batch_separate(self.main_files, suppression, self.out_dir,
+                                           export_mode=self.export_mode or export.DEFAULT_EXPORT_MODE,
+                                           progress=self.control.progress, on_result=self.file_done.emit)
+            batch.write_summary(results, os.path.join(self.out_dir, batch.SUMMARY_NAME))
+
+            elapsed_time = time.time() - start_time
+            done = sum(1 for result in results if not result.error)
+            result_msg = f"Batch separated {done} of {len(results)} files in {elapsed_time:.2f} seconds"
+            self.finished.emit(results, result_msg)
+
+        except jobs.Cancelled:
+            self.finished.emit(None, "Batch cancelled. Files already finished were kept.")
+        except Exception as e:
+            self.finished.emit(None, f"Error: {str(e)}")
+
 
 class EmailSeparatorMainWindow(QMainWindow):
     def __init__(self):
@@ -212,6 +455,26 @@ class EmailSeparatorMainWindow(QMainWindow):
         load_unwanted_action.triggered.connect(self.central_widget.load_unwanted_list)
         file_menu.addAction(load_unwanted_action)
         
+        # Load both lists concurrently, then separate
+        load_both_action = QAction('⚡ Load &Both Lists && Separate...', self)
+        load_both_action.setShortcut('Ctrl+Shift+O')
+        load_both_action.setStatusTip('Load the main and unwanted lists at the same time, then separate (Ctrl+Shift+O)')
+        load_both_action.triggered.connect(self.central_widget.load_both_lists)
+        file_menu.addAction(load_both_action)
+        
+        # Batch job queue
+        batch_action = QAction('📚 &Batch Separate...', self)
+        batch_action.setShortcut('Ctrl+B')
+        batch_action.setStatusTip('Separate many main lists against the loaded unwanted list (Ctrl+B)')
+        batch_action.triggered.connect(self.central_widget.show_batch_dialog)
+        file_menu.addAction(batch_action)
+        
+        # Rebuild the cached index of the main list
+        rebuild_index_action = QAction('🔁 &Rebuild Index', self)
+        rebuild_index_action.setStatusTip('Re-read the main list from text and refresh its cached index')
+        rebuild_index_action.triggered.connect(self.central_widget.rebuild_index)
+        file_menu.addAction(rebuild_index_action)
+        
         file_menu.addSeparator()
         
         # Export Results
@@ -221,6 +484,18 @@ class EmailSeparatorMainWindow(QMainWindow):
         export_action.triggered.connect(self.central_widget.export_result)
         file_menu.addAction(export_action)
         
+        # Removed line numbers sidecar
+        removed_lines_action = QAction('📝 Also Save &Removed Line Numbers', self, checkable=True)
+        removed_lines_action.setStatusTip('Write <name>_removed_lines.txt with the main list line of every removed email '
+                                          '(for main lists loaded while checked)')
+        removed_lines_action.toggled.connect(
+            lambda checked: setattr(self.central_widget, 'save_removed_lines', checked))
+        file_menu.addAction(removed_lines_action)
+        
+        # Export order, filled in when first opened so start-up does not load the engine
+        self.export_mode_menu = file_menu.addMenu('🔃 Export &Order')
+        self.export_mode_menu.aboutToShow.connect(self.fill_export_mode_menu)
+        
         file_menu.addSeparator()
         
         # Exit
@@ -259,6 +534,42 @@ class EmailSeparatorMainWindow(QMainWindow):
         separate_action.triggered.connect(self.central_widget.separate_emails)
         process_menu.addAction(separate_action)
         
+        # Single pass over a huge main list, straight into a file
+        stream_action = QAction('🌊 Separate &While Loading...', self)
+        stream_action.setShortcut('Ctrl+Shift+R')
+        stream_action.setStatusTip('Read a main list file once and write what remains straight to a new file (Ctrl+Shift+R)')
+        stream_action.triggered.connect(self.central_widget.separate_while_loading)
+        process_menu.addAction(stream_action)
+        
+        process_menu.addSeparator()
+        
+        # Bloom-filter suppression for huge unwanted lists
+        build_filter_action = QAction('🧱 &Build Suppression Filter...', self)
+        build_filter_action.setStatusTip('Build an on-disk suppression filter from unwanted list files')
+        build_filter_action.triggered.connect(self.central_widget.build_suppression_filter)
+        process_menu.addAction(build_filter_action)
+        
+        load_filter_action = QAction('📥 &Load Suppression Filter...', self)
+        load_filter_action.setStatusTip('Use a suppression filter in addition to the unwanted emails')
+        load_filter_action.triggered.connect(self.central_widget.load_suppression_filter)
+        process_menu.addAction(load_filter_action)
+        
+        clear_filter_action = QAction('🚫 C&lear Suppression Filter', self)
+        clear_filter_action.triggered.connect(self.central_widget.clear_suppression_filter)
+        process_menu.addAction(clear_filter_action)
+        
+        process_menu.addSeparator()
+        
+        # Normalization rules applied while loading
+        normalize_menu = process_menu.addMenu('🔤 &Normalization')
+        for rule in normalize.RULES:
+            rule_action = QAction(normalize.RULE_DESCRIPTIONS[rule], self, checkable=True)
+            rule_action.setChecked(rule in self.central_widget.normalization_rules)
+            rule_action.setStatusTip('Applied when lists are loaded; reload lists after changing it')
+            rule_action.toggled.connect(
+                lambda checked, rule=rule: self.central_widget.set_normalization_rule(rule, checked))
+            normalize_menu.addAction(rule_action)
+        
         # View Menu
         view_menu = menubar.addMenu('👁️ &View')
         
@@ -289,7 +600,21 @@ class EmailSeparatorMainWindow(QMainWindow):
         
         # Status bar
         self.statusBar().showMessage('🟢 Ready - Use File menu or drag & drop to get started')
-    
+
+    def fill_export_mode_menu(self):
+        """Add the export modes to the Export Order menu the first time it opens"""
+        if self.export_mode_menu.actions():
+            return
+        from leadsievex import export
+        current = self.central_widget.export_mode or export.DEFAULT_EXPORT_MODE
+        export_mode_group = QActionGroup(self)
+        for mode in export.EXPORT_MODES:
+            mode_action = QAction(export.MODE_DESCRIPTIONS[mode], self, checkable=True)
+            mode_action.setChecked(mode == current)
+            mode_action.triggered.connect(lambda checked, mode=mode: setattr(self.central_widget, 'export_mode', mode))
+            export_mode_group.addAction(mode_action)
+            self.export_mode_menu.addAction(mode_action)
+
     def setup_shortcuts(self):
         """Setup additional keyboard shortcuts"""
         # Focus shortcuts
@@ -304,6 +629,7 @@ class EmailSeparatorMainWindow(QMainWindow):
 <h3>📁 File Operations:</h3>
 <b>Ctrl+O</b> - Load Main List<br>
 <b>Ctrl+U</b> - Load Unwanted List<br>
+<b>Ctrl+Shift+O</b> - Load Both Lists & Separate<br>
 <b>Ctrl+S</b> - Export Results<br>
 <b>Ctrl+Q</b> - Exit Application<br>
 
@@ -314,6 +640,7 @@ class EmailSeparatorMainWindow(QMainWindow):
 <h3>⚡ Processing:</h3>
 <b>Ctrl+P</b> - Preview Emails to Remove<br>
 <b>Ctrl+R</b> - Separate Emails<br>
+<b>Ctrl+Shift+R</b> - Separate While Loading<br>
 
 <h3>👁️ View:</h3>
 <b>F5</b> - Refresh Statistics<br>
@@ -321,6 +648,7 @@ class EmailSeparatorMainWindow(QMainWindow):
 
 <h3>🎯 Tips:</h3>
 • Drag & drop .txt files onto the window<br>
+• Drop a main and an unwanted list together to load both and separate<br>
 • All buttons have tooltips for guidance<br>
 • Statistics update in real-time<br>
         """)
@@ -329,9 +657,21 @@ class EmailSeparatorMainWindow(QMainWindow):
     
     def show_about(self):
         """Show about dialog"""
+        from email_dialogs import AboutDialog
         about_dialog = AboutDialog(self)
         about_dialog.exec_()
     
+    def closeEvent(self, event):
+        """Stop the running jobs and remove temporary files before closing"""
+        jobs_running = self.central_widget.running_jobs()
+        for job in jobs_running:
+            # Each job removes its partial output on its way out
+            job.cancel()
+        for job in jobs_running:
+            job.wait()
+        self.central_widget.discard_result_file()
+        super().closeEvent(event)
+    
     def dragEnterEvent(self, event: QDragEnterEvent):
         """Handle drag enter events"""
         self.central_widget.dragEnterEvent(event)
@@ -350,11 +690,68 @@ class EmailSeparatorWidget(QWidget):
         self.main_emails = set()
         self.result_emails = set()
         self.main_file = None
+        # Email column of a CSV / TSV main list, whose rows are exported whole
+        self.main_table = None
         self.unwanted_emails = set()
+        # Domain and wildcard rule lines of the loaded unwanted list
+        self.unwanted_rule_lines = []
+        # Lists too large for memory are kept on disk for the external engine
+        self.main_on_disk = False
+        self.unwanted_file = None
+        self.result_file = None
+        self.result_count = 0
+        # Inputs of the last in-memory separation, to re-run it incrementally
+        self.last_separation = None
+        self.pending_separation = None
+        # One of export.EXPORT_MODES, export.DEFAULT_EXPORT_MODE when None
+        self.export_mode = None
+        # Bloom-filter suppression list kept on disk (see leadsievex.prefilter)
+        self.suppression_filter = None
+        self.save_removed_lines = False
+        self.normalization_rules = normalize.DEFAULT_RULES
+        self.normalizer = normalize.make_normalizer(self.normalization_rules)
+        # Pasted email counts, kept up to date in a worker thread (None until something is pasted)
+        self.pasted_stats = None
+        # Latest metrics.Metrics per kind of run ('load main', 'separate', ...)
+        self.run_metrics = {}
+        # Separate as soon as the lists being loaded are ready (see load_both_lists)
+        self.separate_when_loaded = False
+        self.stats_processor = None
+        self.stats_pending = False
+        self.stats_timer = QTimer(self)
+        self.stats_timer.setSingleShot(True)
+        self.stats_timer.setInterval(250)  # Wait for typing to pause (ms)
+        self.stats_timer.timeout.connect(self.recount_pasted)
         self.setAcceptDrops(True)  # Enable drag and drop
         self.setup_styles()
         self.init_ui()
 
+    def set_normalization_rule(self, rule, enabled):
+        """Enable or disable one normalization rule for the next loads"""
+        rules = set(self.normalization_rules)
+        if enabled:
+            rules.add(rule)
+        else:
+            rules.discard(rule)
+        self.normalization_rules = tuple(r for r in normalize.RULES if r in rules)
+        self.normalizer = normalize.make_normalizer(self.normalization_rules)
+        if self.main_emails or self.unwanted_emails:
+            self.status_label.setText('Normalization changed - reload your lists to apply it.')
+        self.update_statistics()
+
+    def get_pasted_emails(self):
+        """Emails typed or pasted in the text area"""
+        return set(email.strip() for email in core.split_lines(self.text_area.toPlainText()) if email.strip())
+
+    def get_rule_set(self, pasted_emails):
+        """Domain and wildcard rules of the unwanted list and the text area, or ``None`` if one is invalid"""
+        from leadsievex import rules
+        try:
+            return rules.RuleSet(self.unwanted_rule_lines + rules.rule_lines(pasted_emails, self.normalizer))
+        except ValueError as e:
+            QMessageBox.critical(self, 'Error', f'Invalid suppression rule:\n{e}')
+            return None
+
     def clear_text_area(self):
         """Clear the text area and update statistics"""
         self.text_area.clear()
@@ -392,14 +789,14 @@ class EmailSeparatorWidget(QWidget):
                 font-size: 13px;
                 margin: 4px;
             }
-            QTextEdit {
+            QTextEdit, QPlainTextEdit {
                 border: 2px solid #ddd;
                 border-radius: 6px;
                 padding: 8px;
                 font-size: 12px;
                 background-color: white;
             }
-            QTextEdit:focus {
+            QTextEdit:focus, QPlainTextEdit:focus {
                 border-color: #4CAF50;
             }
             QProgressBar {
@@ -449,9 +846,13 @@ class EmailSeparatorWidget(QWidget):
         self.status_label.setWordWrap(True)
         status_layout.addWidget(self.status_label)
         
-        self.progress_bar = QProgressBar()
-        self.progress_bar.setVisible(False)
-        status_layout.addWidget(self.progress_bar)
+        # Separation, export and filter jobs, then the two list loads, which may overlap
+        self.job_bar = JobBar()
+        status_layout.addWidget(self.job_bar)
+        self.main_load_bar = JobBar('📧 Main')
+        status_layout.addWidget(self.main_load_bar)
+        self.unwanted_load_bar = JobBar('🗑️ Unwanted')
+        status_layout.addWidget(self.unwanted_load_bar)
         
         status_group.setLayout(status_layout)
         left_panel.addWidget(status_group)
@@ -470,6 +871,11 @@ class EmailSeparatorWidget(QWidget):
         self.load_unwanted_btn.clicked.connect(self.load_unwanted_list)
         file_ops_layout.addWidget(self.load_unwanted_btn)
         
+        self.load_both_btn = QPushButton('⚡ Load Both Lists && Separate')
+        self.load_both_btn.setToolTip('⚡ Pick a main and an unwanted list, load them at the same time\n• Separation starts as soon as both are loaded\n• Keyboard shortcut: Ctrl+Shift+O\n• Or drop both files at once')
+        self.load_both_btn.clicked.connect(self.load_both_lists)
+        file_ops_layout.addWidget(self.load_both_btn)
+        
         file_ops_group.setLayout(file_ops_layout)
         left_panel.addWidget(file_ops_group)
         
@@ -480,11 +886,12 @@ class EmailSeparatorWidget(QWidget):
         self.text_label = QLabel('Paste emails to remove (one per line):')
         text_input_layout.addWidget(self.text_label)
 
-        self.text_area = QTextEdit()
-        self.text_area.setPlaceholderText("📝 Paste emails here...\n\nExample:\nemail1@example.com\nemail2@example.com\nemail3@example.com\n\n💡 Tip: Use Ctrl+L to clear this area")
+        # Plain text lays out large pastes far faster than rich text
+        self.text_area = QPlainTextEdit()
+        self.text_area.setPlaceholderText("📝 Paste emails here...\n\nExample:\nemail1@example.com\nemail2@example.com\n@competitor.com\nnoreply*@*\n\n💡 Tip: Use Ctrl+L to clear this area")
         self.text_area.setMaximumHeight(150)
-        self.text_area.textChanged.connect(self.update_statistics)  # Update stats when text changes
-        self.text_area.setToolTip('✏️ Manual email input area\n• Paste emails to remove (one per line)\n• Combines with file-loaded emails\n• Real-time statistics update\n• Keyboard shortcut: Ctrl+T to focus\n• Ctrl+L to clear')
+        self.text_area.textChanged.connect(self.stats_timer.start)  # Recount once typing pauses
+        self.text_area.setToolTip('✏️ Manual email input area\n• Paste emails to remove (one per line)\n• Rules: @domain.com, *.gov, abuse@*, noreply*@*\n• Combines with file-loaded emails\n• Real-time statistics update\n• Keyboard shortcut: Ctrl+T to focus\n• Ctrl+L to clear')
         text_input_layout.addWidget(self.text_area)
         
         text_input_group.setLayout(text_input_layout)
@@ -496,7 +903,7 @@ class EmailSeparatorWidget(QWidget):
         
         # Preview button
         self.preview_btn = QPushButton('👁️ Preview Emails to Remove')
-        self.preview_btn.setToolTip('👁️ Preview emails that will be removed\n• Shows up to 100 sample emails\n• No changes are made to your data\n• Keyboard shortcut: Ctrl+P')
+        self.preview_btn.setToolTip('👁️ Preview emails that will be removed\n• Lists and searches every email, the ones not found and the ones kept\n• No changes are made to your data\n• Keyboard shortcut: Ctrl+P')
         self.preview_btn.clicked.connect(self.preview_emails)
         actions_layout.addWidget(self.preview_btn)
         
@@ -567,31 +974,132 @@ class EmailSeparatorWidget(QWidget):
         self.export_time_label = QLabel("Export Time: --")
         stats_layout.addWidget(self.export_time_label, 7, 0, 1, 2)
         
+        # Per-phase breakdown of the last runs, folded away by default
+        self.metrics_toggle_btn = QPushButton("🔬 Show Details")
+        self.metrics_toggle_btn.setCheckable(True)
+        self.metrics_toggle_btn.setToolTip('Counters and per-phase timings of the last load, separation and export')
+        self.metrics_toggle_btn.toggled.connect(self.toggle_metrics_details)
+        stats_layout.addWidget(self.metrics_toggle_btn, 8, 0)
+        
+        self.save_metrics_btn = QPushButton("💾 Save Metrics")
+        self.save_metrics_btn.setToolTip('Save the metrics as JSON or Prometheus text')
+        self.save_metrics_btn.setEnabled(False)
+        self.save_metrics_btn.clicked.connect(self.save_metrics)
+        stats_layout.addWidget(self.save_metrics_btn, 8, 1)
+        
+        self.metrics_view = QPlainTextEdit()
+        self.metrics_view.setReadOnly(True)
+        self.metrics_view.setFont(QFont('Consolas', 9))
+        self.metrics_view.setPlaceholderText('Load, separate or export to see where the time goes.')
+        self.metrics_view.setMinimumHeight(220)
+        self.metrics_view.setVisible(False)
+        stats_layout.addWidget(self.metrics_view, 9, 0, 1, 2)
+        
         # File info
         self.file_info_label = QLabel("📁 File Info")
         self.file_info_label.setStyleSheet("font-weight: bold; margin-top: 8px;")
-        stats_layout.addWidget(self.file_info_label, 8, 0, 1, 2)
+        stats_layout.addWidget(self.file_info_label, 10, 0, 1, 2)
         
         self.main_file_label = QLabel("Main: No file loaded")
         self.main_file_label.setWordWrap(True)
-        stats_layout.addWidget(self.main_file_label, 9, 0, 1, 2)
+        stats_layout.addWidget(self.main_file_label, 11, 0, 1, 2)
         
         self.stats_group.setLayout(stats_layout)
         
+    def toggle_metrics_details(self, shown):
+        self.metrics_view.setVisible(shown)
+        self.metrics_toggle_btn.setText("🔬 Hide Details" if shown else "🔬 Show Details")
+
+    def on_metrics(self, run_metrics):
+        """Keep the metrics of the latest run of each kind and show them"""
+        key = f"{run_metrics.operation} {run_metrics.labels.get('list', '')}".strip()
+        self.run_metrics[key] = run_metrics
+        time_labels = {
+            'load main': (self.load_time_label, 'Load Time'),
+            'separate': (self.process_time_label, 'Process Time'),
+            'export': (self.export_time_label, 'Export Time'),
+        }
+        if key in time_labels:
+            label, title = time_labels[key]
+            label.setText(f"{title}: {run_metrics.seconds:.2f} seconds ({run_metrics.rows_per_second:,.0f} rows/s)")
+        self.metrics_view.setPlainText('\n\n'.join(item.summary() for item in self.run_metrics.values()))
+        self.save_metrics_btn.setEnabled(True)
+
+    def save_metrics(self):
+        import datetime
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, 'Save Metrics', f"metrics_{timestamp}.json",
+            'JSON (*.json);;Prometheus Text (*.prom);;All Files (*)'
+        )
+        if not file_path:
+            return
+        try:
+            metrics.write(list(self.run_metrics.values()), file_path)
+        except OSError as e:
+            QMessageBox.critical(self, 'Error', f'Cannot save the metrics:\n{e}')
+            return
+        self.status_label.setText(f'Metrics saved to {os.path.basename(file_path)}.')
+
+    def recount_pasted(self):
+        """Update the pasted email counts in a worker thread"""
+        if self.pasted_stats is None:
+            from leadsievex import stats
+            self.pasted_stats = stats.PastedStats(self.unwanted_emails, self.normalizer)
+        if self.stats_processor is not None and self.stats_processor.isRunning():
+            # Coalesce with the count in progress
+            self.stats_pending = True
+            return
+        self.stats_pending = False
+        self.stats_processor = StatisticsProcessor(self.pasted_stats, self.text_area.toPlainText())
+        self.stats_processor.finished.connect(self.on_pasted_recounted)
+        self.stats_processor.start()
+
+    def on_pasted_recounted(self, pasted_stats, message):
+        if pasted_stats is None:
+            self.status_label.setText(message)
+        elif pasted_stats is self.pasted_stats:
+            self.update_statistics()
+        if self.stats_pending:
+            self.recount_pasted()
+
     def update_statistics(self):
         """Update the statistics panel with current data"""
         main_count = len(self.main_emails)
         unwanted_count = len(self.unwanted_emails)
         
-        # Count pasted emails
-        pasted_emails = set(email.strip() for email in self.text_area.toPlainText().splitlines() if email.strip())
-        total_unwanted = len(pasted_emails | self.unwanted_emails)
-        
-        result_count = len(self.result_emails) if self.result_emails else max(0, main_count - total_unwanted)
+        if self.pasted_stats is not None and (self.pasted_stats.unwanted_emails is not self.unwanted_emails
+                                              or self.pasted_stats.normalizer != self.normalizer):
+            # The unwanted list or the rules changed: recount the paste against them
+            self.pasted_stats = None
+            self.recount_pasted()
+        extra_count = rule_count = 0
+        if self.pasted_stats is not None:
+            extra_count, rule_count = self.pasted_stats.extra_count, self.pasted_stats.rule_count
+        # Count without building the union of the (possibly huge) unwanted list
+        total_unwanted = unwanted_count + extra_count
+        rules_note = f" + {rule_count:,} pasted rules" if rule_count else ""
+        
+        if self.result_file:
+            result_count = self.result_count
+        else:
+            result_count = len(self.result_emails) if self.result_emails else max(0, main_count - total_unwanted)
         
         # Update labels
-        self.main_count_label.setText(f"📧 Main List: {main_count:,} emails")
-        self.unwanted_count_label.setText(f"🗑️ To Remove: {total_unwanted:,} emails")
+        if self.main_on_disk:
+            size_mb = os.path.getsize(self.main_file) / (1024 * 1024)
+            self.main_count_label.setText(f"📧 Main List: {size_mb:,.0f} MB on disk")
+        else:
+            self.main_count_label.setText(f"📧 Main List: {main_count:,} emails")
+        if self.unwanted_file:
+            size_mb = os.path.getsize(self.unwanted_file) / (1024 * 1024)
+            self.unwanted_count_label.setText(
+                f"🗑️ To Remove: {total_unwanted:,} emails + {size_mb:,.0f} MB on disk{rules_note}")
+        elif self.suppression_filter is not None:
+            self.unwanted_count_label.setText(
+                f"🗑️ To Remove: {total_unwanted:,} emails + {len(self.suppression_filter):,} in filter{rules_note}")
+        else:
+            self.unwanted_count_label.setText(f"🗑️ To Remove: {total_unwanted:,} emails{rules_note}")
         self.result_count_label.setText(f"✅ Remaining: {result_count:,} emails")
         
         # Update file info
@@ -603,13 +1111,17 @@ class EmailSeparatorWidget(QWidget):
 
     def dragEnterEvent(self, event: QDragEnterEvent):
         """Handle drag enter events"""
+        from leadsievex import delimited
         if event.mimeData().hasUrls():
-            urls = event.mimeData().urls()
-            if len(urls) == 1 and urls[0].toLocalFile().endswith('.txt'):
+            files = [url.toLocalFile() for url in event.mimeData().urls()]
+            if len(files) in (1, 2) and all(compress.is_list_file(f) or delimited.is_table(f) for f in files):
                 event.acceptProposedAction()
-                self.status_label.setText("🎯 Drop the file to load it")
+                if len(files) == 2:
+                    self.status_label.setText("🎯 Drop both files to load them and separate")
+                else:
+                    self.status_label.setText("🎯 Drop the file to load it")
             else:
-                self.status_label.setText("❌ Please drop a single .txt file")
+                self.status_label.setText("❌ Please drop one or two .txt, .csv, .tsv, .gz, .bz2 or .zst files")
         else:
             event.ignore()
 
@@ -619,8 +1131,9 @@ class EmailSeparatorWidget(QWidget):
 
     def dropEvent(self, event: QDropEvent):
         """Handle file drop events"""
+        from leadsievex import delimited
         files = [url.toLocalFile() for url in event.mimeData().urls()]
-        if len(files) == 1 and files[0].endswith('.txt'):
+        if len(files) == 1 and (compress.is_list_file(files[0]) or delimited.is_table(files[0])):
             file_path = files[0]
             
             # Show dialog to ask which type of file this is
@@ -647,109 +1160,426 @@ class EmailSeparatorWidget(QWidget):
                 self.load_file_as_unwanted(file_path)
             # Cancel does nothing
                 
+        elif len(files) == 2 and all(compress.is_list_file(f) or delimited.is_table(f) for f in files):
+            # Ask which file is the main list, then load both side by side
+            msg = QMessageBox()
+            msg.setWindowTitle('📁 File Type Selection')
+            msg.setText('Which file is the main email list? The other one is the unwanted list.')
+            first_button = msg.addButton(f'📧 {os.path.basename(files[0])}', QMessageBox.YesRole)
+            second_button = msg.addButton(f'📧 {os.path.basename(files[1])}', QMessageBox.NoRole)
+            msg.addButton('❌ Cancel', QMessageBox.RejectRole)
+            msg.exec_()
+            
+            if msg.clickedButton() is first_button:
+                self.load_and_separate(files[0], files[1])
+            elif msg.clickedButton() is second_button:
+                self.load_and_separate(files[1], files[0])
+            return
+            
         self.status_label.setText("🟢 Ready - Drag & drop files or use buttons below")
 
-    def load_file_as_main(self, file_path):
-        """Load a file as the main email list"""
+    def choose_table_column(self, file_path):
+        """Ask for the email column of a CSV / TSV file; ``None`` when cancelled"""
+        from leadsievex import delimited
+        try:
+            delimiter, columns = delimited.read_header(file_path)
+            try:
+                default = delimited.resolve(file_path, delimiter=delimiter).column
+            except ValueError:
+                default = 0
+        except (OSError, UnicodeDecodeError) as e:
+            QMessageBox.critical(self, 'Error', f'Cannot read {os.path.basename(file_path)}:\n{e}')
+            return None
+        items = [f"{i + 1}: {name}" for i, name in enumerate(columns)]
+        item, ok = QInputDialog.getItem(self, '📑 Email Column',
+                                        f'Which column of {os.path.basename(file_path)} holds the emails?',
+                                        items, min(default, max(len(items) - 1, 0)), False)
+        if not ok or not items:
+            return None
+        return delimited.TableFormat(items.index(item), delimiter, True)
+
+    def start_job(self, job, bar=None):
+        """Run a background job on its progress bar (by default the one for separations and exports)"""
+        (bar or self.job_bar).start(job)
+
+    def running_jobs(self):
+        """Background jobs still running, on any progress bar"""
+        return [bar.job for bar in (self.job_bar, self.main_load_bar, self.unwanted_load_bar)
+                if bar.job is not None]
+
+    def loading_jobs(self):
+        """List loads still running, not counting the one whose result is being handled"""
+        return [bar.job for bar in (self.main_load_bar, self.unwanted_load_bar)
+                if bar.job is not None and bar.job is not self.sender()]
+
+    def start_queued_separation(self):
+        """Separate once both lists are ready, if a separation is waiting for them"""
+        if self.separate_when_loaded and not self.loading_jobs():
+            self.separate_when_loaded = False
+            self.separate_emails()
+
+    def load_file_as_main(self, file_path, rebuild=False, table=None):
+        """Load a file as the main email list; returns False if nothing was loaded"""
+        from leadsievex import delimited, external
+        if self.main_load_bar.job is not None:
+            self.status_label.setText('The main email list is still loading.')
+            return False
+        if delimited.is_table(file_path):
+            # Only the email column is loaded, so tables always fit in memory
+            table = table or self.choose_table_column(file_path)
+            if table is None:
+                self.status_label.setText('No email column selected.')
+                return False
+        elif external.should_use_external([file_path]):
+            # Too large to hold as a set: separate straight from the file
+            self.main_emails = set()
+            self.main_file = file_path
+            self.main_on_disk = True
+            self.status_label.setText('Main list is very large; it will be separated on disk.')
+            self.update_statistics()
+            return True
+
         self.load_btn.setEnabled(False)
-        self.progress_bar.setVisible(True)
-        self.progress_bar.setValue(0)
         self.status_label.setText('Loading main email list...')
         
-        self.file_processor = FileProcessor(file_path, 'main')
-        self.file_processor.progress.connect(self.progress_bar.setValue)
-        self.file_processor.finished.connect(self.on_main_list_loaded)
-        self.file_processor.start()
+        self.main_loader = FileProcessor(file_path, 'main', normalizer=self.normalizer, rebuild=rebuild,
+                                         table=table, numbered=self.save_removed_lines)
+        self.main_loader.measured.connect(self.on_metrics)
+        self.main_loader.finished.connect(self.on_main_list_loaded)
+        self.start_job(self.main_loader, self.main_load_bar)
+        return True
 
     def load_file_as_unwanted(self, file_path):
-        """Load a file as the unwanted email list"""
+        """Load a file as the unwanted email list; returns False if nothing was loaded"""
+        from leadsievex import delimited, external
+        if self.unwanted_load_bar.job is not None:
+            self.status_label.setText('The unwanted email list is still loading.')
+            return False
+        table = None
+        if delimited.is_table(file_path):
+            table = self.choose_table_column(file_path)
+            if table is None:
+                self.status_label.setText('No email column selected.')
+                return False
+        elif external.should_use_external([file_path]):
+            # Too large to hold as a set: separate straight from the file
+            self.unwanted_emails = set()
+            self.unwanted_rule_lines = []
+            self.unwanted_file = file_path
+            self.status_label.setText('Unwanted list is very large; it will be separated on disk.')
+            self.update_statistics()
+            return True
+
         self.load_unwanted_btn.setEnabled(False)
-        self.progress_bar.setVisible(True)
-        self.progress_bar.setValue(0)
         self.status_label.setText('Loading unwanted email list...')
         
-        self.file_processor = FileProcessor(file_path, 'unwanted')
-        self.file_processor.progress.connect(self.progress_bar.setValue)
-        self.file_processor.finished.connect(self.on_unwanted_list_loaded)
-        self.file_processor.start()
+        self.unwanted_loader = FileProcessor(file_path, 'unwanted', normalizer=self.normalizer, table=table)
+        self.unwanted_loader.measured.connect(self.on_metrics)
+        self.unwanted_loader.finished.connect(self.on_unwanted_list_loaded)
+        self.start_job(self.unwanted_loader, self.unwanted_load_bar)
+        return True
+
+    def load_both_lists(self):
+        """Load a main and an unwanted list side by side, then separate them"""
+        main_path, _ = QFileDialog.getOpenFileName(self, 'Select Main Email List', '', compress.LIST_FILTER)
+        if not main_path:
+            self.status_label.setText('No file selected.')
+            return
+        unwanted_path, _ = QFileDialog.getOpenFileName(self, 'Select Unwanted Email List', '', compress.LIST_FILTER)
+        if not unwanted_path:
+            self.status_label.setText('No unwanted file selected.')
+            return
+        self.load_and_separate(main_path, unwanted_path)
+
+    def load_and_separate(self, main_path, unwanted_path):
+        """Start both loads at once and separate when the slower one is done"""
+        self.separate_when_loaded = True
+        if not (self.load_file_as_main(main_path) and self.load_file_as_unwanted(unwanted_path)):
+            self.separate_when_loaded = False
+            return
+        self.status_label.setText('Loading both lists; separation starts when they are ready...')
+        self.start_queued_separation()
+
+    def rebuild_index(self):
+        """Reload the main list from text, replacing its cached index"""
+        if not self.main_file or self.main_on_disk:
+            QMessageBox.information(self, 'Rebuild Index', 'Load a main email list first.')
+            return
+        if self.main_load_bar.job is not None:
+            self.status_label.setText('The main email list is still loading.')
+            return
+        # Drop the mapped index before it is rewritten
+        self.main_emails = set()
+        self.load_file_as_main(self.main_file, rebuild=True, table=self.main_table)
+
+    def build_suppression_filter(self):
+        """Build a suppression filter from unwanted list files, then use it"""
+        from leadsievex import prefilter
+        file_paths, _ = QFileDialog.getOpenFileNames(self, 'Select Unwanted Email Lists', '', compress.LIST_FILTER)
+        if not file_paths:
+            return
+        filter_path, _ = QFileDialog.getSaveFileName(self, 'Save Suppression Filter', 'suppression' + prefilter.FILTER_SUFFIX,
+                                                     f'Suppression Filters (*{prefilter.FILTER_SUFFIX})')
+        if not filter_path:
+            return
+        self.status_label.setText('Building suppression filter...')
+        self.filter_processor = FilterBuildProcessor(file_paths, filter_path, self.normalizer)
+        self.filter_processor.finished.connect(self.on_suppression_filter_ready)
+        self.start_job(self.filter_processor)
+
+    def load_suppression_filter(self):
+        """Use a previously built suppression filter"""
+        from leadsievex import prefilter
+        filter_path, _ = QFileDialog.getOpenFileName(self, 'Select Suppression Filter', '',
+                                                     f'Suppression Filters (*{prefilter.FILTER_SUFFIX})')
+        if not filter_path:
+            return
+        try:
+            suppression_filter = prefilter.SuppressionFilter.load(filter_path)
+        except (OSError, ValueError) as e:
+            QMessageBox.critical(self, 'Error', f'Cannot load the suppression filter:\n{e}')
+            return
+        message = (f"Loaded a suppression filter of {len(suppression_filter)} emails "
+                   f"and {len(suppression_filter.rules)} rules")
+        self.on_suppression_filter_ready(suppression_filter, message)
+
+    def on_suppression_filter_ready(self, suppression_filter, message):
+        if suppression_filter is not None and suppression_filter.normalizer != self.normalizer:
+            message = 'The suppression filter uses different normalization rules; it was not applied.'
+        elif suppression_filter is not None:
+            self.suppression_filter = suppression_filter
+        self.status_label.setText(message)
+        self.update_statistics()
+
+    def clear_suppression_filter(self):
+        self.suppression_filter = None
+        self.status_label.setText('Suppression filter cleared.')
+        self.update_statistics()
+
+    def show_batch_dialog(self):
+        """Open the batch job queue with the current unwanted emails"""
+        if self.unwanted_file:
+            QMessageBox.critical(self, 'Error', 'Batch mode needs an unwanted list that fits in memory.')
+            return
+        pasted_emails = self.get_pasted_emails()
+        if not pasted_emails and not self.unwanted_emails:
+            QMessageBox.critical(self, 'Error', 'Please provide emails to remove (paste or load a file).')
+            return
+        dialog = BatchDialog([self.unwanted_emails, pasted_emails], self.normalizer, self.export_mode, self)
+        dialog.exec_()
 
     def load_main_list(self):
-        file_path, _ = QFileDialog.getOpenFileName(self, 'Select Main Email List', '', 'Text Files (*.txt)')
+        file_path, _ = QFileDialog.getOpenFileName(self, 'Select Main Email List', '', compress.LIST_FILTER)
         if file_path:
-            self.load_btn.setEnabled(False)
-            self.progress_bar.setVisible(True)
-            self.progress_bar.setValue(0)
-            self.status_label.setText('Loading main email list...')
-            
-            self.file_processor = FileProcessor(file_path, 'main')
-            self.file_processor.progress.connect(self.progress_bar.setValue)
-            self.file_processor.finished.connect(self.on_main_list_loaded)
-            self.file_processor.start()
+            self.load_file_as_main(file_path)
         else:
             self.status_label.setText('No file selected.')
             
     def on_main_list_loaded(self, emails, message):
         if emails is not None:
             self.main_emails = emails
-            self.main_file = self.file_processor.file_path
-            # Extract timing info from message
-            if "in " in message:
-                time_part = message.split("in ")[1]
-                self.load_time_label.setText(f"Load Time: {time_part}")
+            self.main_file = self.main_loader.file_path
+            self.main_table = self.main_loader.table
+            self.main_on_disk = False
+        else:
+            self.separate_when_loaded = False
         self.status_label.setText(message)
-        self.progress_bar.setVisible(False)
         self.load_btn.setEnabled(True)
         self.update_statistics()
+        self.start_queued_separation()
 
     def load_unwanted_list(self):
-        file_path, _ = QFileDialog.getOpenFileName(self, 'Select Unwanted Email List', '', 'Text Files (*.txt)')
+        file_path, _ = QFileDialog.getOpenFileName(self, 'Select Unwanted Email List', '', compress.LIST_FILTER)
         if file_path:
             self.load_file_as_unwanted(file_path)
         else:
             self.status_label.setText('No unwanted file selected.')
             
     def on_unwanted_list_loaded(self, emails, message):
+        from leadsievex import rules
         if emails is not None:
             self.unwanted_emails = emails
+            self.unwanted_rule_lines = rules.rule_lines(emails)
+            self.unwanted_file = None
+        else:
+            self.separate_when_loaded = False
         self.status_label.setText(message)
-        self.progress_bar.setVisible(False)
         self.load_unwanted_btn.setEnabled(True)
         self.update_statistics()
+        self.start_queued_separation()
 
     def separate_emails(self):
-        if not self.main_emails:
+        from leadsievex import engines
+        if self.loading_jobs():
+            # Run as soon as the lists being loaded are ready
+            self.separate_when_loaded = True
+            self.status_label.setText('⏳ Separation will start when the lists are loaded.')
+            return
+        if not self.main_emails and not self.main_on_disk:
             QMessageBox.critical(self, 'Error', 'Please load the main email list first.')
             return
-        pasted_emails = set(email.strip() for email in self.text_area.toPlainText().splitlines() if email.strip())
-        total_unwanted = pasted_emails | self.unwanted_emails
-        if not total_unwanted:
+        pasted_emails = self.get_pasted_emails()
+        if (not pasted_emails and not self.unwanted_emails and not self.unwanted_file
+                and self.suppression_filter is None):
             QMessageBox.critical(self, 'Error', 'Please provide emails to remove (paste or load a file).')
             return
+        if self.suppression_filter is not None and self.main_on_disk:
+            QMessageBox.critical(self, 'Error', 'The suppression filter needs a main list loaded in memory.')
+            return
+        rule_set = self.get_rule_set(pasted_emails)
+        if rule_set is None:
+            return
             
         self.separate_btn.setEnabled(False)
-        self.progress_bar.setVisible(True)
-        self.progress_bar.setValue(0)
         self.status_label.setText('Processing separation...')
         
-        self.separator_processor = SeparatorProcessor(self.main_emails, total_unwanted)
-        self.separator_processor.progress.connect(self.progress_bar.setValue)
+        if self.main_on_disk or self.unwanted_file:
+            # Fall back to the on-disk engine for lists larger than RAM
+            main_sources = [self.main_file] if self.main_on_disk else [self.main_emails]
+            unwanted_sources = [pasted_emails | self.unwanted_emails]
+            if self.unwanted_file:
+                unwanted_sources.insert(0, self.unwanted_file)
+            fd, out_path = tempfile.mkstemp(prefix='leadsievex_result_', suffix='.txt')
+            os.close(fd)
+            
+            self.separator_processor = ExternalSeparatorProcessor(main_sources, unwanted_sources, out_path,
+                                                                  normalizer=self.normalizer)
+            self.separator_processor.measured.connect(self.on_metrics)
+            self.separator_processor.finished.connect(self.on_external_separation_finished)
+            self.start_job(self.separator_processor)
+            return
+        
+        pasted_keys = set(map(self.normalizer, pasted_emails)) if self.normalizer else pasted_emails
+        self.pending_separation = {
+            'main': self.main_emails,
+            'unwanted': self.unwanted_emails,
+            'normalizer': self.normalizer,
+            'filter': self.suppression_filter,
+            'rules': rule_set,
+            'pasted': pasted_keys,
+        }
+        previous = self.last_separation
+        if (previous is not None and previous['main'] is self.main_emails
+                and previous['unwanted'] is self.unwanted_emails
+                and previous['normalizer'] == self.normalizer
+                and previous['filter'] is self.suppression_filter
+                and previous['rules'] == rule_set
+                and previous['remaining'] is self.result_emails):
+            # Only the pasted text changed: patch the previous result
+            added = pasted_keys - previous['pasted']
+            removed = [key for key in previous['pasted'] - pasted_keys
+                       if key not in self.unwanted_emails and not rule_set.matches(key)]
+            if self.suppression_filter is not None:
+                suppressed = self.suppression_filter.contains_keys(removed)
+                removed = [key for key in removed if key not in suppressed]
+            if len(added) + len(removed) <= len(self.main_emails) * engines.INCREMENTAL_MAX_SHARE:
+                unwanted_count = len(self.unwanted_emails) + sum(
+                    1 for key in pasted_keys if key not in self.unwanted_emails)
+                self.separator_processor = SeparatorProcessor(
+                    self.main_emails, None, update=(previous['remaining'], added, removed),
+                    unwanted_count=unwanted_count)
+                self.separator_processor.measured.connect(self.on_metrics)
+                self.separator_processor.finished.connect(self.on_separation_finished)
+                self.start_job(self.separator_processor)
+                return
+        
+        total_unwanted = pasted_emails | self.unwanted_emails
+        self.separator_processor = SeparatorProcessor(self.main_emails, total_unwanted,
+                                                      suppression_filter=self.suppression_filter,
+                                                      rule_set=rule_set)
+        self.separator_processor.measured.connect(self.on_metrics)
         self.separator_processor.finished.connect(self.on_separation_finished)
-        self.separator_processor.start()
+        self.start_job(self.separator_processor)
         
+    def separate_while_loading(self):
+        """Separate a main list file while reading it, without loading it first
+
+        Uses the unwanted emails already loaded or pasted. The main list is
+        read once and what remains is written straight to the chosen file,
+        in input order, so memory only grows with the unwanted list and the
+        emails written.
+        """
+        from leadsievex import delimited
+        if self.unwanted_file:
+            QMessageBox.critical(self, 'Error', 'Separating while loading needs an unwanted list that fits in memory.')
+            return
+        pasted_emails = self.get_pasted_emails()
+        if not pasted_emails and not self.unwanted_emails and self.suppression_filter is None:
+            QMessageBox.critical(self, 'Error', 'Please provide emails to remove (paste or load a file) first.')
+            return
+        rule_set = self.get_rule_set(pasted_emails)
+        if rule_set is None:
+            return
+        main_path, _ = QFileDialog.getOpenFileName(self, 'Select Main Email List', '', compress.LIST_FILTER)
+        if not main_path:
+            self.status_label.setText('No file selected.')
+            return
+        if delimited.is_table(main_path):
+            QMessageBox.critical(self, 'Error', 'Separating while loading reads one email per line; '
+                                                'load CSV / TSV lists as the main list instead.')
+            return
+
+        import datetime
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        out_path, _ = QFileDialog.getSaveFileName(
+            self, 'Save Separated Email List', f"separated_{timestamp}.txt",
+            'Text Files (*.txt);;Gzip Compressed (*.txt.gz);;Zstandard Compressed (*.txt.zst);;'
+            'Bzip2 Compressed (*.txt.bz2);;All Files (*)')
+        if not out_path:
+            self.status_label.setText('Separation cancelled.')
+            return
+
+        self.separate_btn.setEnabled(False)
+        self.status_label.setText('Separating while loading...')
+        self.stream_processor = StreamProcessor(main_path, pasted_emails | self.unwanted_emails, out_path,
+                                                rule_set, self.suppression_filter, self.normalizer)
+        self.stream_processor.measured.connect(self.on_metrics)
+        self.stream_processor.finished.connect(self.on_stream_finished)
+        self.start_job(self.stream_processor)
+
+    def on_stream_finished(self, result, message):
+        self.separate_btn.setEnabled(True)
+        if result is not None:
+            QMessageBox.information(self, 'Separation Complete', message)
+            self.status_label.setText(f'Separated while loading: {result.remaining_count} emails saved.')
+        elif self.stream_processor.control.cancelled:
+            self.status_label.setText(message)
+        else:
+            QMessageBox.critical(self, 'Separation Failed', message)
+            self.status_label.setText('Separation failed.')
+
     def on_separation_finished(self, remaining, message):
         if remaining is not None:
+            self.discard_result_file()
             self.result_emails = remaining
-            # Extract timing info from message
-            if "Completed in " in message:
-                time_part = message.split("Completed in ")[1]
-                self.process_time_label.setText(f"Process Time: {time_part}")
+            self.last_separation = dict(self.pending_separation, remaining=remaining)
         self.status_label.setText(message)
-        self.progress_bar.setVisible(False)
         self.separate_btn.setEnabled(True)
         self.update_statistics()
 
+    def on_external_separation_finished(self, result, message):
+        out_path = self.separator_processor.out_path
+        if result is not None:
+            self.discard_result_file()
+            self.result_emails = set()
+            self.result_file = out_path
+            self.result_count = result.remaining_count
+        elif os.path.exists(out_path):
+            os.remove(out_path)
+        self.status_label.setText(message)
+        self.separate_btn.setEnabled(True)
+        self.update_statistics()
+
+    def discard_result_file(self):
+        """Delete the temporary result of a previous on-disk separation"""
+        if self.result_file and os.path.exists(self.result_file):
+            os.remove(self.result_file)
+        self.result_file = None
+        self.result_count = 0
+
     def export_result(self):
-        if not self.result_emails:
+        from leadsievex import delimited
+        if not self.result_emails and not self.result_file:
             QMessageBox.critical(self, 'Error', 'No result to export. Run separation first.')
             return
         
@@ -759,39 +1589,45 @@ class EmailSeparatorWidget(QWidget):
         
         # Set predefined filename with timestamp
         default_filename = f"separated_{timestamp}.txt"
+        file_types = ('Text Files (*.txt);;Gzip Compressed (*.txt.gz);;Zstandard Compressed (*.txt.zst);;'
+                      'Bzip2 Compressed (*.txt.bz2);;All Files (*)')
+        if self.main_table is not None:
+            # Offer the full rows of a CSV / TSV main list first
+            table_ext = '.tsv' if self.main_table.delimiter == '\t' else '.csv'
+            default_filename = f"separated_{timestamp}{table_ext}"
+            file_types = f'Full Rows (*{table_ext} *{table_ext}.gz);;' + file_types
         
         file_path, _ = QFileDialog.getSaveFileName(
             self, 
             'Save Separated Email List', 
             default_filename,  # Predefined filename
-            'Text Files (*.txt);;All Files (*)'
+            file_types
         )
         if file_path:
             self.export_btn.setEnabled(False)
-            self.progress_bar.setVisible(True)
-            self.progress_bar.setValue(0)
             self.status_label.setText('Exporting results...')
             
-            self.export_processor = ExportProcessor(self.result_emails, file_path)
-            self.export_processor.progress.connect(self.progress_bar.setValue)
+            rows = None
+            if self.main_table is not None and delimited.is_table(file_path):
+                rows = (self.main_file, self.main_table, self.main_emails.normalizer)
+            self.export_processor = ExportProcessor(
+                self.result_file or self.result_emails, file_path, self.export_mode,
+                self.main_emails if self.save_removed_lines else None, rows)
+            self.export_processor.measured.connect(self.on_metrics)
             self.export_processor.finished.connect(self.on_export_finished)
-            self.export_processor.start()
+            self.start_job(self.export_processor)
         else:
             self.status_label.setText('Export cancelled.')
             
     def on_export_finished(self, message):
-        self.progress_bar.setVisible(False)
         self.export_btn.setEnabled(True)
         
-        # Extract timing info from message
-        if "Time taken: " in message:
-            time_part = message.split("Time taken: ")[1].split("\n")[0]
-            self.export_time_label.setText(f"Export Time: {time_part}")
-        
         # Show success/failure message in a popup
         if "✅" in message:
             QMessageBox.information(self, 'Export Complete', message)
             self.status_label.setText('Export completed successfully.')
+        elif self.export_processor.control.cancelled:
+            self.status_label.setText(message)
         else:
             QMessageBox.critical(self, 'Export Failed', message)
             self.status_label.setText('Export failed.')
@@ -800,8 +1636,9 @@ class EmailSeparatorWidget(QWidget):
 
     def preview_emails(self):
         """Preview emails that will be removed before separation"""
+        from leadsievex import rules, store
         # Get emails from text area
-        pasted_emails = set(email.strip() for email in self.text_area.toPlainText().splitlines() if email.strip())
+        pasted_emails = self.get_pasted_emails()
         
         # Combine with file-loaded unwanted emails
         total_unwanted = pasted_emails | self.unwanted_emails
@@ -814,181 +1651,217 @@ class EmailSeparatorWidget(QWidget):
                 '• Paste emails in the text area')
             return
         
+        rule_set = self.get_rule_set(pasted_emails)
+        if rule_set is None:
+            return
+        
         # Check which emails actually exist in main list (if loaded)
+        emails_remaining = None
         if self.main_emails:
-            emails_to_remove = total_unwanted & self.main_emails
+            # Selected by a mask, the previewed sets share the main list's buffer instead of copying it
+            removed = self.main_emails.isin(total_unwanted)
+            if rule_set.rules:
+                removed |= rule_set.mask(self.main_emails)
+            emails_to_remove = self.main_emails.select(removed)
+            emails_remaining = self.main_emails.select(~removed)
             emails_not_found = total_unwanted - self.main_emails
+            if isinstance(emails_not_found, store.CompactEmailSet):
+                emails_not_found = emails_not_found.without(rules.rule_lines(emails_not_found))
+            else:
+                emails_not_found = {email for email in emails_not_found if not rules.is_rule(email)}
         else:
             emails_to_remove = total_unwanted
             emails_not_found = set()
         
         # Show preview dialog
+        from email_dialogs import EmailPreviewDialog
         preview_dialog = EmailPreviewDialog(
             emails_to_remove, 
             emails_not_found, 
             len(self.main_emails) if self.main_emails else 0,
-            self
+            self,
+            emails_remaining
         )
         preview_dialog.exec_()
 
-class EmailPreviewDialog(QDialog):
-    """Dialog to preview emails that will be removed"""
-    
-    def __init__(self, emails_to_remove, emails_not_found, main_list_size, parent=None):
+class BatchDialog(QDialog):
+    """Job queue running many main lists against the current unwanted emails"""
+
+    COLUMNS = ['File', 'Status', 'Main', 'Removed', 'Remaining', 'Seconds']
+
+    def __init__(self, unwanted_sources, normalizer=None, export_mode=None, parent=None):
         super().__init__(parent)
-        self.emails_to_remove = emails_to_remove
-        self.emails_not_found = emails_not_found
-        self.main_list_size = main_list_size
-        self.setWindowTitle('👁️ Email Preview')
-        self.setWindowIcon(self.parent().windowIcon() if parent else None)
-        self.resize(700, 500)
+        self.unwanted_sources = unwanted_sources
+        self.normalizer = normalizer
+        self.export_mode = export_mode
+        self.main_files = []
+        self.out_dir = None
+        self.batch_processor = None
+        self.setWindowTitle('📚 Batch Separate')
+        self.resize(760, 420)
         self.setup_ui()
-    
+
     def setup_ui(self):
-        """Setup the preview dialog UI"""
+        """Setup the job queue UI"""
         layout = QVBoxLayout()
-        
-        # Header with statistics
-        header = QLabel()
-        header.setWordWrap(True)
-        header.setAlignment(Qt.AlignCenter)
-        
-        if self.main_list_size > 0:
-            removal_percentage = (len(self.emails_to_remove) / self.main_list_size) * 100 if self.main_list_size > 0 else 0
-            remaining_count = self.main_list_size - len(self.emails_to_remove)
-            remaining_percentage = (remaining_count / self.main_list_size) * 100 if self.main_list_size > 0 else 0
-            
-            header.setText(f"""
-            <div style="font-size: 14px; margin: 10px;">
-                <h3 style="color: #4CAF50;">📊 Preview Summary</h3>
-                <p><b>📧 Main List Size:</b> {self.main_list_size:,} emails</p>
-                <p><b>🗑️ Emails to Remove:</b> {len(self.emails_to_remove):,} emails ({removal_percentage:.1f}%)</p>
-                <p><b>✅ Emails Remaining:</b> {remaining_count:,} emails ({remaining_percentage:.1f}%)</p>
-                {f'<p><b>❌ Not Found in Main List:</b> {len(self.emails_not_found):,} emails</p>' if self.emails_not_found else ''}
-            </div>
-            """)
-        else:
-            header.setText(f"""
-            <div style="font-size: 14px; margin: 10px;">
-                <h3 style="color: #FF9800;">⚠️ No Main List Loaded</h3>
-                <p><b>🗑️ Emails to Remove:</b> {len(self.emails_to_remove):,} emails</p>
-                <p><i>Load a main list to see detailed removal statistics</i></p>
-            </div>
-            """)
-        
-        layout.addWidget(header)
-        
-        # Tabs for different email lists
-        tab_widget = QTabWidget()
-        
-        # Tab 1: Emails to remove (found in main list)
-        if self.emails_to_remove:
-            remove_tab = QWidget()
-            remove_layout = QVBoxLayout()
-            
-            remove_info = QLabel(f'📧 These {len(self.emails_to_remove):,} emails will be removed from your main list:')
-            remove_info.setStyleSheet("font-weight: bold; color: #d32f2f; margin: 5px;")
-            remove_layout.addWidget(remove_info)
-            
-            remove_text = QTextEdit()
-            remove_text.setReadOnly(True)
-            remove_text.setFont(QFont("Consolas", 10))
-            
-            # Show sample of emails (limit to 100 for performance)
-            sample_emails = list(self.emails_to_remove)[:100]
-            email_text = '\n'.join(sample_emails)
-            
-            if len(self.emails_to_remove) > 100:
-                email_text += f'\n\n... and {len(self.emails_to_remove) - 100:,} more emails'
-            
-            remove_text.setText(email_text)
-            remove_layout.addWidget(remove_text)
-            
-            remove_tab.setLayout(remove_layout)
-            tab_widget.addTab(remove_tab, f'🗑️ To Remove ({len(self.emails_to_remove):,})')
-        
-        # Tab 2: Emails not found in main list
-        if self.emails_not_found:
-            not_found_tab = QWidget()
-            not_found_layout = QVBoxLayout()
-            
-            not_found_info = QLabel(f'⚠️ These {len(self.emails_not_found):,} emails are not in your main list:')
-            not_found_info.setStyleSheet("font-weight: bold; color: #ff9800; margin: 5px;")
-            not_found_layout.addWidget(not_found_info)
-            
-            not_found_text = QTextEdit()
-            not_found_text.setReadOnly(True)
-            not_found_text.setFont(QFont("Consolas", 10))
-            
-            # Show sample of emails (limit to 100 for performance)
-            sample_not_found = list(self.emails_not_found)[:100]
-            not_found_email_text = '\n'.join(sample_not_found)
-            
-            if len(self.emails_not_found) > 100:
-                not_found_email_text += f'\n\n... and {len(self.emails_not_found) - 100:,} more emails'
-            
-            not_found_text.setText(not_found_email_text)
-            not_found_layout.addWidget(not_found_text)
-            
-            not_found_tab.setLayout(not_found_layout)
-            tab_widget.addTab(not_found_tab, f'❌ Not Found ({len(self.emails_not_found):,})')
-        
-        layout.addWidget(tab_widget)
-        
-        # Buttons
+
+        self.info_label = QLabel('Add main lists; each one is separated against the loaded unwanted emails '
+                                 'and saved as <name>_separated.txt.')
+        self.info_label.setWordWrap(True)
+        layout.addWidget(self.info_label)
+
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        layout.addWidget(self.table)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setVisible(False)
+        layout.addWidget(self.progress_bar)
+
         button_layout = QHBoxLayout()
-        
-        close_btn = QPushButton('📋 Close Preview')
-        close_btn.clicked.connect(self.accept)
-        close_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #6c757d;
-                color: white;
-                border: none;
-                padding: 10px 20px;
-                font-size: 12px;
-                font-weight: bold;
-                border-radius: 5px;
-            }
-            QPushButton:hover {
-                background-color: #5a6268;
-            }
-        """)
-        
-        if self.emails_to_remove and self.main_list_size > 0:
-            proceed_btn = QPushButton('✂️ Proceed with Separation')
-            proceed_btn.clicked.connect(self.proceed_separation)
-            proceed_btn.setStyleSheet("""
-                QPushButton {
-                    background-color: #28a745;
-                    color: white;
-                    border: none;
-                    padding: 10px 20px;
-                    font-size: 12px;
-                    font-weight: bold;
-                    border-radius: 5px;
-                }
-                QPushButton:hover {
-                    background-color: #218838;
-                }
-            """)
-            button_layout.addWidget(proceed_btn)
-        
+        self.add_btn = QPushButton('📂 Add Files...')
+        self.add_btn.clicked.connect(self.add_files)
+        button_layout.addWidget(self.add_btn)
+
+        self.out_dir_btn = QPushButton('📁 Output Folder...')
+        self.out_dir_btn.clicked.connect(self.choose_out_dir)
+        button_layout.addWidget(self.out_dir_btn)
+
+        button_layout.addStretch()
+
+        self.start_btn = QPushButton('▶️ Start')
+        self.start_btn.clicked.connect(self.start_batch)
+        button_layout.addWidget(self.start_btn)
+
+        self.cancel_btn = QPushButton('⏹️ Cancel')
+        self.cancel_btn.setToolTip('Stop after the files in progress; files not started are skipped')
+        self.cancel_btn.clicked.connect(self.cancel_batch)
+        self.cancel_btn.setEnabled(False)
+        button_layout.addWidget(self.cancel_btn)
+
+        close_btn = QPushButton('❌ Close')
+        close_btn.clicked.connect(self.reject)
         button_layout.addWidget(close_btn)
+
         layout.addLayout(button_layout)
-        
         self.setLayout(layout)
-    
-    def proceed_separation(self):
-        """Close preview and trigger separation"""
-        self.accept()
-        if self.parent():
-            self.parent().separate_emails()
+
+    def add_files(self, file_paths=None):
+        """Queue main lists"""
+        if not file_paths:
+            file_paths, _ = QFileDialog.getOpenFileNames(self, 'Select Main Email Lists', '', compress.LIST_FILTER)
+        for file_path in file_paths:
+            if file_path in self.main_files:
+                continue
+            self.main_files.append(file_path)
+            row = self.table.rowCount()
+            self.table.insertRow(row)
+            self.table.setItem(row, 0, QTableWidgetItem(os.path.basename(file_path)))
+            self.table.setItem(row, 1, QTableWidgetItem('Queued'))
+        if self.main_files and self.out_dir is None:
+            self.out_dir = os.path.dirname(self.main_files[0])
+            self.out_dir_btn.setToolTip(self.out_dir)
+
+    def choose_out_dir(self):
+        out_dir = QFileDialog.getExistingDirectory(self, 'Select Output Folder', self.out_dir or '')
+        if out_dir:
+            self.out_dir = out_dir
+            self.out_dir_btn.setToolTip(out_dir)
+
+    def start_batch(self):
+        if not self.main_files:
+            QMessageBox.critical(self, 'Error', 'Add at least one main list first.')
+            return
+        self.add_btn.setEnabled(False)
+        self.start_btn.setEnabled(False)
+        self.progress_bar.setVisible(True)
+        self.progress_bar.setValue(0)
+        for row in range(self.table.rowCount()):
+            self.table.setItem(row, 1, QTableWidgetItem('Running...'))
+
+        self.batch_processor = BatchProcessor(self.main_files, self.unwanted_sources, self.out_dir,
+                                              self.normalizer, self.export_mode)
+        self.batch_processor.progress.connect(self.progress_bar.setValue)
+        self.batch_processor.file_done.connect(self.on_file_done)
+        self.batch_processor.finished.connect(self.on_batch_finished)
+        self.batch_processor.start()
+        self.cancel_btn.setEnabled(True)
+
+    def cancel_batch(self):
+        if self.batch_processor is not None and self.batch_processor.isRunning():
+            self.batch_processor.cancel()
+            self.cancel_btn.setEnabled(False)
+            self.info_label.setText('Cancelling after the files in progress...')
+
+    def on_file_done(self, result):
+        row = self.main_files.index(result.main_file)
+        if result.error:
+            self.table.setItem(row, 1, QTableWidgetItem(f'❌ {result.error}'))
+            return
+        values = ['✅ Done', f'{result.main_count:,}', f'{result.removed_count:,}',
+                  f'{result.remaining_count:,}', f'{result.seconds:.2f}']
+        for column, value in enumerate(values, 1):
+            self.table.setItem(row, column, QTableWidgetItem(value))
+
+    def on_batch_finished(self, results, message):
+        from leadsievex import batch
+        self.progress_bar.setVisible(False)
+        self.cancel_btn.setEnabled(False)
+        if results is None:
+            for row in range(self.table.rowCount()):
+                if self.table.item(row, 1).text() == 'Running...':
+                    self.table.setItem(row, 1, QTableWidgetItem('Skipped'))
+        if results is not None:
+            message += f"\nSummary saved to {os.path.join(self.out_dir, batch.SUMMARY_NAME)}"
+        self.info_label.setText(message)
+
+    def reject(self):
+        if self.batch_processor is not None and self.batch_processor.isRunning():
+            QMessageBox.information(self, 'Batch Separate', 'Please wait for the batch to finish.')
+            return
+        super().reject()
+
+class StartupProfiler(QObject):
+    """Reports the start-up marks once the window has painted, then quits (--profile-startup)"""
+
+    def __init__(self, window):
+        super().__init__(window)
+        self.painted = False
+        window.installEventFilter(self)
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint and not self.painted:
+            self.painted = True
+            # Runs once the whole window is painted
+            QTimer.singleShot(0, self.report)
+        return False
+
+    def report(self):
+        STARTUP_MARKS.append(('first paint', time.perf_counter()))
+        start = previous = STARTUP_MARKS[0][1]
+        lines = ['Startup profile (milliseconds since the script started)']
+        for step, mark in STARTUP_MARKS[1:]:
+            lines.append(f"  {step:<20} {(mark - start) * 1000:8.1f}  (+{(mark - previous) * 1000:.1f})")
+            previous = mark
+        text = '\n'.join(lines)
+        if sys.stdout is not None:
+            print(text)
+        else:
+            # Windowed exe: no console to print to
+            QMessageBox.information(None, 'Startup Profile', text)
+        QApplication.instance().quit()
 
 def main():
+    STARTUP_MARKS.append(('define widgets', time.perf_counter()))
     app = QApplication(sys.argv)
+    STARTUP_MARKS.append(('create application', time.perf_counter()))
     window = EmailSeparatorMainWindow()
+    STARTUP_MARKS.append(('build window', time.perf_counter()))
     window.show()
+    if PROFILE_STARTUP:
+        StartupProfiler(window)
     sys.exit(app.exec_())
 
 if __name__ == '__main__':
@@ -0,0 +1,11 @@
+"""Qt-free email separation engine shared by the LeadSieveX GUI and CLI.
+
+Importing this package never loads PyQt5, so it can be used from scripts,
+cron jobs and headless build servers.
+"""
+
+from .core import CHUNK_SIZE, export_emails, iter_emails, load_emails, separate
+
+__version__ = '2.0.0'
+
+__all__ = ['CHUNK_SIZE', 'export_emails', 'iter_emails', 'load_emails', 'separate']
@@ -0,0 +1,174 @@
+"""Batch mode: one suppression set against many main lists.
+
+The unwanted sources are loaded once into a ``CompactEmailSet`` and saved as
+a temporary binary index (see ``cache``). Worker processes memory-map that
+index, so the suppression set is parsed once and shared between them
+instead of being rebuilt for every main list. Each worker loads one main
+list, separates it and writes ``<name>_separated.txt``. Domain and wildcard
+rule lines of the unwanted sources are compiled once and sent to every
+worker.
+
+``.csv`` / ``.tsv`` lists are read through their email column (see
+``delimited``). A table main list gives a table of its surviving rows, as
+in the single-file command line, and its counts are rows.
+"""
+
+import os
+import tempfile
+import time
+from collections import namedtuple
+
+from . import cache, compress, delimited, engines, export, rules, store
+
+SUFFIX = '_separated'
+
+SUMMARY_NAME = 'batch_summary.tsv'
+
+# Outcome of one main list; ``error`` is ``None`` on success
+BatchResult = namedtuple('BatchResult', 'main_file out_path main_count removed_count remaining_count seconds error')
+
+
+def build_suppression(unwanted_sources, normalizer=None, use_cache=True, cache_dir=None,
+                      column=None, delimiter=None, header=True):
+    """Union of the unwanted sources (file paths or iterables of emails) as one compact set
+
+    ``column``, ``delimiter`` and ``header`` locate the email column of
+    table sources (see ``delimited.resolve``).
+    """
+    suppression = store.CompactEmailSet((), normalizer)
+    for source in unwanted_sources:
+        if isinstance(source, str) and delimited.is_table(source):
+            table = delimited.resolve(source, column, delimiter, header)
+            emails = delimited.load_column(source, table, normalizer=normalizer)
+        elif isinstance(source, str):
+            if use_cache:
+                emails = cache.load(source, normalizer=normalizer, cache_dir=cache_dir)[0]
+            else:
+                emails = store.load_compact(source, normalizer=normalizer)
+        else:
+            emails = source
+        suppression = suppression | emails
+    return suppression
+
+
+def output_paths(main_files, out_dir=None):
+    """``<name>_separated<ext>`` for every main file, unique within the batch
+
+    A compressed main list gives a result compressed the same way.
+    """
+    paths = []
+    taken = set()
+    for main_file in main_files:
+        name, ext = compress.split_ext(os.path.basename(main_file))
+        directory = out_dir or os.path.dirname(os.path.abspath(main_file))
+        path = os.path.join(directory, f"{name}{SUFFIX}{ext or '.txt'}")
+        number = 2
+        while os.path.normcase(path) in taken:
+            path = os.path.join(directory, f"{name}{SUFFIX}_{number}{ext or '.txt'}")
+            number += 1
+        taken.add(os.path.normcase(path))
+        paths.append(path)
+    return paths
+
+
+def _separate_file(main_file, index_file, out_path, export_mode=export.DEFAULT_EXPORT_MODE, rule_set=None,
+                   table_options=(None, None, True)):
+    """Worker: separate one main list against the mapped suppression index
+
+    ``table_options`` are the ``column, delimiter, header`` used to resolve a
+    table main list.
+    """
+    start_time = time.perf_counter()
+    try:
+        suppression = cache.open_index(index_file)
+        if suppression is None:
+            raise OSError(f"Cannot read suppression index {index_file}")
+        if delimited.is_table(main_file):
+            table = delimited.resolve(main_file, *table_options)
+            result = delimited.filter_rows(main_file, table, out_path, remove=suppression, rules=rule_set)
+            main_count, remaining_count = result.row_count, result.written_count
+        else:
+            main_emails = store.load_compact(main_file, normalizer=suppression.normalizer)
+            remaining = engines.separate(main_emails, suppression, 'hash', rules=rule_set)
+            export.write_result(remaining, out_path, export_mode)
+            main_count, remaining_count = len(main_emails), len(remaining)
+    except (OSError, UnicodeDecodeError, ValueError) as e:
+        return BatchResult(main_file, out_path, 0, 0, 0, time.perf_counter() - start_time, str(e))
+    return BatchResult(main_file, out_path, main_count, main_count - remaining_count,
+                       remaining_count, time.perf_counter() - start_time, None)
+
+
+def batch_separate(main_files, suppression, out_dir=None, workers=None,
+                   export_mode=export.DEFAULT_EXPORT_MODE, tmp_dir=None, progress=None, on_result=None,
+                   column=None, delimiter=None, header=True):
+    """Separate every main file against ``suppression`` and return the ``BatchResult`` list
+
+    ``on_result`` is called with each ``BatchResult`` as soon as its file is
+    done (in completion order); the returned list follows ``main_files``.
+    ``workers=1`` runs everything in this process. ``column``, ``delimiter``
+    and ``header`` locate the email column of table main lists.
+    """
+    table_options = (column, delimiter, header)
+    out_paths = output_paths(main_files, out_dir)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    results = [None] * len(main_files)
+
+    def finished(i, result):
+        results[i] = result
+        if on_result is not None:
+            on_result(result)
+        if progress is not None:
+            progress(sum(r is not None for r in results) * 100 // len(results))
+
+    rule_set = rules.from_sources([suppression])
+    with tempfile.TemporaryDirectory(prefix='leadsievex_', dir=tmp_dir) as work_dir:
+        index_file = os.path.join(work_dir, 'suppression' + cache.INDEX_SUFFIX)
+        cache.save(suppression, None, index_file, source={})
+
+        if workers == 1:
+            for i, main_file in enumerate(main_files):
+                finished(i, _separate_file(main_file, index_file, out_paths[i], export_mode, rule_set,
+                                           table_options))
+        else:
+            # Imported here: it loads multiprocessing, which the app does not need to start
+            from concurrent.futures import ProcessPoolExecutor, as_completed
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                jobs = {pool.submit(_separate_file, main_file, index_file, out_paths[i], export_mode, rule_set,
+                                    table_options): i
+                        for i, main_file in enumerate(main_files)}
+                try:
+                    for job in as_completed(jobs):
+                        finished(jobs[job], job.result())
+                except BaseException:
+                    # E.g. cancelled through ``progress``: drop the files not started yet
+                    for job in jobs:
+                        job.cancel()
+                    raise
+
+    return results
+
+
+def summary_table(results):
+    """Human readable table of per-file counts and timings"""
+    lines = [f"{'file':<32} {'main':>12} {'removed':>12} {'remaining':>12} {'seconds':>9}"]
+    for result in results:
+        name = os.path.basename(result.main_file)
+        if result.error:
+            lines.append(f"{name:<32} error: {result.error}")
+        else:
+            lines.append(f"{name:<32} {result.main_count:>12,} {result.removed_count:>12,} "
+                         f"{result.remaining_count:>12,} {result.seconds:>9.2f}")
+    done = [result for result in results if not result.error]
+    lines.append(f"{'total':<32} {sum(r.main_count for r in done):>12,} "
+                 f"{sum(r.removed_count for r in done):>12,} {sum(r.remaining_count for r in done):>12,} "
+                 f"{sum(r.seconds for r in done):>9.2f}")
+    return '\n'.join(lines)
+
+
+def write_summary(results, file_path):
+    """Write the per-file results as tab separated values"""
+    with open(file_path, 'w', encoding='utf-8') as f:
+        f.write('\t'.join(BatchResult._fields) + '\n')
+        for result in results:
+            f.write('\t'.join('' if value is None else str(value) for value in result) + '\n')
@@ -0,0 +1,378 @@
+"""Benchmark suite: synthetic lists, every engine, JSON results.
+
+Example::
+
+    python -m leadsievex.bench --rows 1M 10M 100M
+    python -m leadsievex.bench --rows 10M --overlap 0.3 --duplicates 0.05 --json results.json
+
+For every row count a synthetic main list and unwanted list are written to
+the work directory, where later runs with the same settings reuse them. The
+addresses look like real ones: common first and last names in a few local
+part styles, a handful of webmail domains taking most of the traffic and a
+long Zipf-distributed tail of company domains. ``--duplicates`` repeats
+earlier addresses of the main list (half of them capitalised, so they only
+match once normalised) and ``--overlap`` is the share of the unwanted list
+taken from the main list.
+
+Every engine runs in a fresh process, so the peak RSS reported is that of
+one engine on one input. The in-memory engines are timed per phase: load
+(parsing both text files), separate and export; the stream engine's load is
+the unwanted list and its single pass over the main list counts as separate.
+The on-disk engines read and write the files themselves, so only their total
+is timed. ``--json`` writes
+the results together with the build and machine they were measured on.
+"""
+
+import argparse
+import datetime
+import json
+import math
+import os
+import platform
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from . import __version__, core, engines, export, external, normalize, parallel, store, stream
+from .metrics import peak_rss
+
+_COUNT_UNITS = {'': 1, 'K': 10 ** 3, 'M': 10 ** 6, 'G': 10 ** 9}
+
+# Engines that load the lists into memory, and those that work from the files
+MEMORY_ENGINES = tuple(sorted(engines.ENGINES))
+BENCH_ENGINES = MEMORY_ENGINES + ('stream', 'external', 'parallel')
+
+# Addresses generated per block
+GENERATE_BLOCK = 1 << 18
+
+_FIRST_NAMES = (
+    'james', 'mary', 'john', 'patricia', 'robert', 'jennifer', 'michael', 'linda', 'william', 'elizabeth',
+    'david', 'barbara', 'richard', 'susan', 'joseph', 'jessica', 'charles', 'karen', 'christopher', 'nancy',
+    'daniel', 'lisa', 'matthew', 'betty', 'anthony', 'margaret', 'mark', 'sandra', 'donald', 'ashley',
+    'steven', 'kimberly', 'paul', 'emily', 'andrew', 'donna', 'joshua', 'michelle', 'kenneth', 'carol',
+    'kevin', 'amanda', 'brian', 'melissa', 'george', 'deborah', 'timothy', 'stephanie', 'ronald', 'rebecca',
+    'edward', 'sharon', 'jason', 'laura', 'jeffrey', 'cynthia', 'ryan', 'kathleen', 'jacob', 'amy',
+    'gary', 'angela', 'nicholas', 'maria',
+)
+_LAST_NAMES = (
+    'smith', 'johnson', 'williams', 'brown', 'jones', 'garcia', 'miller', 'davis', 'rodriguez', 'martinez',
+    'hernandez', 'lopez', 'gonzalez', 'wilson', 'anderson', 'taylor', 'moore', 'jackson', 'martin', 'lee',
+    'perez', 'thompson', 'white', 'harris', 'sanchez', 'clark', 'ramirez', 'lewis', 'robinson', 'walker',
+    'young', 'allen', 'king', 'wright', 'scott', 'torres', 'nguyen', 'hill', 'flores', 'green',
+    'adams', 'nelson', 'baker', 'hall', 'rivera', 'campbell', 'mitchell', 'carter', 'roberts', 'gomez',
+    'phillips', 'evans', 'turner', 'diaz', 'parker', 'cruz', 'edwards', 'collins', 'reyes', 'stewart',
+    'morris', 'morales', 'murphy', 'cook',
+)
+_LOCAL_STYLES = ('{f}.{l}{n}', '{f}_{l}{n}', '{l}.{f}{n}', '{f}-{l}{n}')
+
+# Webmail domains and their share of addresses; the rest go to the tail
+_WEBMAIL = (('gmail.com', 0.30), ('yahoo.com', 0.09), ('hotmail.com', 0.07), ('outlook.com', 0.05),
+            ('icloud.com', 0.03), ('aol.com', 0.02), ('gmx.de', 0.01), ('mail.ru', 0.01))
+TAIL_DOMAINS = 50000
+_TAIL_SUFFIXES = ('com', 'com', 'com', 'net', 'org', 'io', 'co.uk', 'de')
+
+# Slots of the domain lookup table (the resolution of the distribution)
+_DOMAIN_SLOTS = 1 << 16
+
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+
+
+def parse_count(text):
+    """Parse a row count such as ``1M`` or ``250K`` (powers of 1000)"""
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([KMG]?)\s*', str(text), re.IGNORECASE)
+    if not match:
+        raise ValueError(f"Invalid row count: {text!r}")
+    return int(float(match.group(1)) * _COUNT_UNITS[match.group(2).upper()])
+
+
+def _ratio(text):
+    value = float(text)
+    if not 0 <= value <= 1:
+        raise argparse.ArgumentTypeError(f"must be between 0 and 1: {text}")
+    return value
+
+
+def _domain_table():
+    """``(domains, slots)``: every domain and a table mapping hash slots to them by popularity"""
+    domains = [domain for domain, _ in _WEBMAIL]
+    weights = [share for _, share in _WEBMAIL]
+    tail = 1 - sum(weights)
+    ranks = np.arange(1, TAIL_DOMAINS + 1, dtype=np.float64)
+    zipf = 1 / ranks
+    domains += [f"company{rank}.{_TAIL_SUFFIXES[rank % len(_TAIL_SUFFIXES)]}" for rank in range(1, TAIL_DOMAINS + 1)]
+    weights = np.concatenate((weights, zipf * tail / zipf.sum()))
+    bounds = np.cumsum(weights) * _DOMAIN_SLOTS
+    slots = np.searchsorted(bounds, np.arange(_DOMAIN_SLOTS) + 0.5)
+    return domains, np.minimum(slots, len(domains) - 1)
+
+
+def _mix(values, salt):
+    """Stable pseudo-random 64-bit values of integers"""
+    with np.errstate(over='ignore'):
+        mixed = (values.astype(np.uint64) + np.uint64(salt)) * _GOLDEN
+        mixed ^= mixed >> np.uint64(29)
+        mixed *= np.uint64(0xBF58476D1CE4E5B9)
+        mixed ^= mixed >> np.uint64(32)
+    return mixed
+
+
+def _addresses(ids, capitalise, domains, slots):
+    """The synthetic address of every id (distinct ids give distinct addresses)"""
+    ids = ids.astype(np.int64)
+    mixed = _mix(ids, 1)
+    styles = (mixed % np.uint64(len(_LOCAL_STYLES))).tolist()
+    domain_indices = slots[(mixed >> np.uint64(40)) % np.uint64(_DOMAIN_SLOTS)].tolist()
+    first = (ids % len(_FIRST_NAMES)).tolist()
+    last = (ids // len(_FIRST_NAMES) % len(_LAST_NAMES)).tolist()
+    numbers = (ids // (len(_FIRST_NAMES) * len(_LAST_NAMES))).tolist()
+    lines = []
+    for style, f, l, n, d, upper in zip(styles, first, last, numbers, domain_indices, capitalise.tolist()):
+        address = _LOCAL_STYLES[style].format(f=_FIRST_NAMES[f], l=_LAST_NAMES[l], n=n or '') + '@' + domains[d]
+        lines.append(address.capitalize() if upper else address)
+    return lines
+
+
+class _Permutation:
+    """Bijection of ``range(size)`` that scatters consecutive numbers"""
+
+    def __init__(self, size, seed):
+        self.size = max(size, 1)
+        step = int(self.size * 0.618034) | 1
+        while math.gcd(step, self.size) != 1:
+            step += 2
+        self.step = step % self.size or 1
+        self.offset = seed % self.size
+
+    def __call__(self, values):
+        return (values.astype(object) * self.step + self.offset) % self.size if self.size > 2 ** 31 \
+            else (values.astype(np.int64) * self.step + self.offset) % self.size
+
+
+def write_synthetic(main_path, unwanted_path, rows, unwanted_ratio=0.1, overlap=0.5, duplicates=0.0, seed=0,
+                    progress=None):
+    """Write a synthetic main list of ``rows`` lines and its unwanted list
+
+    ``duplicates`` is the share of main list lines repeating an earlier
+    address, ``overlap`` the share of the unwanted list found in the main
+    list. Returns ``(unique_main_count, unwanted_rows)``.
+    """
+    domains, slots = _domain_table()
+    permute = _Permutation(rows, seed)
+    unique = 0
+    with open(main_path, 'w', encoding='utf-8', newline='\n') as f:
+        for block in range(0, rows, GENERATE_BLOCK):
+            lines = np.arange(block, min(block + GENERATE_BLOCK, rows), dtype=np.int64)
+            mixed = _mix(lines, seed + 2)
+            repeat = (mixed % np.uint64(1_000_000)).astype(np.int64) < int(duplicates * 1_000_000)
+            # Number of new addresses written before each line
+            new_before = unique + np.cumsum(~repeat) - ~repeat
+            repeat &= new_before > 0
+            sequence = np.where(repeat, (mixed >> np.uint64(20)).astype(np.int64) % np.maximum(new_before, 1),
+                                new_before)
+            unique = int(new_before[-1]) + int(not repeat[-1])
+            f.write('\n'.join(_addresses(permute(sequence), repeat & (mixed >> np.uint64(63) == 1),
+                                         domains, slots)) + '\n')
+            if progress is not None:
+                progress(min(block + GENERATE_BLOCK, rows) * 90 // max(rows, 1))
+
+    unwanted_rows = int(rows * unwanted_ratio)
+    with open(unwanted_path, 'w', encoding='utf-8', newline='\n') as f:
+        for block in range(0, unwanted_rows, GENERATE_BLOCK):
+            lines = np.arange(block, min(block + GENERATE_BLOCK, unwanted_rows), dtype=np.int64)
+            mixed = _mix(lines, seed + 3)
+            hit = (mixed % np.uint64(1_000_000)).astype(np.int64) < int(overlap * 1_000_000)
+            # Hits are addresses of the main list, the others lie beyond its ids
+            ids = np.where(hit, permute((mixed >> np.uint64(20)).astype(np.int64) % max(unique, 1)),
+                           permute.size + lines)
+            f.write('\n'.join(_addresses(np.asarray(ids, dtype=np.int64), np.zeros(len(ids), dtype=bool),
+                                         domains, slots)) + '\n')
+    if progress is not None:
+        progress(100)
+    return unique, unwanted_rows
+
+
+def synthetic_files(work_dir, rows, unwanted_ratio=0.1, overlap=0.5, duplicates=0.0, seed=0):
+    """Paths of the synthetic lists for these settings, generated unless already in ``work_dir``"""
+    os.makedirs(work_dir, exist_ok=True)
+    tag = f"{rows}_u{unwanted_ratio:g}_o{overlap:g}_d{duplicates:g}_s{seed}"
+    main_path = os.path.join(work_dir, f"main_{tag}.txt")
+    unwanted_path = os.path.join(work_dir, f"unwanted_{tag}.txt")
+    if not (os.path.exists(main_path) and os.path.exists(unwanted_path)):
+        # Written under temporary names, so an interrupted run is not reused
+        write_synthetic(main_path + '.part', unwanted_path + '.part', rows, unwanted_ratio, overlap, duplicates,
+                        seed)
+        os.replace(unwanted_path + '.part', unwanted_path)
+        os.replace(main_path + '.part', main_path)
+    return main_path, unwanted_path
+
+
+def run_engine(engine, main_path, unwanted_path, out_path, rules=normalize.DEFAULT_RULES,
+               export_mode=export.DEFAULT_EXPORT_MODE, max_memory=external.DEFAULT_MAX_MEMORY, tmp_dir=None):
+    """Time one engine on one pair of files; returns a dict of the measurements"""
+    normalizer = normalize.make_normalizer(rules)
+    baseline_rss = peak_rss()[0]
+    timings = {'load_seconds': None, 'separate_seconds': None, 'export_seconds': None}
+    start_time = time.perf_counter()
+
+    if engine in engines.ENGINES:
+        load = core.load_emails if engine == 'set' else (lambda path: store.load_compact(path, normalizer=normalizer))
+        main_emails = load(main_path)
+        unwanted_emails = load(unwanted_path)
+        timings['load_seconds'] = time.perf_counter() - start_time
+
+        phase_start = time.perf_counter()
+        remaining = engines.separate(main_emails, unwanted_emails, engine, normalizer=normalizer)
+        timings['separate_seconds'] = time.perf_counter() - phase_start
+
+        phase_start = time.perf_counter()
+        export.write_result(remaining, out_path, export_mode, max_memory=max_memory, tmp_dir=tmp_dir)
+        timings['export_seconds'] = time.perf_counter() - phase_start
+        main_count, remaining_count = len(main_emails), len(remaining)
+    elif engine == 'stream':
+        unwanted_emails = store.load_compact(unwanted_path, normalizer=normalizer)
+        timings['load_seconds'] = time.perf_counter() - start_time
+
+        phase_start = time.perf_counter()
+        result = stream.stream_separate([main_path], unwanted_emails, out_path)
+        timings['separate_seconds'] = time.perf_counter() - phase_start
+        main_count, remaining_count = result.row_count, result.remaining_count
+    elif engine == 'external':
+        result = external.external_separate([main_path], [unwanted_path], out_path, max_memory=max_memory,
+                                            tmp_dir=tmp_dir, normalizer=normalizer)
+        main_count, remaining_count = result.main_count, result.remaining_count
+    elif engine == 'parallel':
+        result = parallel.parallel_separate([main_path], [unwanted_path], out_path, tmp_dir=tmp_dir,
+                                            normalizer=normalizer)
+        main_count, remaining_count = result.main_count, result.remaining_count
+    else:
+        raise ValueError(f"Unknown engine: {engine!r}")
+
+    total_seconds = time.perf_counter() - start_time
+    own_rss, children_rss = peak_rss()
+    input_bytes = os.path.getsize(main_path) + os.path.getsize(unwanted_path)
+    return dict(timings, engine=engine, total_seconds=total_seconds,
+                mb_per_second=input_bytes / (1024 * 1024) / total_seconds if total_seconds else 0.0,
+                main_count=main_count, remaining_count=remaining_count, output_bytes=os.path.getsize(out_path),
+                baseline_rss_bytes=baseline_rss, peak_rss_bytes=own_rss, children_peak_rss_bytes=children_rss)
+
+
+def _run_isolated(settings):
+    """``run_engine`` in a fresh interpreter, so its peak RSS is its own"""
+    package_parent = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [package_parent, os.environ.get('PYTHONPATH')])))
+    done = subprocess.run([sys.executable, '-m', 'leadsievex.bench', '--run-one', json.dumps(settings)],
+                          capture_output=True, text=True, env=env)
+    if done.returncode != 0:
+        raise RuntimeError(f"{settings['engine']} failed: {done.stderr.strip().splitlines()[-1:] or done.returncode}")
+    return json.loads(done.stdout)
+
+
+def machine_info():
+    """Build and machine the results were measured on"""
+    return {
+        'leadsievex': __version__,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'timestamp': datetime.datetime.now().astimezone().isoformat(timespec='seconds'),
+    }
+
+
+def _mb(value):
+    return f"{value / (1024 * 1024):,.0f}" if value is not None else '-'
+
+
+def _seconds(value):
+    return f"{value:.2f}" if value is not None else '-'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m leadsievex.bench',
+                                     description='Time load, separate and export of every engine on synthetic lists.')
+    parser.add_argument('--rows', nargs='+', type=parse_count, default=[10 ** 6], metavar='N',
+                        help='main list sizes, e.g. 1M 10M 100M (default: 1M)')
+    parser.add_argument('--engines', nargs='+', default=list(BENCH_ENGINES), choices=BENCH_ENGINES,
+                        metavar='ENGINE', help=f"engines to compare out of {', '.join(BENCH_ENGINES)} (default: all)")
+    parser.add_argument('--unwanted-ratio', type=float, default=0.1, metavar='R',
+                        help='unwanted list size relative to the main list (default: 0.1)')
+    parser.add_argument('--overlap', type=_ratio, default=0.5, metavar='R',
+                        help='share of the unwanted list present in the main list (default: 0.5)')
+    parser.add_argument('--duplicates', type=_ratio, default=0.02, metavar='R',
+                        help='share of main list lines repeating an earlier address (default: 0.02)')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the synthetic lists (default: 0)')
+    parser.add_argument('--work-dir', metavar='DIR', default=os.path.join(tempfile.gettempdir(), 'leadsievex_bench'),
+                        help='where the synthetic lists are kept for later runs (default: a temporary directory)')
+    parser.add_argument('--tmp-dir', metavar='DIR',
+                        help='directory for the external and parallel engines\' temporary files')
+    parser.add_argument('--export-mode', choices=export.EXPORT_MODES, default=export.DEFAULT_EXPORT_MODE,
+                        help='export mode of the in-memory engines (default: sorted)')
+    parser.add_argument('--max-memory', type=external.parse_size, default=external.DEFAULT_MAX_MEMORY,
+                        metavar='SIZE', help='memory budget of the on-disk engines (default: 512M)')
+    parser.add_argument('--normalize', type=normalize.parse_rules, default=normalize.DEFAULT_RULES,
+                        metavar='RULES', help='normalization rules, as for the main command line')
+    parser.add_argument('--json', metavar='FILE',
+                        help="write the results as JSON to FILE ('-' for standard output)")
+    parser.add_argument('--run-one', metavar='SETTINGS', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.run_one:
+        # Worker process of ``_run_isolated``
+        print(json.dumps(run_engine(**json.loads(args.run_one))))
+        return 0
+
+    # The table goes to stderr when the JSON takes standard output
+    out = sys.stderr if args.json == '-' else sys.stdout
+    results = []
+    print(f"{'rows':>12} {'engine':>9} {'load s':>8} {'sep. s':>8} {'export s':>8} {'total s':>8} "
+          f"{'rows/s':>12} {'peak MB':>8} {'remaining':>12}", file=out)
+    for count in args.rows:
+        start_time = time.perf_counter()
+        main_path, unwanted_path = synthetic_files(args.work_dir, count, args.unwanted_ratio, args.overlap,
+                                                   args.duplicates, args.seed)
+        generate_seconds = time.perf_counter() - start_time
+        if generate_seconds > 1:
+            print(f"Prepared the {count:,} row lists in {generate_seconds:.1f} seconds", file=out)
+        for engine in args.engines:
+            with tempfile.TemporaryDirectory(prefix='leadsievex_bench_', dir=args.tmp_dir) as run_dir:
+                settings = {'engine': engine, 'main_path': main_path, 'unwanted_path': unwanted_path,
+                            'out_path': os.path.join(run_dir, 'result.txt'), 'rules': list(args.normalize),
+                            'export_mode': args.export_mode, 'max_memory': args.max_memory,
+                            'tmp_dir': args.tmp_dir}
+                try:
+                    result = _run_isolated(settings)
+                except RuntimeError as e:
+                    print(f"Error: {e}", file=sys.stderr)
+                    continue
+            result.update(rows=count, rows_per_second=count / result['total_seconds'])
+            results.append(result)
+            print(f"{count:>12,} {engine:>9} {_seconds(result['load_seconds']):>8} "
+                  f"{_seconds(result['separate_seconds']):>8} {_seconds(result['export_seconds']):>8} "
+                  f"{result['total_seconds']:>8.2f} {result['rows_per_second']:>12,.0f} "
+                  f"{_mb(result['peak_rss_bytes']):>8} {result['remaining_count']:>12,}", file=out)
+
+    if args.json:
+        report = {
+            'machine': machine_info(),
+            'settings': {'unwanted_ratio': args.unwanted_ratio, 'overlap': args.overlap,
+                         'duplicates': args.duplicates, 'seed': args.seed, 'export_mode': args.export_mode,
+                         'max_memory': args.max_memory, 'normalize': list(args.normalize)},
+            'results': results,
+        }
+        if args.json == '-':
+            json.dump(report, sys.stdout, indent=2)
+            print()
+        else:
+            with open(args.json, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+            print(f"Results saved to {args.json}", file=out)
+    return 0 if len(results) == len(args.rows) * len(args.engines) else 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,269 @@
+"""Persistent binary index of loaded email lists.
+
+Parsing a 40M line text file takes far longer than mapping an already
+built ``CompactEmailSet`` back in, so every list loaded through ``load``
+is also written to a cache directory as one binary index file:
+
+* an 8 byte magic and a JSON header (source path, mtime, size, content
+  fingerprint, normalization rules, array dtypes and offsets);
+* the ``hashes``, ``starts``, ``lengths`` and (when tracked)
+  ``line_numbers`` arrays, 8 byte aligned;
+* the address buffer, aligned to the mmap allocation granularity.
+
+Later loads of the same file with the same rules memory-map the index
+instead of re-reading the text; the OS pages it in on demand. An index is
+used only while the source's path, mtime, size and fingerprint all match.
+The fingerprint hashes the head, tail and evenly spaced blocks of the
+file, so validating an index never reads the whole source.
+
+The cache directory is kept under a size cap by deleting the least
+recently used indexes (a hit refreshes the index's mtime).
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+
+import numpy as np
+
+from . import core, normalize
+from .metrics import phase as timed
+from .store import CompactEmailSet
+
+MAGIC = b'LSXIDX04'
+
+# Size cap of the cache directory (4 GB)
+DEFAULT_MAX_CACHE_SIZE = 4 * 1024 ** 3
+
+# Bytes read from the source per fingerprint sample, and number of samples
+FINGERPRINT_BLOCK = 64 * 1024
+FINGERPRINT_SAMPLES = 16
+
+INDEX_SUFFIX = '.lsxidx'
+
+
+def default_cache_dir():
+    """Per-user cache directory (``LEADSIEVEX_CACHE_DIR`` overrides it)"""
+    if os.environ.get('LEADSIEVEX_CACHE_DIR'):
+        return os.environ['LEADSIEVEX_CACHE_DIR']
+    base = os.environ.get('LOCALAPPDATA') or os.environ.get('XDG_CACHE_HOME') \
+        or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'leadsievex', 'index')
+
+
+def fingerprint(file_path, size=None):
+    """Content hash of sampled blocks of a file (head, tail and in between)"""
+    if size is None:
+        size = os.path.getsize(file_path)
+    digest = hashlib.blake2b(str(size).encode('ascii'), digest_size=16)
+    with open(file_path, 'rb') as f:
+        if size <= FINGERPRINT_BLOCK * FINGERPRINT_SAMPLES:
+            digest.update(f.read())
+        else:
+            step = (size - FINGERPRINT_BLOCK) // (FINGERPRINT_SAMPLES - 1)
+            for i in range(FINGERPRINT_SAMPLES):
+                f.seek(i * step)
+                digest.update(f.read(FINGERPRINT_BLOCK))
+    return digest.hexdigest()
+
+
+def _rules_of(normalizer):
+    return list(normalizer.rules) if normalizer is not None else []
+
+
+def index_path(file_path, normalizer=None, cache_dir=None):
+    """Index file used for a source file and set of normalization rules"""
+    key = json.dumps([os.path.realpath(file_path), _rules_of(normalizer)])
+    name = hashlib.blake2b(key.encode('utf-8'), digest_size=16).hexdigest()
+    return os.path.join(cache_dir or default_cache_dir(), name + INDEX_SUFFIX)
+
+
+def _source_info(file_path):
+    stat = os.stat(file_path)
+    return {
+        'path': os.path.realpath(file_path),
+        'mtime_ns': stat.st_mtime_ns,
+        'size': stat.st_size,
+        'fingerprint': fingerprint(file_path, stat.st_size),
+    }
+
+
+def _align(offset, alignment):
+    return -(-offset // alignment) * alignment
+
+
+def save(emails, file_path, index_file, source=None):
+    """Write ``emails`` (a ``CompactEmailSet`` loaded from ``file_path``) as an index"""
+    if source is None:
+        source = _source_info(file_path)
+    arrays = [('hashes', emails._hashes), ('starts', emails._starts), ('lengths', emails._lengths)]
+    if emails.line_numbers is not None:
+        arrays.append(('line_numbers', emails.line_numbers))
+    header = {
+        'source': source,
+        'rules': _rules_of(emails.normalizer),
+        'count': len(emails),
+        'data_length': len(emails._data),
+        'arrays': {},
+    }
+    # Offsets depend on the header length, which depends on the offsets:
+    # reserve room for the header by laying out twice
+    header_size = 0
+    for _ in range(2):
+        offset = _align(len(MAGIC) + 4 + header_size + 256, 8)
+        for name, values in arrays:
+            header['arrays'][name] = {'dtype': values.dtype.str, 'offset': offset}
+            offset = _align(offset + values.nbytes, 8)
+        header['data_offset'] = _align(offset, mmap.ALLOCATIONGRANULARITY)
+        header_size = len(json.dumps(header).encode('utf-8'))
+    encoded = json.dumps(header).encode('utf-8')
+
+    index_dir = os.path.dirname(index_file)
+    os.makedirs(index_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix='.tmp_', dir=index_dir)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(MAGIC + struct.pack('<I', len(encoded)) + encoded)
+            for name, values in arrays:
+                f.seek(header['arrays'][name]['offset'])
+                f.write(values.tobytes())
+            f.seek(header['data_offset'])
+            f.write(emails._data)
+        os.replace(tmp_path, index_file)
+    except OSError:
+        # E.g. the old index is still mapped on Windows; keep it for now
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _read_header(f):
+    if f.read(len(MAGIC)) != MAGIC:
+        return None
+    (length,) = struct.unpack('<I', f.read(4))
+    return json.loads(f.read(length).decode('utf-8'))
+
+
+def open_index(index_file, file_path=None, numbered=False):
+    """Memory-map an index as a ``CompactEmailSet``
+
+    Returns ``None`` when the index is missing, unreadable, lacks the line
+    numbers asked for with ``numbered`` or, if ``file_path`` is given, no
+    longer matches that source file. Line numbers are left out unless
+    ``numbered``.
+    """
+    try:
+        with open(index_file, 'rb') as f:
+            header = _read_header(f)
+            if header is None or (numbered and 'line_numbers' not in header['arrays']):
+                return None
+            if file_path is not None:
+                source = header['source']
+                stat = os.stat(file_path)
+                if (source['path'] != os.path.realpath(file_path) or source['mtime_ns'] != stat.st_mtime_ns
+                        or source['size'] != stat.st_size
+                        or source['fingerprint'] != fingerprint(file_path, stat.st_size)):
+                    return None
+
+            count = header['count']
+            index_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if count else None
+            arrays = {}
+            for name, layout in header['arrays'].items():
+                if name == 'line_numbers' and not numbered:
+                    continue
+                if count:
+                    arrays[name] = np.frombuffer(index_map, dtype=np.dtype(layout['dtype']), count=count,
+                                                 offset=layout['offset'])
+                else:
+                    arrays[name] = np.zeros(0, dtype=np.dtype(layout['dtype']))
+            if header['data_length']:
+                data = mmap.mmap(f.fileno(), header['data_length'], access=mmap.ACCESS_READ,
+                                 offset=header['data_offset'])
+            else:
+                data = b''
+    except (OSError, ValueError, KeyError):
+        return None
+
+    # Mark as recently used for the LRU cap
+    try:
+        os.utime(index_file)
+    except OSError:
+        pass
+    return CompactEmailSet._from_arrays(data, arrays['hashes'], arrays['starts'], arrays['lengths'],
+                                        normalize.make_normalizer(header['rules']), arrays.get('line_numbers'))
+
+
+def prune(cache_dir=None, max_size=DEFAULT_MAX_CACHE_SIZE, keep=()):
+    """Delete least recently used indexes until the directory fits ``max_size``"""
+    cache_dir = cache_dir or default_cache_dir()
+    try:
+        names = os.listdir(cache_dir)
+    except OSError:
+        return
+    entries = []
+    for name in names:
+        if name.endswith(INDEX_SUFFIX):
+            path = os.path.join(cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_size:
+            break
+        if path in keep:
+            continue
+        try:
+            os.remove(path)
+        except OSError:
+            # Still mapped by a running load on Windows
+            continue
+        total -= size
+
+
+def invalidate(file_path, normalizer=None, cache_dir=None):
+    """Forget the index of a source file; returns whether one was deleted"""
+    try:
+        os.remove(index_path(file_path, normalizer, cache_dir))
+    except OSError:
+        return False
+    return True
+
+
+def load(file_path, chunk_size=core.CHUNK_SIZE, progress=None, normalizer=None,
+         cache_dir=None, max_size=DEFAULT_MAX_CACHE_SIZE, rebuild=False, metrics=None, numbered=False):
+    """Load a list through the index cache and return ``(emails, from_cache)``
+
+    On a miss (or with ``rebuild``) the text is parsed as usual and the
+    index is written for next time. Failing to write the cache never fails
+    the load. With ``numbered`` the set keeps its line numbers; an index
+    written without them is rebuilt.
+    """
+    index_file = index_path(file_path, normalizer, cache_dir)
+    if not rebuild:
+        with timed(metrics, 'io_wait'):
+            emails = open_index(index_file, file_path, numbered)
+        if emails is not None:
+            if metrics is not None:
+                metrics.count('cache_hits')
+                metrics.count('rows', len(emails))
+                metrics.count('emails', len(emails))
+            if progress is not None:
+                progress(100)
+            return emails, True
+
+    source = _source_info(file_path)
+    emails = CompactEmailSet.from_file(file_path, chunk_size, progress, normalizer, metrics, numbered)
+    try:
+        with timed(metrics, 'cache_write'):
+            save(emails, file_path, index_file, source)
+            prune(os.path.dirname(index_file), max_size, keep=(index_file,))
+    except OSError:
+        pass
+    return emails, False
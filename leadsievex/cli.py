@@ -0,0 +1,379 @@
+"""Headless command-line mode for LeadSieveX.
+
+Example::
+
+    python email_separator.py --main a.txt --remove b.txt --out c.txt
+    python -m leadsievex --main a.txt --remove b.txt --remove c.txt --out d.txt
+    python -m leadsievex --batch clients/*.txt --remove suppression.txt --out-dir done
+    python -m leadsievex --build-filter global.lsxbloom --remove bounces.txt --remove complaints.txt
+    python -m leadsievex --main a.txt --filter global.lsxbloom --out b.txt
+    python -m leadsievex --main a.txt --email @competitor.com --email 'noreply*@*' --out b.txt
+    python -m leadsievex --main a.txt.gz --remove b.txt.zst --out c.txt.gz
+    python -m leadsievex --main crm.csv --column Email --remove b.txt --out crm_clean.csv
+    python -m leadsievex --main huge.txt --remove small.txt --out c.txt --engine stream
+"""
+
+import argparse
+import os
+import sys
+import time
+
+from . import (batch, cache, core, delimited, engines, export, external, metrics, normalize, parallel, prefilter,
+               rules, store, stream)
+
+
+def build_parser():
+    """Create the argument parser for the command-line mode"""
+    parser = argparse.ArgumentParser(
+        prog='leadsievex',
+        description='Remove unwanted emails from a main list without opening the GUI.',
+    )
+    mains = parser.add_mutually_exclusive_group(required=True)
+    mains.add_argument('--main', metavar='FILE',
+                       help='main email list, one email per line (.txt, or compressed .gz, .bz2, .zst), '
+                            'or a .csv / .tsv table')
+    mains.add_argument('--batch', nargs='+', metavar='FILE',
+                       help='several main lists, each separated against the same unwanted lists '
+                            'and written to <name>_separated.txt')
+    mains.add_argument('--build-filter', metavar='FILE',
+                       help='build a Bloom-filter suppression file from the unwanted lists and exit')
+    parser.add_argument('--remove', action='append', default=[], metavar='FILE',
+                        help='unwanted email list (may be given several times); lines such as '
+                             '@domain.com, *.gov, abuse@* or noreply*@* are domain and wildcard rules')
+    parser.add_argument('--email', action='append', default=[], metavar='ADDRESS',
+                        help='single email or rule to remove (may be given several times)')
+    parser.add_argument('--filter', metavar='FILE',
+                        help='suppression filter made with --build-filter, used on top of any '
+                             'unwanted lists (hash or stream engine)')
+    parser.add_argument('--out', metavar='FILE',
+                        help='file to write the remaining emails to (required with --main); '
+                             'a .gz, .bz2 or .zst name compresses it. With a .csv / .tsv main list and '
+                             'output, the full rows of the remaining records are written')
+    parser.add_argument('--column', type=delimited.parse_column, metavar='NAME|NUMBER',
+                        help='email column of .csv / .tsv lists, by header name or 1-based number '
+                             '(default: the column named like "email")')
+    parser.add_argument('--delimiter', metavar='CHAR',
+                        help='field delimiter of .csv / .tsv lists (default: guessed from the first row)')
+    parser.add_argument('--no-header', action='store_true',
+                        help='the first row of .csv / .tsv lists is a record, not a header')
+    parser.add_argument('--out-dir', metavar='DIR',
+                        help='directory for the --batch outputs and summary (default: next to each input)')
+    parser.add_argument('--engine', choices=['auto'] + sorted(engines.ENGINES) + ['external', 'parallel', 'stream'],
+                        default='auto',
+                        help='separation engine; auto uses the on-disk engine for inputs over '
+                             f'{external.EXTERNAL_THRESHOLD // (1024 ** 3)} GB and '
+                             f'{engines.DEFAULT_ENGINE} otherwise. stream loads the unwanted lists, then '
+                             'separates the main list while reading it once and writes it in input order')
+    parser.add_argument('--external', dest='engine', action='store_const', const='external',
+                        help='shorthand for --engine external')
+    parser.add_argument('--shards', type=int, metavar='N',
+                        help='number of hash shards for the parallel engine (default: CPU count)')
+    parser.add_argument('--workers', type=int, metavar='N',
+                        help='worker processes for the parallel engine (default: min(shards, CPU count)) '
+                             'or for --batch (default: CPU count)')
+    parser.add_argument('--max-memory', type=external.parse_size,
+                        default=external.DEFAULT_MAX_MEMORY, metavar='SIZE',
+                        help='memory budget of the on-disk engine, e.g. 512M or 2G (default: 512M)')
+    parser.add_argument('--tmp-dir', metavar='DIR',
+                        help='directory for the external and parallel engines\' temporary files')
+    parser.add_argument('--export-mode', choices=export.EXPORT_MODES, default=export.DEFAULT_EXPORT_MODE,
+                        help='order of the in-memory engines\' output: sorted in memory, as-is (no sort) '
+                             'or sorted on disk within --max-memory (default: sorted)')
+    parser.add_argument('--removed-lines', metavar='FILE',
+                        help='also write "line<TAB>email" for every removed main list address, '
+                             'in input order (hash engine only)')
+    parser.add_argument('--normalize', type=normalize.parse_rules, default=normalize.DEFAULT_RULES,
+                        metavar='RULES',
+                        help='comma separated normalization rules out of '
+                             f"{', '.join(normalize.RULES)}, or 'none' "
+                             f"(default: {','.join(normalize.DEFAULT_RULES)})")
+    parser.add_argument('--cache-dir', metavar='DIR',
+                        help='directory of the binary index cache (default: per-user cache directory)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='always parse the text files; do not read or write the index cache')
+    parser.add_argument('--metrics', metavar='FILE',
+                        help='save per-phase timings and counters of the load, separate and export steps, '
+                             "as Prometheus text (.prom) or JSON (anything else, '-' for standard output)")
+    parser.add_argument('-q', '--quiet', action='store_true',
+                        help='only print errors')
+    return parser
+
+
+def main(argv=None):
+    """Run a separation from the command line and return the exit code"""
+    args = build_parser().parse_args(argv)
+
+    def report(message):
+        if not args.quiet:
+            print(message)
+
+    if not args.remove and not args.email and not (args.filter and args.main):
+        print('Error: provide emails to remove with --remove, --email or --filter.', file=sys.stderr)
+        return 2
+
+    normalizer = normalize.make_normalizer(args.normalize)
+    if args.build_filter:
+        return run_build_filter(args, normalizer, report)
+    if args.batch:
+        return run_batch(args, normalizer, report)
+    if not args.out:
+        print('Error: --out is required with --main.', file=sys.stderr)
+        return 2
+
+    # Only the email column of a table is loaded, so tables stay in memory
+    tables = [path for path in [args.main] + args.remove if delimited.is_table(path)]
+    engine = args.engine
+    if engine == 'auto':
+        engine = 'external' if external.should_use_external([args.main] + args.remove) and not tables \
+            else engines.DEFAULT_ENGINE
+    # The stream engine holds the unwanted lists in memory, but reads the main list as lines
+    in_memory = engine in engines.ENGINES or (engine == 'stream' and not delimited.is_table(args.main))
+    if tables and not in_memory:
+        print(f'Error: .csv / .tsv lists need an in-memory engine, not {engine}.', file=sys.stderr)
+        return 2
+    rows_out = delimited.is_table(args.main) and delimited.is_table(args.out)
+
+    if args.removed_lines and engine != 'hash':
+        print('Error: --removed-lines needs the hash engine.', file=sys.stderr)
+        return 2
+    if args.filter and engine not in ('hash', 'stream'):
+        print('Error: --filter needs the hash or stream engine.', file=sys.stderr)
+        return 2
+
+    def table_of(path):
+        return delimited.resolve(path, args.column, args.delimiter, not args.no_header)
+
+    collected = []
+
+    def measure(operation, **labels):
+        run_metrics = metrics.Metrics(operation, **labels)
+        collected.append(run_metrics)
+        return run_metrics
+
+    try:
+        if engine in ('external', 'parallel'):
+            start_time = time.time()
+            run_metrics = measure('separate', engine=engine)
+            unwanted_emails = set(email.strip() for email in args.email if email.strip())
+            if engine == 'external':
+                # Rule lines of the unwanted lists are collected while they are sorted
+                result = external.external_separate(
+                    [args.main], args.remove + [unwanted_emails], args.out,
+                    max_memory=args.max_memory, tmp_dir=args.tmp_dir, normalizer=normalizer,
+                )
+            else:
+                rule_set = rules.from_sources(args.remove + [unwanted_emails], normalizer)
+                result = parallel.parallel_separate(
+                    [args.main], args.remove + [unwanted_emails], args.out,
+                    shards=args.shards, workers=args.workers, tmp_dir=args.tmp_dir,
+                    normalizer=normalizer, rules=rule_set,
+                )
+            file_size = os.path.getsize(args.out) / (1024 * 1024)  # Size in MB
+            report(f"Separated {result.unwanted_count} emails ({engine} engine). "
+                   f"{result.remaining_count} of {result.main_count} remain. "
+                   f"Saved to {args.out} ({file_size:.2f} MB) in {time.time() - start_time:.2f} seconds")
+            run_metrics.count('bytes_read', sum(os.path.getsize(path) for path in [args.main] + args.remove))
+            run_metrics.count('bytes_written', result.nbytes)
+            run_metrics.count_separation(result.main_count, result.unwanted_count, result.remaining_count)
+            run_metrics.finish()
+            if args.metrics:
+                metrics.write(collected, args.metrics)
+                if args.metrics != '-':
+                    report(f"Saved metrics to {args.metrics}")
+            return 0
+
+        # The set engine keeps the original Python sets, the others compact sets
+        if engine == 'set':
+            def load_list(path, run_metrics, numbered):
+                emails = core.load_emails(path)
+                run_metrics.count('bytes_read', os.path.getsize(path))
+                run_metrics.count('rows', len(emails))
+                return emails
+        elif not args.no_cache:
+            def load_list(path, run_metrics, numbered):
+                return cache.load(path, normalizer=normalizer, cache_dir=args.cache_dir, metrics=run_metrics,
+                                  numbered=numbered)[0]
+        else:
+            def load_list(path, run_metrics, numbered):
+                return store.load_compact(path, normalizer=normalizer, metrics=run_metrics, numbered=numbered)
+
+        def load(path, list_name='unwanted'):
+            run_metrics = measure('load', list=list_name, file=os.path.basename(path))
+            # Line numbers are only kept for the removed-lines report
+            numbered = list_name == 'main' and bool(args.removed_lines)
+            if not delimited.is_table(path):
+                emails = load_list(path, run_metrics, numbered)
+            else:
+                emails = delimited.load_column(path, table_of(path), normalizer=normalizer, metrics=run_metrics,
+                                               numbered=numbered)
+                emails = set(emails) if engine == 'set' else emails
+            run_metrics.finish()
+            return emails
+
+        if engine == 'stream':
+            return run_stream(args, load, normalizer, report, measure, collected)
+        if rows_out and not args.filter and not args.removed_lines:
+            return run_rows(args, table_of(args.main), load, normalizer, report, measure, collected)
+
+        start_time = time.time()
+        main_emails = load(args.main, 'main')
+        report(f"Loaded {len(main_emails)} emails in {time.time() - start_time:.2f} seconds")
+
+        unwanted_emails, rule_set = load_unwanted(args, load, normalizer, report)
+
+        start_time = time.time()
+        run_metrics = measure('separate', engine=engine)
+        remaining = main_emails
+        if args.filter:
+            suppression = prefilter.SuppressionFilter.load(args.filter)
+            if suppression.normalizer != normalizer:
+                print('Error: the filter was built with different --normalize rules.', file=sys.stderr)
+                return 2
+            with run_metrics.phase('prefilter'):
+                remaining = suppression.separate(main_emails)
+            report(f"Filtered against {len(suppression)} suppressed emails. {len(remaining)} remain. "
+                   f"Completed in {time.time() - start_time:.2f} seconds")
+            start_time = time.time()
+        remaining = engines.separate(remaining, unwanted_emails, engine, normalizer=normalizer, rules=rule_set,
+                                     metrics=run_metrics)
+        run_metrics.count_separation(len(main_emails), len(unwanted_emails), len(remaining))
+        run_metrics.finish()
+        report(f"Separated {len(unwanted_emails)} emails. {len(remaining)} remain. "
+               f"Completed in {time.time() - start_time:.2f} seconds")
+
+        run_metrics = measure('export', mode='rows' if rows_out else args.export_mode,
+                              file=os.path.basename(args.out))
+        if rows_out:
+            result = export.write_rows(remaining, args.main, table_of(args.main), normalizer, args.out,
+                                       metrics=run_metrics)
+        else:
+            result = export.write_result(remaining, args.out, args.export_mode,
+                                         max_memory=args.max_memory, tmp_dir=args.tmp_dir, metrics=run_metrics)
+        run_metrics.finish()
+        file_size = result.file_bytes / (1024 * 1024)  # Size in MB
+        report(f"Saved {result.count} {'rows' if rows_out else 'emails'} to {args.out} "
+               f"({file_size:.2f} MB) in {result.seconds:.2f} seconds, {result.mb_per_second:.1f} MB/s")
+
+        if args.removed_lines:
+            removed_count = export.write_removed_lines(main_emails, remaining, args.removed_lines)
+            report(f"Saved {removed_count} removed line numbers to {args.removed_lines}")
+
+        if args.metrics:
+            metrics.write(collected, args.metrics)
+            if args.metrics != '-':
+                report(f"Saved metrics to {args.metrics}")
+
+    except (OSError, UnicodeDecodeError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    return 0
+
+
+def load_unwanted(args, load, normalizer, report):
+    """Load the ``--remove`` lists and ``--email`` addresses; returns the emails and their ``RuleSet``"""
+    unwanted_emails = set(email.strip() for email in args.email if email.strip())
+    for path in args.remove:
+        start_time = time.time()
+        emails = load(path)
+        report(f"Loaded {len(emails)} unwanted emails from {os.path.basename(path)} "
+               f"in {time.time() - start_time:.2f} seconds")
+        unwanted_emails |= emails
+    rule_set = rules.from_sources([unwanted_emails], normalizer)
+    if rule_set:
+        report(f"Found {len(rule_set)} domain and wildcard rules")
+    return unwanted_emails, rule_set
+
+
+def run_stream(args, load, normalizer, report, measure, collected):
+    """Separate the main list while reading it once, straight into the output"""
+    unwanted_emails, rule_set = load_unwanted(args, load, normalizer, report)
+    suppression = None
+    if args.filter:
+        suppression = prefilter.SuppressionFilter.load(args.filter)
+        if suppression.normalizer != normalizer:
+            print('Error: the filter was built with different --normalize rules.', file=sys.stderr)
+            return 2
+
+    start_time = time.time()
+    run_metrics = measure('separate', engine='stream')
+    result = stream.stream_separate([args.main], unwanted_emails, args.out, rules=rule_set, suppression=suppression,
+                                    normalizer=normalizer, metrics=run_metrics)
+    run_metrics.finish()
+    file_size = os.path.getsize(args.out) / (1024 * 1024)  # Size in MB
+    report(f"Separated {result.unwanted_count} emails in one pass. "
+           f"{result.remaining_count} unique emails of {result.row_count} lines remain. "
+           f"Saved to {args.out} ({file_size:.2f} MB) in {time.time() - start_time:.2f} seconds")
+    if args.metrics:
+        metrics.write(collected, args.metrics)
+        if args.metrics != '-':
+            report(f"Saved metrics to {args.metrics}")
+    return 0
+
+
+def run_rows(args, table, load, normalizer, report, measure, collected):
+    """Write the rows of a table main list whose address survives, in one pass over it"""
+    unwanted_emails, rule_set = load_unwanted(args, load, normalizer, report)
+
+    start_time = time.time()
+    run_metrics = measure('separate', engine='rows')
+    result = delimited.filter_rows(args.main, table, args.out, remove=unwanted_emails, rules=rule_set,
+                                   normalizer=normalizer)
+    run_metrics.count('bytes_read', os.path.getsize(args.main))
+    run_metrics.count('bytes_written', result.nbytes)
+    run_metrics.count_separation(result.row_count, len(unwanted_emails), result.written_count)
+    run_metrics.finish()
+    report(f"Separated {len(unwanted_emails)} emails. {result.written_count} of {result.row_count} rows remain. "
+           f"Saved to {args.out} in {time.time() - start_time:.2f} seconds")
+    if args.metrics:
+        metrics.write(collected, args.metrics)
+        if args.metrics != '-':
+            report(f"Saved metrics to {args.metrics}")
+    return 0
+
+
+def run_build_filter(args, normalizer, report):
+    """Build a suppression filter from the unwanted lists"""
+    start_time = time.time()
+    unwanted_emails = set(email.strip() for email in args.email if email.strip())
+    try:
+        suppression = prefilter.build_filter(args.remove + [unwanted_emails], args.build_filter, normalizer,
+                                             max_memory=args.max_memory, tmp_dir=args.tmp_dir)
+    except (OSError, UnicodeDecodeError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    report(f"Built a filter of {len(suppression)} emails and {len(suppression.rules)} rules "
+           f"({suppression.nbytes / (1024 * 1024):.1f} MB in memory) "
+           f"in {time.time() - start_time:.2f} seconds. Saved to {args.build_filter}")
+    return 0
+
+
+def run_batch(args, normalizer, report):
+    """Separate every ``--batch`` file against the unwanted lists, loaded once"""
+    try:
+        start_time = time.time()
+        unwanted_emails = set(email.strip() for email in args.email if email.strip())
+        suppression = batch.build_suppression(args.remove + [unwanted_emails], normalizer,
+                                              use_cache=not args.no_cache, cache_dir=args.cache_dir,
+                                              column=args.column, delimiter=args.delimiter,
+                                              header=not args.no_header)
+        report(f"Loaded {len(suppression)} unwanted emails in {time.time() - start_time:.2f} seconds")
+
+        start_time = time.time()
+        results = batch.batch_separate(args.batch, suppression, args.out_dir, args.workers,
+                                       args.export_mode, args.tmp_dir, column=args.column,
+                                       delimiter=args.delimiter, header=not args.no_header)
+    except (OSError, UnicodeDecodeError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    report(batch.summary_table(results))
+    summary_dir = args.out_dir or os.path.dirname(os.path.abspath(args.batch[0]))
+    summary_path = os.path.join(summary_dir, batch.SUMMARY_NAME)
+    batch.write_summary(results, summary_path)
+    failed = [result for result in results if result.error]
+    report(f"Separated {len(results) - len(failed)} of {len(results)} files in "
+           f"{time.time() - start_time:.2f} seconds. Summary saved to {summary_path}")
+    for result in failed:
+        print(f"Error: {result.main_file}: {result.error}", file=sys.stderr)
+    return 1 if failed else 0
@@ -0,0 +1,145 @@
+"""Transparent compressed input and output.
+
+Lists ending in ``.gz``, ``.bz2`` or ``.zst`` are decompressed while they
+are read, and results written to such paths are compressed while they are
+written, so the plain text never has to be stored on disk. gzip and bz2
+come with Python; zstd needs the optional ``zstandard`` package, which
+also compresses with one thread per CPU core.
+
+Output streams count the bytes written to them before compression (see
+``bytes_written``), so exports report the size of the text they wrote
+rather than of the compressed file.
+"""
+
+import bz2
+import gzip
+import io
+import os
+from contextlib import contextmanager
+
+# File extension -> codec
+CODECS = {'.gz': 'gzip', '.bz2': 'bz2', '.zst': 'zstd', '.zstd': 'zstd'}
+
+# Typical size of an email list relative to its compressed file, used to
+# pick the on-disk engine before anything is decompressed
+EXPANSION_RATIO = 5
+
+# Compression levels that keep up with the exporters
+GZIP_LEVEL = 6
+BZ2_LEVEL = 9
+ZSTD_LEVEL = 3
+
+# File dialog filter of the readable list formats
+LIST_FILTER = 'Email Lists (*.txt *.csv *.tsv *.gz *.bz2 *.zst);;All Files (*)'
+
+
+def codec_of(file_path):
+    """Codec of a file by its extension, or ``None`` for plain text"""
+    return CODECS.get(os.path.splitext(file_path)[1].lower())
+
+
+def is_list_file(file_path):
+    """True for ``.txt`` files and compressed files the loaders can read"""
+    return file_path.lower().endswith('.txt') or codec_of(file_path) is not None
+
+
+def split_ext(file_path):
+    """Split off the extension including a compression suffix, e.g. ``('a', '.txt.gz')``"""
+    base, ext = os.path.splitext(file_path)
+    if codec_of(file_path) is not None:
+        base, inner = os.path.splitext(base)
+        ext = inner + ext
+    return base, ext
+
+
+def _zstd():
+    # Imported on first use, so lists that are not zstd-compressed never load it
+    try:
+        import zstandard
+    except ImportError:  # Optional: only needed for .zst files
+        raise OSError("Reading and writing .zst files needs the 'zstandard' package (pip install zstandard)") from None
+    return zstandard
+
+
+@contextmanager
+def open_input(file_path):
+    """Open a list for binary reading and yield ``(stream, raw)``
+
+    ``stream`` yields the decompressed bytes; ``raw`` is the underlying
+    file, whose position tells how much of the file was consumed.
+    """
+    codec = codec_of(file_path)
+    with open(file_path, 'rb') as raw:
+        if codec == 'gzip':
+            stream = gzip.GzipFile(fileobj=raw, mode='rb')
+        elif codec == 'bz2':
+            stream = bz2.BZ2File(raw, 'rb')
+        elif codec == 'zstd':
+            stream = _zstd().ZstdDecompressor().stream_reader(raw, read_across_frames=True, closefd=False)
+        else:
+            yield raw, raw
+            return
+        with stream:
+            yield stream, raw
+
+
+def read_all(file_path, chunk_size, progress=None):
+    """Decompress a whole list into one ``bytearray``"""
+    total = os.path.getsize(file_path) or 1
+    data = bytearray()
+    with open_input(file_path) as (stream, raw):
+        while True:
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                break
+            data += chunk
+            if progress is not None:
+                progress(min(raw.tell() * 100 // total, 100))
+    return data
+
+
+class CountingWriter(io.BufferedIOBase):
+    """Binary stream counting the bytes written through it into another stream"""
+
+    def __init__(self, stream):
+        super().__init__()
+        self._stream = stream
+        self.nbytes = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.nbytes += memoryview(data).nbytes
+        return self._stream.write(data)
+
+    def flush(self):
+        self._stream.flush()
+
+    def close(self):
+        if not self.closed:
+            try:
+                super().close()
+            finally:
+                self._stream.close()
+
+
+def open_output(file_path, binary=False):
+    """Open ``file_path`` for writing (UTF-8 text unless ``binary``), compressed by its extension"""
+    codec = codec_of(file_path)
+    if codec is None:
+        stream = open(file_path, 'wb')
+    elif codec == 'gzip':
+        stream = gzip.open(file_path, 'wb', compresslevel=GZIP_LEVEL)
+    elif codec == 'bz2':
+        stream = bz2.open(file_path, 'wb', compresslevel=BZ2_LEVEL)
+    else:
+        compressor = _zstd().ZstdCompressor(level=ZSTD_LEVEL, threads=-1)
+        stream = io.BufferedWriter(compressor.stream_writer(open(file_path, 'wb')))
+    stream = CountingWriter(stream)
+    return stream if binary else io.TextIOWrapper(stream, encoding='utf-8')
+
+
+def bytes_written(stream):
+    """Bytes written to a stream of ``open_output`` before compression (complete once it is closed)"""
+    return (stream.buffer if isinstance(stream, io.TextIOWrapper) else stream).nbytes
@@ -0,0 +1,233 @@
+"""Core load / separate / export operations.
+
+Every function takes an optional ``progress`` callable which receives an
+integer percentage (0-100). The Qt processors pass their ``progress.emit``
+signal here; the CLI passes nothing.
+
+Files ending in ``.gz``, ``.bz2`` or ``.zst`` are read and written through
+``compress``, decompressing and compressing on the fly.
+"""
+
+import os
+from collections import namedtuple
+from itertools import islice
+
+from . import compress
+from .metrics import phase as timed
+
+# Size of the binary blocks read by the streaming loader (1 MB)
+CHUNK_SIZE = 1024 * 1024
+
+# Number of emails joined into a single write by the exporters
+WRITE_BLOCK = 65536
+
+# Counts reported by the engines that write their result straight to a file;
+# ``nbytes`` is the size of the result before compression
+SeparationResult = namedtuple('SeparationResult', 'main_count unwanted_count remaining_count nbytes')
+
+# Lines written by an exporter and their size before compression
+WriteResult = namedtuple('WriteResult', 'count nbytes')
+
+# Separates the matching key from the original address in the temporary
+# files of the external and parallel engines
+KEY_SEPARATOR = '\x00'
+
+
+def split_lines(text):
+    """Split decoded text into lines ending in ``\\n``, ``\\r\\n`` or a lone ``\\r``
+
+    Unlike ``str.splitlines``, form feeds, ``\\x1c``-``\\x1e``, ``\\x85`` and the
+    Unicode line separators do not end a line, as in ``store.scan_lines``.
+    """
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text.split('\n')
+
+
+def line_block_end(block):
+    """Offset just after the last complete line of a bytes block (0 if none)
+
+    A ``\\r`` ending the block is left out: the next block may start with its ``\\n``.
+    """
+    return max(block.rfind(b'\n'), block.rfind(b'\r', 0, len(block) - 1)) + 1
+
+
+def _split_emails(text):
+    """Yield the non-empty stripped lines of a decoded block"""
+    for line in split_lines(text):
+        email = line.strip()
+        if email:
+            yield email
+
+
+def iter_byte_blocks(file_path, chunk_size=CHUNK_SIZE, progress=None, start=0, end=None):
+    """Yield the raw, line-aligned blocks of a file (see ``iter_emails``)"""
+    file_size = os.path.getsize(file_path)
+    if end is None:
+        end = file_size
+    compressed = compress.codec_of(file_path) is not None
+    if compressed and (start, end) != (0, file_size):
+        raise ValueError(f"Compressed files can only be read whole: {file_path}")
+    range_size = end - start
+    last_percent = -1
+
+    with compress.open_input(file_path) as (f, raw):
+        if not compressed:
+            f.seek(start)
+        pending = b''
+        while True:
+            chunk = f.read(chunk_size if compressed else min(chunk_size, end - f.tell()))
+            if not chunk:
+                break
+
+            # Keep the trailing partial line for the next chunk
+            block = pending + chunk
+            cut = line_block_end(block)
+            pending = block[cut:]
+
+            yield block[:cut]
+
+            if progress is not None:
+                # By the (compressed) bytes consumed
+                percent = int((raw.tell() - start) * 100 / range_size) if range_size else 100
+                if percent != last_percent:
+                    last_percent = percent
+                    progress(percent)
+
+        # Last line without a trailing newline
+        yield pending
+
+    if progress is not None:
+        progress(100)
+
+
+def _iter_blocks(file_path, chunk_size=CHUNK_SIZE, progress=None, start=0, end=None):
+    """Yield the decoded, line-aligned blocks of a file (see ``iter_emails``)"""
+    for block in iter_byte_blocks(file_path, chunk_size, progress, start, end):
+        yield block.decode('utf-8')
+
+
+def iter_emails(file_path, chunk_size=CHUNK_SIZE, progress=None, start=0, end=None):
+    """Stream the emails of a one-per-line file without reading it whole
+
+    The file is read in fixed-size binary chunks; the trailing partial line
+    of each chunk is carried over to the next one. Progress is reported by
+    bytes consumed and only when the percentage changes.
+
+    ``start`` and ``end`` restrict reading to a byte range, which must begin
+    at the start of a line (see ``line_ranges``). Compressed files are
+    always read whole.
+    """
+    for block in _iter_blocks(file_path, chunk_size, progress, start, end):
+        yield from _split_emails(block)
+
+
+def iter_numbered_emails(file_path, chunk_size=CHUNK_SIZE, progress=None):
+    """Stream ``(line_number, email)`` pairs of a file, line numbers starting at 1
+
+    Lines end in ``\\n``, ``\\r\\n`` or ``\\r`` (see ``split_lines``), so the
+    numbers match what editors show.
+    """
+    line_number = 0
+    for block in _iter_blocks(file_path, chunk_size, progress):
+        lines = split_lines(block)
+        if lines[-1] == '':
+            lines.pop()
+        for line_number, line in enumerate(lines, line_number + 1):
+            email = line.strip()
+            if email:
+                yield line_number, email
+
+
+def line_ranges(file_path, parts):
+    """Split a file into at most ``parts`` byte ranges that start on a line
+
+    A compressed file is one range: it can only be decompressed from the start.
+    """
+    file_size = os.path.getsize(file_path)
+    if compress.codec_of(file_path) is not None:
+        return [(0, file_size)]
+    bounds = [0]
+    with open(file_path, 'rb') as f:
+        for i in range(1, parts):
+            f.seek(max(file_size * i // parts, bounds[-1]))
+            f.readline()
+            if f.tell() >= file_size:
+                break
+            if f.tell() > bounds[-1]:
+                bounds.append(f.tell())
+    bounds.append(file_size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def keyed_lines(emails, normalizer):
+    """Yield ``key`` or ``key NUL original`` lines for normalised matching"""
+    for email in emails:
+        key = normalizer(email)
+        yield key if key == email else key + KEY_SEPARATOR + email
+
+
+def line_key(line):
+    """Matching key of a line produced by ``keyed_lines``"""
+    return line.partition(KEY_SEPARATOR)[0]
+
+
+def line_original(line):
+    """Original address of a line produced by ``keyed_lines``"""
+    return line.rpartition(KEY_SEPARATOR)[2]
+
+
+def load_emails(file_path, chunk_size=CHUNK_SIZE, progress=None):
+    """Load a one-per-line email file into a set"""
+    return set(iter_emails(file_path, chunk_size, progress))
+
+
+def separate(main_emails, unwanted_emails, progress=None):
+    """Return the emails of ``main_emails`` that are not in ``unwanted_emails``"""
+    # Set difference operation is very fast
+    if progress is not None:
+        progress(50)
+    remaining = main_emails - unwanted_emails
+    if progress is not None:
+        progress(100)
+    return remaining
+
+
+def write_lines(emails, f, total=None, progress=None, metrics=None):
+    """Write ``emails`` to an open text file in blocks of ``WRITE_BLOCK`` lines
+
+    Progress is reported once per block when ``total`` is known. Returns the
+    number of lines written.
+    """
+    emails = iter(emails)
+    written = 0
+    while True:
+        block = list(islice(emails, WRITE_BLOCK))
+        if not block:
+            break
+        text = '\n'.join(block) + '\n'
+        with timed(metrics, 'io_wait'):
+            f.write(text)
+        written += len(block)
+        if progress is not None and total:
+            progress(min(written * 100 // total, 100))
+    return written
+
+
+def export_emails(emails, file_path, progress=None, sort=True, total=None, metrics=None):
+    """Write ``emails`` one per line, sorted unless ``sort`` is false, and return a ``WriteResult``
+
+    ``total`` is only needed for progress when ``emails`` has no length.
+    """
+    if sort:
+        with timed(metrics, 'sort'):
+            emails = sorted(emails)
+    if total is None:
+        total = len(emails)
+
+    with compress.open_output(file_path) as f:
+        total_emails = write_lines(emails, f, total, progress, metrics)
+
+    if progress is not None:
+        progress(100)
+    return WriteResult(total_emails, compress.bytes_written(f))
@@ -0,0 +1,348 @@
+"""CSV and TSV lists: an email column in, whole rows out.
+
+CRM exports hold one record per row with the address in one column. The
+loader reads such a file as a stream of complete records (a quoted field
+may span lines) and keeps only the email column, so a main or unwanted
+list can be a ``.csv`` / ``.tsv`` file (also compressed, see ``compress``).
+
+Rows are split with NumPy: delimiters, quotes and newlines are located per
+block, and rows whose quotes only wrap whole fields (``"a@b.com"``) are cut
+without decoding them. Only rows with escaped quotes, delimiters or line
+breaks inside a quoted field go through the ``csv`` module.
+
+``filter_rows`` streams a table once and writes the full original rows
+whose address survives, matched against a ``CompactEmailSet`` block by
+block. Rows without an address in the email column are dropped; the header
+row is always kept.
+"""
+
+import codecs
+import csv
+import os
+from collections import namedtuple
+
+import numpy as np
+
+from . import compress, core
+from .metrics import phase as timed
+from .store import CompactEmailSet, scan_lines
+
+# Extension -> delimiter assumed when the first row does not tell
+TABLE_EXTENSIONS = {'.csv': ',', '.tsv': '\t'}
+
+# Delimiters recognised when sniffing the first row
+SNIFF_DELIMITERS = ',\t;|'
+
+_QUOTE = ord('"')
+_NEWLINE = ord('\n')
+
+# Email column (0-based), delimiter and whether the first row is a header
+TableFormat = namedtuple('TableFormat', 'column delimiter header')
+
+# Data rows read by ``filter_rows``, rows written (without the header) and
+# bytes written (with it) before compression
+RowResult = namedtuple('RowResult', 'row_count written_count nbytes')
+
+
+def _table_ext(file_path):
+    """``.csv`` of ``a.csv`` and ``a.csv.gz``"""
+    ext = compress.split_ext(file_path)[1].lower()
+    return '.' + ext.split('.')[1] if ext else ''
+
+
+def is_table(file_path):
+    """True for ``.csv`` / ``.tsv`` files, compressed or not"""
+    return _table_ext(file_path) in TABLE_EXTENSIONS
+
+
+def parse_column(text):
+    """Column of the command line: a 1-based number becomes a 0-based ``int``, anything else is a name"""
+    return int(text) - 1 if text.isdigit() and int(text) > 0 else text
+
+
+def _header_key(name):
+    return name.strip().lower().replace('-', '').replace('_', '').replace(' ', '')
+
+
+def _sniff(line, fallback):
+    """The candidate delimiter occurring most often in the first row"""
+    counts = {delimiter: line.count(delimiter) for delimiter in SNIFF_DELIMITERS}
+    best = max(counts, key=counts.get)
+    return best if counts[best] else fallback
+
+
+def _first_record(file_path, chunk_size=core.CHUNK_SIZE):
+    """Decoded first record of a table (without BOM)"""
+    for block, _ in _iter_records(file_path, chunk_size):
+        stops = _split_rows(np.frombuffer(block, dtype=np.uint8))[1]
+        return block[:int(stops[0])].decode('utf-8-sig')
+    return ''
+
+
+def read_header(file_path, delimiter=None):
+    """``(delimiter, fields)`` of the first row of a table"""
+    text = _first_record(file_path)
+    if delimiter is None:
+        delimiter = _sniff(text.split('\n', 1)[0], TABLE_EXTENSIONS.get(_table_ext(file_path), ','))
+    fields = next(csv.reader([text], delimiter=delimiter), [])
+    return delimiter, [field.strip() for field in fields]
+
+
+def resolve(file_path, column=None, delimiter=None, header=True):
+    """``TableFormat`` of a table, finding the email column when not given
+
+    ``column`` is a header name or a 0-based index. Without one, the first
+    header naming an email column is used, or without a header the first
+    field of the first row holding an ``@``. Raises ``ValueError`` when the
+    column cannot be found.
+    """
+    if delimiter is not None and (len(delimiter) != 1 or not delimiter.isascii() or delimiter in '"\r\n'):
+        raise ValueError(f"The delimiter must be one ASCII character other than a quote: {delimiter!r}")
+    delimiter, fields = read_header(file_path, delimiter)
+    if isinstance(column, str):
+        keys = [_header_key(field) for field in fields]
+        if not header or _header_key(column) not in keys:
+            raise ValueError(f"No column named {column!r} in {os.path.basename(file_path)}; "
+                             f"columns: {', '.join(fields)}")
+        column = keys.index(_header_key(column))
+    elif column is None:
+        if header:
+            keys = [_header_key(field) for field in fields]
+            found = [i for i, key in enumerate(keys) if key in ('email', 'emailaddress', 'mail')]
+            found = found or [i for i, key in enumerate(keys) if 'email' in key]
+        else:
+            found = [i for i, field in enumerate(fields) if '@' in field]
+        if not found:
+            raise ValueError(f"Cannot tell the email column of {os.path.basename(file_path)}; choose one")
+        column = found[0]
+    elif column < 0:
+        raise ValueError(f"Invalid column number: {column + 1}")
+    return TableFormat(column, delimiter, header)
+
+
+def _record_end(buffer):
+    """Offset just after the last newline of a block that is outside quotes (0 if none)"""
+    newlines = np.flatnonzero(buffer == _NEWLINE)
+    if not len(newlines):
+        return 0
+    quotes = np.flatnonzero(buffer == _QUOTE)
+    if len(quotes):
+        newlines = newlines[np.searchsorted(quotes, newlines) % 2 == 0]
+    return int(newlines[-1]) + 1 if len(newlines) else 0
+
+
+def _iter_records(file_path, chunk_size=core.CHUNK_SIZE, progress=None):
+    """Yield ``(block, first_line)`` pairs of whole records, ``first_line`` being 1-based"""
+    total = os.path.getsize(file_path) or 1
+    lines_before = 0
+    last_percent = -1
+    with compress.open_input(file_path) as (f, raw):
+        pending = b''
+        while True:
+            chunk = f.read(chunk_size)
+            block = pending + chunk
+            # A record may only end on a newline outside quotes
+            cut = _record_end(np.frombuffer(block, dtype=np.uint8)) if chunk else len(block)
+            if cut:
+                yield block[:cut], lines_before + 1
+                lines_before += block.count(b'\n', 0, cut)
+            pending = block[cut:]
+            if progress is not None:
+                percent = min(raw.tell() * 100 // total, 100)
+                if percent != last_percent:
+                    last_percent = percent
+                    progress(percent)
+            if not chunk:
+                break
+
+
+def _split_rows(buffer):
+    """``(starts, stops)`` of the records of a block; ``stops`` include the newline"""
+    newlines = np.flatnonzero(buffer == _NEWLINE)
+    quotes = np.flatnonzero(buffer == _QUOTE)
+    if len(quotes) and len(newlines):
+        newlines = newlines[np.searchsorted(quotes, newlines) % 2 == 0]
+    stops = newlines + 1
+    if not len(stops) or stops[-1] != len(buffer):
+        stops = np.append(stops, len(buffer))
+    starts = np.concatenate(([0], stops[:-1]))
+    return starts.astype(np.int64), stops.astype(np.int64)
+
+
+def _gather(buffer, starts, ends):
+    """The byte ranges ``starts:ends`` of a buffer, each followed by ``\\n``, as one bytes block"""
+    lengths = ends - starts
+    out_starts = np.cumsum(lengths + 1) - (lengths + 1)
+    if not len(starts):
+        return b''
+    positions = np.repeat(starts - out_starts, lengths + 1) + np.arange(int(out_starts[-1] + lengths[-1]) + 1)
+    gathered = buffer[np.minimum(positions, len(buffer) - 1)]
+    gathered[out_starts + lengths] = _NEWLINE
+    return gathered.tobytes()
+
+
+def _column(block, starts, stops, table):
+    """The email field of every record of a block, one per line of a bytes block"""
+    if not len(starts):
+        return b''
+    buffer = np.frombuffer(block, dtype=np.uint8)
+    delimiter = ord(table.delimiter)
+    # Content of each record without its line break (\n or \r\n)
+    ends = stops - ((stops > starts) & (buffer[np.maximum(stops - 1, 0)] == _NEWLINE))
+    ends = ends - ((ends > starts) & (buffer[np.maximum(ends - 1, 0)] == ord('\r')))
+
+    def find(value):
+        # Only in the data rows (the header row holds an even number of quotes)
+        positions = np.flatnonzero(buffer == value)
+        return positions[np.searchsorted(positions, int(starts[0])):]
+
+    def row_of(positions):
+        return np.searchsorted(starts, positions, side='right') - 1
+
+    # Field ``column`` lies between the column-th delimiter of its row and the next one
+    delimiters = find(delimiter)
+    bounds = np.append(delimiters, len(buffer))
+    first = np.searchsorted(delimiters, starts)
+    count = np.searchsorted(delimiters, ends) - first
+    k = table.column
+    field_starts = bounds[np.minimum(first + k - 1, len(delimiters))] + 1 if k else starts.copy()
+    field_ends = np.where(count > k, bounds[np.minimum(first + k, len(delimiters))], ends)
+    missing = count < k
+    field_starts[missing] = field_ends[missing] = ends[missing]
+
+    # Quotes are handled here only when they wrap whole fields; rows with
+    # escaped quotes, delimiters or line breaks inside quotes up to the end
+    # of the email field use csv (later columns cannot move the field)
+    slow = np.zeros(len(starts), dtype=bool)
+    quotes = find(_QUOTE)
+    if len(quotes):
+        def up_to_field(positions):
+            rows = row_of(positions)
+            return rows[positions <= field_ends[rows]]
+
+        owners = row_of(quotes)
+        slow[np.bincount(owners, minlength=len(starts)) % 2 == 1] = True
+        slow[up_to_field(quotes[1:][np.diff(quotes) == 1])] = True
+        slow[up_to_field(delimiters[np.searchsorted(quotes, delimiters) % 2 == 1])] = True
+        newlines = find(_NEWLINE)
+        slow[up_to_field(newlines[np.searchsorted(quotes, newlines) % 2 == 1])] = True
+        opening = (quotes == starts[owners]) | (buffer[np.maximum(quotes - 1, 0)] == delimiter)
+        closing = (quotes + 1 == ends[owners]) | (buffer[np.minimum(quotes + 1, len(buffer) - 1)] == delimiter)
+        slow[up_to_field(quotes[~(opening | closing)])] = True
+
+        quoted = (field_ends > field_starts) & (buffer[np.minimum(field_starts, len(buffer) - 1)] == _QUOTE)
+        closed = (field_ends - field_starts >= 2) & (buffer[np.maximum(field_ends - 1, 0)] == _QUOTE)
+        slow |= quoted & ~closed
+        field_starts += quoted
+        field_ends -= quoted
+        field_ends = np.maximum(field_ends, field_starts)
+
+    field_ends[slow] = field_starts[slow]
+    fields = _gather(buffer, field_starts, field_ends)
+    if not slow.any():
+        return fields
+
+    lines = fields.split(b'\n')
+    for row in np.flatnonzero(slow).tolist():
+        text = block[int(starts[row]):int(ends[row])].decode('utf-8')
+        values = next(csv.reader([text], delimiter=table.delimiter), [])
+        value = values[k] if k < len(values) else ''
+        # An address never spans lines; keep one line per record
+        lines[row] = value.replace('\r', ' ').replace('\n', ' ').encode('utf-8')
+    return b'\n'.join(lines)
+
+
+def _iter_row_blocks(file_path, table, chunk_size=core.CHUNK_SIZE, progress=None):
+    """Yield ``(block, starts, stops, line_numbers, head)`` for the data rows of a table
+
+    ``head`` holds the bytes before the first data row (a UTF-8 BOM and the
+    header row) in the first block, ``b''`` after it.
+    """
+    first = True
+    for block, first_line in _iter_records(file_path, chunk_size, progress):
+        buffer = np.frombuffer(block, dtype=np.uint8)
+        starts, stops = _split_rows(buffer)
+        line_numbers = (np.searchsorted(np.flatnonzero(buffer == _NEWLINE), starts) + first_line).astype(np.uint64)
+        head = b''
+        if first:
+            first = False
+            if block.startswith(codecs.BOM_UTF8):
+                starts[0] = len(codecs.BOM_UTF8)
+            skip = 1 if table.header else 0
+            head = block[:int(starts[skip])] if skip < len(starts) else block
+            starts, stops, line_numbers = starts[skip:], stops[skip:], line_numbers[skip:]
+        yield block, starts, stops, line_numbers, head
+
+
+def load_column(file_path, table, chunk_size=core.CHUNK_SIZE, progress=None, normalizer=None, metrics=None,
+                numbered=False):
+    """Load the email column of a table into a ``CompactEmailSet``
+
+    With ``numbered`` the set keeps the line number each row starts on.
+    """
+    fields = bytearray()
+    row_lines = []
+    with timed(metrics, 'parse'):
+        for block, starts, stops, line_numbers, _ in _iter_row_blocks(file_path, table, chunk_size, progress):
+            fields += _column(block, starts, stops, table)
+            if numbered:
+                row_lines.append(line_numbers)
+        starts, lengths, numbers = scan_lines(fields, chunk_size)
+    if metrics is not None:
+        metrics.count('bytes_read', os.path.getsize(file_path))
+    line_numbers = None
+    if numbered:
+        line_numbers = np.concatenate(row_lines)[numbers.astype(np.int64) - 1] if row_lines else numbers
+    return CompactEmailSet.from_lines(fields, starts, lengths, line_numbers, normalizer, metrics)
+
+
+def _copy_rows(block, starts, stops):
+    """The rows ``starts:stops`` of a block, copied in runs of adjacent rows"""
+    if not len(starts):
+        return b''
+    breaks = np.flatnonzero(starts[1:] != stops[:-1]) + 1
+    run_starts = starts[np.concatenate(([0], breaks))].tolist()
+    run_stops = stops[np.append(breaks - 1, len(stops) - 1)].tolist()
+    data = b''.join(block[start:stop] for start, stop in zip(run_starts, run_stops))
+    # The last row of a file may lack its line break
+    return data if data.endswith(b'\n') else data + b'\n'
+
+
+def filter_rows(file_path, table, out_path, keep=None, remove=None, rules=None, normalizer=None,
+                chunk_size=core.CHUNK_SIZE, progress=None):
+    """Write the rows of a table whose address survives, reading it once; returns a ``RowResult``
+
+    A row is written when its address is in ``keep`` (if given), is not in
+    ``remove`` (if given) and matches none of ``rules``. Every such row is
+    written, so rows repeating an address are all kept. ``keep`` and
+    ``remove`` are ``CompactEmailSet``s or collections of emails; plain
+    collections are matched with ``normalizer``.
+    """
+    compact = [emails for emails in (keep, remove) if isinstance(emails, CompactEmailSet)]
+    if compact:
+        normalizer = compact[0].normalizer
+    if keep is not None and not isinstance(keep, CompactEmailSet):
+        keep = CompactEmailSet(keep, normalizer)
+    if remove is not None and not isinstance(remove, CompactEmailSet):
+        remove = CompactEmailSet(remove, normalizer)
+
+    row_count = written_count = 0
+    with compress.open_output(out_path, binary=True) as out:
+        for block, starts, stops, _, head in _iter_row_blocks(file_path, table, chunk_size, progress):
+            out.write(head)
+            fields = _column(block, starts, stops, table)
+            field_starts, lengths, numbers = scan_lines(fields, len(fields) + 1)
+            rows = numbers.astype(np.int64) - 1
+            emails = CompactEmailSet.view(fields, field_starts, lengths, normalizer)
+            survive = np.ones(len(rows), dtype=bool)
+            if keep is not None:
+                survive &= emails.isin(keep)
+            if remove is not None:
+                survive &= ~emails.isin(remove)
+            if rules:
+                survive &= ~rules.mask(emails)
+            rows = rows[survive]
+            out.write(_copy_rows(block, starts[rows], stops[rows]))
+            row_count += len(survive)
+            written_count += len(rows)
+    return RowResult(row_count, written_count, compress.bytes_written(out))
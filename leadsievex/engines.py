@@ -0,0 +1,103 @@
+"""In-memory separation engines.
+
+``set``
+    Plain Python set difference (the original engine). Compact sets are
+    expanded to ``set`` first, so it needs the most memory.
+``hash``
+    Vectorised 64-bit hash anti-join: both lists become ``CompactEmailSet``
+    hash arrays, the main hashes are looked up in the sorted unwanted hashes
+    with ``np.searchsorted`` to build a survivor mask, and the matches are
+    confirmed by comparing their bytes, so a hash collision never removes
+    an address.
+
+Both engines match on normalised keys when a ``Normalizer`` is given (or
+when the main list was loaded with one) and return the original addresses.
+Domain and wildcard rules (see ``rules``) are applied to what remains.
+"""
+
+from . import core
+from .metrics import phase as timed
+from .store import CompactEmailSet
+
+DEFAULT_ENGINE = 'hash'
+
+# Past this share of the main list in changes, a full separation is cheaper
+# than ``update_separation``'s one-by-one lookups
+INCREMENTAL_MAX_SHARE = 0.1
+
+
+def as_compact(emails, normalizer=None):
+    """Return ``emails`` as a ``CompactEmailSet``, converting if needed"""
+    if isinstance(emails, CompactEmailSet):
+        return emails
+    return CompactEmailSet(emails, normalizer)
+
+
+def _normalizer_of(emails, normalizer):
+    if normalizer is None and isinstance(emails, CompactEmailSet):
+        return emails.normalizer
+    return normalizer
+
+
+def set_separate(main_emails, unwanted_emails, progress=None, normalizer=None):
+    """Separate with Python ``set`` difference"""
+    normalizer = _normalizer_of(main_emails, normalizer)
+    if normalizer is not None:
+        # Key -> first original address, so the originals can be returned
+        originals = {}
+        for email in main_emails:
+            originals.setdefault(normalizer(email), email)
+        unwanted_keys = set(map(normalizer, unwanted_emails))
+        if progress is not None:
+            progress(50)
+        remaining = {originals[key] for key in originals.keys() - unwanted_keys}
+        if progress is not None:
+            progress(100)
+        return remaining
+
+    if not isinstance(main_emails, (set, frozenset)):
+        main_emails = set(main_emails)
+    if not isinstance(unwanted_emails, (set, frozenset)):
+        unwanted_emails = set(unwanted_emails)
+    return core.separate(main_emails, unwanted_emails, progress)
+
+
+def hash_separate(main_emails, unwanted_emails, progress=None, normalizer=None):
+    """Separate with the vectorised hash anti-join, returns a ``CompactEmailSet``"""
+    normalizer = _normalizer_of(main_emails, normalizer)
+    main_emails = as_compact(main_emails, normalizer)
+    return main_emails.difference(as_compact(unwanted_emails, normalizer), progress)
+
+
+ENGINES = {
+    'set': set_separate,
+    'hash': hash_separate,
+}
+
+
+def separate(main_emails, unwanted_emails, engine=DEFAULT_ENGINE, progress=None, normalizer=None, rules=None,
+             metrics=None):
+    """Run the named in-memory engine, then drop the addresses matching ``rules`` (a ``RuleSet``)
+
+    ``metrics`` receives the time spent matching and applying the rules.
+    """
+    with timed(metrics, 'match'):
+        remaining = ENGINES[engine](main_emails, unwanted_emails, progress, normalizer)
+    if rules:
+        with timed(metrics, 'rules'):
+            remaining = rules.apply(remaining, _normalizer_of(main_emails, normalizer))
+    return remaining
+
+
+def update_separation(remaining, main_emails, newly_unwanted, no_longer_unwanted):
+    """Apply a change of the unwanted list to a previous ``separate`` result
+
+    ``newly_unwanted`` are dropped from ``remaining`` and the addresses of
+    ``main_emails`` matching ``no_longer_unwanted`` are put back, so the
+    cost grows with the number of changes rather than the list sizes.
+    Python sets are compared as written (no normalisation).
+    """
+    if isinstance(remaining, CompactEmailSet) and isinstance(main_emails, CompactEmailSet):
+        return remaining.without(newly_unwanted).with_members_of(main_emails, no_longer_unwanted)
+    restored = {email for email in no_longer_unwanted if email in main_emails}
+    return (remaining - set(newly_unwanted)) | restored
@@ -0,0 +1,123 @@
+"""Export of separation results.
+
+Three modes are available:
+
+``sorted``
+    Sort in memory, then write (the original behaviour). Needs a second,
+    sorted list of all the addresses.
+``as-is``
+    Write the addresses without sorting or copying them. Compact sets are
+    written in the order of the input file.
+``external``
+    Sort on disk with ``external.export_sorted``; memory stays within the
+    budget no matter how large the result is.
+
+``write_rows`` writes the full rows of a CSV / TSV main list instead of the
+addresses (see ``delimited``). ``write_removed_lines`` adds a sidecar
+listing where each removed address first appeared in the main list.
+
+Every mode writes in ``core.WRITE_BLOCK`` line batches and returns an
+``ExportResult`` carrying its throughput. Paths ending in ``.gz``, ``.bz2``
+or ``.zst`` are compressed while they are written; sizes and throughput
+count the text before compression, next to the size of the file.
+"""
+
+import os
+import time
+from collections import namedtuple
+
+from . import compress, core, delimited, external
+from .store import CompactEmailSet
+
+EXPORT_MODES = ('sorted', 'as-is', 'external')
+
+MODE_DESCRIPTIONS = {
+    'sorted': 'Sorted (in memory)',
+    'as-is': 'As-is (input order, fastest)',
+    'external': 'Sorted on disk (low memory)',
+}
+
+DEFAULT_EXPORT_MODE = 'sorted'
+
+
+class ExportResult(namedtuple('ExportResult', 'count nbytes file_bytes seconds')):
+    """Emails and bytes (before compression) written by an export, the file size and the time it took"""
+
+    __slots__ = ()
+
+    @property
+    def mb_per_second(self):
+        """Write throughput in MB/s"""
+        if not self.seconds:
+            return 0.0
+        return self.nbytes / (1024 * 1024) / self.seconds
+
+
+def _counted(result, metrics):
+    """Record an ``ExportResult`` in ``metrics`` (if any) and return it"""
+    if metrics is not None:
+        metrics.count('rows', result.count)
+        metrics.count('bytes_written', result.nbytes)
+    return result
+
+
+def write_result(emails, file_path, mode=DEFAULT_EXPORT_MODE, progress=None,
+                 max_memory=external.DEFAULT_MAX_MEMORY, tmp_dir=None, metrics=None):
+    """Export a separation result and return an ``ExportResult``
+
+    ``emails`` is a collection of addresses or the path of a result file
+    written by an on-disk engine, which is copied as it is. ``metrics``
+    receives the time spent sorting and writing.
+    """
+    if mode not in EXPORT_MODES:
+        raise ValueError(f"Unknown export mode: {mode!r}")
+    start_time = time.perf_counter()
+
+    if isinstance(emails, str):
+        written = external.copy_result(emails, file_path, progress)
+    elif mode == 'external':
+        written = external.export_sorted(emails, file_path, max_memory, tmp_dir, progress)
+    elif mode == 'as-is' and isinstance(emails, CompactEmailSet):
+        written = core.export_emails(emails.in_input_order(), file_path, progress, sort=False, total=len(emails),
+                                     metrics=metrics)
+    else:
+        written = core.export_emails(emails, file_path, progress, sort=mode == 'sorted', metrics=metrics)
+
+    return _counted(ExportResult(written.count, written.nbytes, os.path.getsize(file_path),
+                                 time.perf_counter() - start_time), metrics)
+
+
+def write_rows(emails, main_file, table, normalizer, file_path, progress=None, metrics=None):
+    """Write the rows of a CSV / TSV main list whose address is in a separation result
+
+    ``emails`` is the result, or the path of a result file written by an
+    on-disk engine (loaded with ``normalizer`` to match the rows against).
+    Returns an ``ExportResult`` counting rows.
+    """
+    start_time = time.perf_counter()
+    if isinstance(emails, str):
+        emails = CompactEmailSet.from_file(emails, normalizer=normalizer)
+    result = delimited.filter_rows(main_file, table, file_path, keep=emails, normalizer=normalizer, progress=progress)
+    return _counted(ExportResult(result.written_count, result.nbytes, os.path.getsize(file_path),
+                                 time.perf_counter() - start_time), metrics)
+
+
+def write_removed_lines(main_emails, remaining, file_path):
+    """Write ``line<TAB>email`` for every main list address missing from ``remaining``
+
+    ``main_emails`` must be a ``CompactEmailSet`` loaded from a file and
+    ``remaining`` the result of separating it. Lines are in input order.
+    Returns the number of lines written.
+    """
+    removed = main_emails.removed_in(remaining)
+    with compress.open_output(file_path) as f:
+        return core.write_lines((f"{line_number}\t{email}" for line_number, email in removed.numbered()), f)
+
+
+def removed_lines_path(export_path):
+    """Sidecar path next to an export, e.g. ``result_removed_lines.txt`` (or ``.txt.gz``)"""
+    base, ext = compress.split_ext(export_path)
+    if delimited.is_table(export_path):
+        # The sidecar is tab separated lines, not rows of the table
+        ext = '.txt' + ext[len('.csv'):]
+    return f"{base}_removed_lines{ext or '.txt'}"
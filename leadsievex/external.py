@@ -0,0 +1,304 @@
+"""Out-of-core separation for lists larger than RAM.
+
+Both inputs are streamed into sorted, de-duplicated run files no larger than
+the memory budget, the runs are k-way merged, and the anti-join of the two
+merged streams is written straight to the output file. Memory use is bounded
+by ``max_memory`` no matter how large the inputs are; the output is sorted,
+just like a regular export.
+
+Sources are either a file path (one email per line) or any iterable of
+emails, so in-memory sets such as pasted addresses can be mixed with files.
+
+With a ``Normalizer`` the runs are sorted by key; main list lines whose
+original differs from the key are stored as ``key NUL original`` so the
+original form can be written to the output. Domain and wildcard rules are
+checked on the merged keys as they are written; the rule lines of the
+unwanted sources are picked up while they are sorted into runs, so the
+files are read once.
+"""
+
+import heapq
+import os
+import re
+import tempfile
+from bisect import bisect_left
+from itertools import islice
+
+from . import compress, core
+from .rules import RuleSet
+
+# Default memory budget for the sort buffers
+DEFAULT_MAX_MEMORY = 512 * 1024 * 1024
+
+# Input size above which the GUI and CLI switch to the on-disk engine
+EXTERNAL_THRESHOLD = 1024 * 1024 * 1024
+
+# Approximate per-email cost of a buffered str in a list, on top of its length
+ENTRY_OVERHEAD = 64
+
+# Maximum number of run files merged at once (keeps open file handles bounded)
+MAX_FAN_IN = 128
+
+_SIZE_UNITS = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+
+
+def parse_size(text):
+    """Parse a human readable size such as ``512M`` or ``2G`` into bytes"""
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([KMGT]?)i?B?\s*', str(text), re.IGNORECASE)
+    if not match:
+        raise ValueError(f"Invalid size: {text!r}")
+    return int(float(match.group(1)) * _SIZE_UNITS[match.group(2).upper()])
+
+
+def source_size(source):
+    """Size in bytes of a file source (estimated once decompressed), 0 for in-memory sources"""
+    if not isinstance(source, str):
+        return 0
+    if compress.codec_of(source) is not None:
+        return os.path.getsize(source) * compress.EXPANSION_RATIO
+    return os.path.getsize(source)
+
+
+def should_use_external(sources, threshold=EXTERNAL_THRESHOLD):
+    """True when the file sources are too large to load as Python sets"""
+    return sum(source_size(source) for source in sources) >= threshold
+
+
+def _iter_source(source, progress=None):
+    if isinstance(source, str):
+        return core.iter_emails(source, progress=progress)
+    return iter(source)
+
+
+def _reported(emails, total, progress):
+    """Iterate ``emails``, reporting the share of ``total`` done every ``core.WRITE_BLOCK`` emails"""
+    emails = iter(emails)
+    done = 0
+    while True:
+        block = list(islice(emails, core.WRITE_BLOCK))
+        if not block:
+            break
+        yield from block
+        done += len(block)
+        progress(min(done * 100 // (total or 1), 100))
+
+
+def count_lines(path):
+    """Number of lines of an uncompressed file"""
+    count = 0
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(core.CHUNK_SIZE)
+            if not chunk:
+                return count
+            count += chunk.count(b'\n')
+
+
+def _unique(lines, keyed=False):
+    previous = None
+    for line in lines:
+        key = core.line_key(line) if keyed else line
+        if key != previous:
+            yield line
+            previous = key
+
+
+def _write_run(emails, run_dir):
+    """Write already sorted emails to a new run file, return its path"""
+    fd, path = tempfile.mkstemp(prefix='run_', suffix='.txt', dir=run_dir)
+    with open(fd, 'w', encoding='utf-8', newline='\n') as f:
+        while True:
+            block = list(islice(emails, 65536))
+            if not block:
+                break
+            f.write('\n'.join(block) + '\n')
+    return path
+
+
+def _rule_lines_of(lines):
+    """Rule lines (see ``rules.is_rule``) of a sorted list of keys"""
+    # Lines starting with "@" sort together; only "*" has to be searched for
+    first, last = bisect_left(lines, '@'), bisect_left(lines, 'A')
+    return lines[first:last] + [line for line in lines if '*' in line and not line.startswith('@')]
+
+
+def _read_run(path):
+    with open(path, 'r', encoding='utf-8', newline='\n') as f:
+        for line in f:
+            yield line[:-1]
+
+
+def sort_into_runs(sources, run_dir, max_memory=DEFAULT_MAX_MEMORY, progress=None,
+                   normalizer=None, originals=True, rule_lines=None):
+    """Stream ``sources`` into sorted run files of at most ``max_memory`` each
+
+    With a ``normalizer`` the runs hold keys, followed by the original
+    address when ``originals`` is true and it differs from the key.
+    ``rule_lines``, a list, receives the rule lines (as keys) of the
+    sources; it needs ``originals=False`` when there is a normalizer.
+    """
+    keyed = normalizer is not None and originals
+    runs = []
+    buffer = []
+    buffered = 0
+
+    def write_run():
+        buffer.sort()
+        if rule_lines is not None:
+            rule_lines.extend(_rule_lines_of(buffer))
+        runs.append(_write_run(_unique(buffer, keyed), run_dir))
+    total_size = sum(source_size(source) for source in sources) or 1
+    done_size = 0
+
+    for source in sources:
+        source_progress = None
+        if progress is not None and isinstance(source, str):
+            base, span = done_size, source_size(source)
+            source_progress = lambda p, base=base, span=span: progress(int((base + span * p / 100) * 100 / total_size))
+
+        lines = _iter_source(source, source_progress)
+        if keyed:
+            lines = core.keyed_lines(lines, normalizer)
+        elif normalizer is not None:
+            lines = map(normalizer, lines)
+
+        for line in lines:
+            buffer.append(line)
+            buffered += len(line) + ENTRY_OVERHEAD
+            if buffered >= max_memory:
+                write_run()
+                buffer.clear()
+                buffered = 0
+
+        done_size += source_size(source)
+
+    if buffer or not runs:
+        write_run()
+    return runs
+
+
+def merge_runs(runs, run_dir, keyed=False):
+    """Merge sorted run files into one sorted, de-duplicated stream
+
+    When there are more than ``MAX_FAN_IN`` runs they are first merged in
+    groups into intermediate runs so the number of open files stays bounded.
+    """
+    while len(runs) > MAX_FAN_IN:
+        merged = []
+        for i in range(0, len(runs), MAX_FAN_IN):
+            group = runs[i:i + MAX_FAN_IN]
+            merged.append(_write_run(_unique(heapq.merge(*map(_read_run, group)), keyed), run_dir))
+            for path in group:
+                os.remove(path)
+        runs = merged
+    return _unique(heapq.merge(*map(_read_run, runs)), keyed)
+
+
+def external_separate(main_sources, unwanted_sources, out_path,
+                      max_memory=DEFAULT_MAX_MEMORY, tmp_dir=None, progress=None, normalizer=None, rules=None):
+    """Write the emails of ``main_sources`` missing from ``unwanted_sources``
+
+    Emails matching the rule lines of ``unwanted_sources`` or ``rules`` (a
+    ``RuleSet``) are left out as well. Returns a ``SeparationResult`` with
+    the number of unique main emails, unique unwanted emails and emails
+    written to ``out_path``, and the bytes written.
+    """
+    def phase(start, end):
+        if progress is None:
+            return None
+        return lambda p: progress(start + (end - start) * p // 100)
+
+    with tempfile.TemporaryDirectory(prefix='leadsievex_', dir=tmp_dir) as run_dir:
+        keyed = normalizer is not None
+        main_runs = sort_into_runs(main_sources, run_dir, max_memory, phase(0, 45), normalizer)
+        unwanted_rules = []
+        unwanted_runs = sort_into_runs(unwanted_sources, run_dir, max_memory, phase(45, 90),
+                                       normalizer, originals=False, rule_lines=unwanted_rules)
+        if unwanted_rules:
+            rules = RuleSet(unwanted_rules + list(rules.rules if rules else ()))
+
+        # Merge progress by main lines read, against the (not yet de-duplicated) lines of the runs
+        merge_progress = phase(90, 99)
+        main_lines = sum(map(count_lines, main_runs)) if merge_progress is not None else 0
+
+        main_count = unwanted_count = remaining_count = 0
+        unwanted = merge_runs(unwanted_runs, run_dir)
+        current = next(unwanted, None)
+        if current is not None:
+            unwanted_count = 1
+
+        with compress.open_output(out_path) as f:
+            batch = []
+            for line in merge_runs(main_runs, run_dir, keyed):
+                main_count += 1
+                key = core.line_key(line) if keyed else line
+                # Advance the unwanted stream up to the current main key
+                while current is not None and current < key:
+                    current = next(unwanted, None)
+                    if current is not None:
+                        unwanted_count += 1
+                if key != current and not (rules and rules.matches(key)):
+                    batch.append(core.line_original(line) if keyed else line)
+                    if len(batch) >= core.WRITE_BLOCK:
+                        f.write('\n'.join(batch) + '\n')
+                        remaining_count += len(batch)
+                        batch = []
+                # Also when few emails remain, so a cancelled job stops during the merge
+                if merge_progress is not None and not main_count % core.WRITE_BLOCK:
+                    merge_progress(min(main_count * 100 // (main_lines or 1), 100))
+            if batch:
+                f.write('\n'.join(batch) + '\n')
+                remaining_count += len(batch)
+
+        # Count the unwanted emails sorting after the last main email
+        if current is not None:
+            unwanted_count += sum(1 for _ in unwanted)
+
+    if progress is not None:
+        progress(100)
+    return core.SeparationResult(main_count, unwanted_count, remaining_count, compress.bytes_written(f))
+
+
+def export_sorted(emails, out_path, max_memory=DEFAULT_MAX_MEMORY, tmp_dir=None, progress=None):
+    """Write ``emails`` sorted to ``out_path`` without a second in-memory copy
+
+    The emails are sorted into runs of at most ``max_memory`` on disk and
+    merged straight into the output. Returns a ``core.WriteResult``.
+    """
+    total = len(emails)
+    with tempfile.TemporaryDirectory(prefix='leadsievex_', dir=tmp_dir) as run_dir:
+        if progress is not None:
+            emails = _reported(emails, total, lambda p: progress(p // 2))
+        runs = sort_into_runs([emails], run_dir, max_memory)
+        if progress is not None:
+            progress(50)
+        write_progress = None if progress is None else (lambda p: progress(50 + p // 2))
+        with compress.open_output(out_path) as f:
+            written = core.write_lines(merge_runs(runs, run_dir), f, total, write_progress)
+    if progress is not None:
+        progress(100)
+    return core.WriteResult(written, compress.bytes_written(f))
+
+
+def copy_result(src_path, dst_path, progress=None):
+    """Copy an on-disk separation result to its export destination
+
+    The destination is compressed when its extension asks for it. Returns
+    a ``core.WriteResult`` counting the emails (lines) copied.
+    """
+    total = os.path.getsize(src_path) or 1
+    copied = 0
+    lines = 0
+    with open(src_path, 'rb') as src, compress.open_output(dst_path, binary=True) as dst:
+        while True:
+            chunk = src.read(core.CHUNK_SIZE)
+            if not chunk:
+                break
+            dst.write(chunk)
+            copied += len(chunk)
+            lines += chunk.count(b'\n')
+            if progress is not None:
+                progress(int(copied * 100 / total))
+    if progress is not None:
+        progress(100)
+    return core.WriteResult(lines, copied)
@@ -0,0 +1,93 @@
+"""Cooperative cancel and pause of long operations.
+
+The loaders, engines and exporters report progress through their
+``progress`` callable after every block of work. ``JobControl.progress`` is
+such a callable that also acts on requests from another thread: once the
+job is cancelled the next report raises ``Cancelled``, and while it is
+paused the next report blocks until it is resumed or cancelled. Work
+therefore stops at a block boundary, and the ``with`` blocks on the way
+out remove the temporary directories. ``remove_partial`` deletes outputs
+that were only half written.
+
+Percentages are passed on at most every ``PROGRESS_INTERVAL`` seconds (and
+always on reaching 100), however often the operation reports them, so a
+fast loop cannot flood the receiver, e.g. the Qt event queue.
+"""
+
+import os
+import threading
+import time
+
+# Minimum time between two forwarded progress reports (seconds)
+PROGRESS_INTERVAL = 0.1
+
+
+class Cancelled(Exception):
+    """Raised inside an operation whose job was cancelled"""
+
+    def __init__(self, message='Cancelled by the user'):
+        super().__init__(message)
+
+
+class JobControl:
+    """Cancel and pause requests for one job, plus its throttled ``progress`` callable
+
+    ``emit`` receives the forwarded percentages (e.g. a Qt signal's
+    ``emit``). ``cancel``, ``pause`` and ``resume`` may be called from any
+    thread; the job notices them at its next progress report or ``check``.
+    """
+
+    def __init__(self, emit=None, interval=PROGRESS_INTERVAL):
+        self._emit = emit
+        self._interval = interval
+        self._cancelled = threading.Event()
+        self._running = threading.Event()
+        self._running.set()
+        self._last_time = None
+        self._last_percent = None
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    @property
+    def paused(self):
+        return not self._running.is_set()
+
+    def cancel(self):
+        """Stop the job at its next check; wakes it if it is paused"""
+        self._cancelled.set()
+        self._running.set()
+
+    def pause(self):
+        self._running.clear()
+
+    def resume(self):
+        self._running.set()
+
+    def check(self):
+        """Wait while paused, then raise ``Cancelled`` if the job was cancelled"""
+        self._running.wait()
+        if self._cancelled.is_set():
+            raise Cancelled()
+
+    def progress(self, percent):
+        """``progress`` callable for the operations: check, then forward within the time budget"""
+        self.check()
+        if self._emit is None or percent == self._last_percent:
+            return
+        now = time.monotonic()
+        if percent >= 100 or self._last_time is None or now - self._last_time >= self._interval:
+            self._last_time = now
+            self._last_percent = percent
+            self._emit(percent)
+
+
+def remove_partial(*paths):
+    """Delete the half-written outputs of a cancelled job, skipping missing ones"""
+    for path in paths:
+        if path and os.path.exists(path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
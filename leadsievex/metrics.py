@@ -0,0 +1,233 @@
+"""Per-phase metrics of loads, separations and exports.
+
+A ``Metrics`` object records what one operation did: counters such as the
+bytes read, lines parsed and duplicates dropped, and the time spent in each
+of its phases (I/O wait, normalisation, hashing, ...). The loaders, engines
+and exporters take an optional ``metrics`` argument and fill it in as they
+go; passing ``None`` costs nothing. Phases never nest, so the part of the
+total no phase accounts for is reported as ``other``.
+
+Metrics are exported as JSON or in the Prometheus text format, e.g. for a
+node exporter's textfile collector.
+"""
+
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+
+# Counters and their descriptions (also the Prometheus HELP text)
+COUNTERS = {
+    'bytes_read': 'Bytes read from the input files',
+    'bytes_written': 'Bytes written to the output file, before compression',
+    'lines_parsed': 'Non-empty input lines parsed',
+    'rows': 'Rows processed (the basis of rows per second)',
+    'emails': 'Unique emails kept',
+    'duplicates_dropped': 'Repeated emails dropped while loading',
+    'unwanted': 'Emails of the unwanted lists',
+    'removed': 'Emails removed from the main list',
+    'remaining': 'Emails left after separating',
+    'cache_hits': 'Lists loaded from the index cache',
+}
+
+# Phases and their descriptions
+PHASES = {
+    'io_wait': 'Reading input or writing output, including (de)compression',
+    'parse': 'Finding and stripping lines',
+    'normalize': 'Normalising addresses',
+    'hash': 'Hashing addresses',
+    'dedupe': 'Sorting by hash and dropping duplicates',
+    'prefilter': 'Bloom filter lookups',
+    'match': 'Matching the main list against the unwanted list',
+    'rules': 'Applying domain and wildcard rules',
+    'sort': 'Sorting the result',
+    'cache_write': 'Writing the index cache',
+}
+
+# File extensions saved in the Prometheus text format; anything else is JSON
+PROMETHEUS_EXTENSIONS = ('.prom',)
+
+# Prefix of the exported Prometheus metric names
+PROMETHEUS_PREFIX = 'leadsievex'
+
+
+def peak_rss():
+    """``(own, children)`` peak resident set size of this process in bytes (``None`` when unknown)"""
+    try:
+        import resource
+    except ImportError:
+        resource = None
+    if resource is not None:
+        # Linux reports kilobytes, macOS bytes
+        scale = 1 if sys.platform == 'darwin' else 1024
+        return (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale,
+                resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale)
+    if sys.platform == 'win32':
+        import ctypes
+        from ctypes import wintypes
+
+        class Counters(ctypes.Structure):
+            _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD),
+                        ('PeakWorkingSetSize', ctypes.c_size_t), ('WorkingSetSize', ctypes.c_size_t),
+                        ('QuotaPeakPagedPoolUsage', ctypes.c_size_t), ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                        ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t),
+                        ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                        ('PagefileUsage', ctypes.c_size_t), ('PeakPagefileUsage', ctypes.c_size_t)]
+
+        counters = Counters()
+        counters.cb = ctypes.sizeof(counters)
+        handle = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+            return counters.PeakWorkingSetSize, None
+    return None, None
+
+
+class Metrics:
+    """Counters and phase timings of one operation
+
+    ``operation`` is ``load``, ``separate`` or ``export``; ``labels`` (e.g.
+    ``list='main'``, ``file='leads.txt'``) tell operations of the same kind
+    apart and become Prometheus labels.
+    """
+
+    def __init__(self, operation, **labels):
+        self.operation = operation
+        self.labels = labels
+        self.counters = {}
+        self.phases = {}
+        self.seconds = 0.0
+        self.peak_rss_bytes = None
+        self._start_time = time.perf_counter()
+
+    def count(self, name, value=1):
+        """Add ``value`` to a counter"""
+        self.counters[name] = self.counters.get(name, 0) + int(value)
+
+    def count_separation(self, main_count, unwanted_count, remaining_count):
+        """Record the counts of a separation"""
+        self.count('rows', main_count)
+        self.count('unwanted', unwanted_count)
+        self.count('removed', main_count - remaining_count)
+        self.count('remaining', remaining_count)
+
+    def add_time(self, name, seconds):
+        """Add ``seconds`` to a phase"""
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    @contextmanager
+    def phase(self, name):
+        """Time the enclosed block as part of a phase"""
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start_time)
+
+    def finish(self):
+        """Stop the clock and record the peak memory; returns ``self``"""
+        self.seconds = time.perf_counter() - self._start_time
+        self.peak_rss_bytes = peak_rss()[0]
+        return self
+
+    @property
+    def other_seconds(self):
+        """Part of the total not accounted for by any phase"""
+        return max(self.seconds - sum(self.phases.values()), 0.0)
+
+    @property
+    def rows_per_second(self):
+        """Rows processed per second of the whole operation"""
+        if not self.seconds:
+            return 0.0
+        return self.counters.get('rows', 0) / self.seconds
+
+    def as_dict(self):
+        """Plain ``dict`` of everything recorded (JSON-ready)"""
+        return {
+            'operation': self.operation,
+            'labels': dict(self.labels),
+            'seconds': self.seconds,
+            'rows_per_second': self.rows_per_second,
+            'peak_rss_bytes': self.peak_rss_bytes,
+            'counters': dict(self.counters),
+            'phases': dict(self.phases, other=self.other_seconds),
+        }
+
+    def summary(self):
+        """Human readable lines: counters, then phases with their share of the total"""
+        title = self.operation.capitalize()
+        if self.labels:
+            title += f" ({', '.join(map(str, self.labels.values()))})"
+        lines = [f"{title}: {self.seconds:.2f} s, {self.rows_per_second:,.0f} rows/s"]
+        for name, value in self.counters.items():
+            lines.append(f"  {name.replace('_', ' ')}: {value:,}")
+        for name, seconds in sorted(dict(self.phases, other=self.other_seconds).items(), key=lambda item: -item[1]):
+            share = seconds * 100 / self.seconds if self.seconds else 0
+            lines.append(f"  {name.replace('_', ' ')}: {seconds:.3f} s ({share:.0f}%)")
+        if self.peak_rss_bytes is not None:
+            lines.append(f"  peak memory: {self.peak_rss_bytes / (1024 * 1024):,.0f} MB")
+        return '\n'.join(lines)
+
+    def __repr__(self):
+        return f"Metrics({self.operation!r}, seconds={self.seconds:.3f}, counters={self.counters!r})"
+
+
+def phase(metrics, name):
+    """``metrics.phase(name)``, or a context doing nothing when ``metrics`` is ``None``"""
+    return nullcontext() if metrics is None else metrics.phase(name)
+
+
+def to_json(metrics_list):
+    """JSON document of several ``Metrics``"""
+    return json.dumps({'metrics': [metrics.as_dict() for metrics in metrics_list]}, indent=2)
+
+
+def _label_text(labels):
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+               for value in labels.values())
+    return '{' + ','.join(f'{name}="{value}"' for name, value in zip(labels, escaped)) + '}'
+
+
+def to_prometheus(metrics_list):
+    """Prometheus text exposition of several ``Metrics``, one gauge family per measurement"""
+    families = {}
+
+    def sample(name, help_text, labels, value):
+        families.setdefault(name, (help_text, []))[1].append(f"{name}{_label_text(labels)} {value}")
+
+    for metrics in metrics_list:
+        labels = dict(operation=metrics.operation, **metrics.labels)
+        sample(f'{PROMETHEUS_PREFIX}_seconds', 'Wall time of the operation', labels, repr(metrics.seconds))
+        sample(f'{PROMETHEUS_PREFIX}_rows_per_second', 'Rows processed per second', labels,
+               repr(metrics.rows_per_second))
+        if metrics.peak_rss_bytes is not None:
+            sample(f'{PROMETHEUS_PREFIX}_peak_rss_bytes', 'Peak resident memory of the process', labels,
+                   metrics.peak_rss_bytes)
+        for name, value in metrics.counters.items():
+            sample(f'{PROMETHEUS_PREFIX}_{name}', COUNTERS.get(name, name.replace('_', ' ')), labels, value)
+        for name, seconds in dict(metrics.phases, other=metrics.other_seconds).items():
+            sample(f'{PROMETHEUS_PREFIX}_phase_seconds', 'Wall time spent in a phase of the operation',
+                   dict(labels, phase=name), repr(seconds))
+
+    lines = []
+    for name, (help_text, samples) in families.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        lines.extend(samples)
+    return '\n'.join(lines) + '\n'
+
+
+def write(metrics_list, file_path):
+    """Save metrics as Prometheus text (``.prom``) or JSON (anything else, ``-`` for stdout)"""
+    if os.path.splitext(file_path)[1].lower() in PROMETHEUS_EXTENSIONS:
+        text = to_prometheus(metrics_list)
+    else:
+        text = to_json(metrics_list) + '\n'
+    if file_path == '-':
+        sys.stdout.write(text)
+        return
+    with open(file_path, 'w', encoding='utf-8') as f:
+        f.write(text)
@@ -0,0 +1,110 @@
+"""Email normalisation rules applied while a list is loaded.
+
+A ``Normalizer`` turns an address as written in a file into the key used for
+matching, e.g. ``mailto:"John"@Example.COM`` -> ``john@example.com``. The
+loaders keep the original text for export and match on the keys only.
+
+Available rules (applied in this order):
+
+``mailto``     strip a leading ``mailto:`` and any ``?subject=...`` query
+``quotes``     drop double quotes and surrounding ``'``, ``<`` and ``>``
+``lowercase``  lowercase the whole address
+``idna``       convert international domain names to punycode
+``gmail``      ignore dots and ``+tags`` in gmail.com / googlemail.com addresses
+"""
+
+RULES = ('mailto', 'quotes', 'lowercase', 'idna', 'gmail')
+
+RULE_DESCRIPTIONS = {
+    'mailto': 'Strip "mailto:" prefixes',
+    'quotes': 'Remove quotes and angle brackets',
+    'lowercase': 'Ignore upper/lower case',
+    'idna': 'Punycode international domains',
+    'gmail': 'Fold Gmail dots and +tags',
+}
+
+DEFAULT_RULES = ('mailto', 'quotes', 'lowercase', 'idna')
+
+GMAIL_DOMAINS = frozenset({'gmail.com', 'googlemail.com'})
+
+
+class Normalizer:
+    """Callable that maps an address to its matching key"""
+
+    def __init__(self, rules=DEFAULT_RULES):
+        unknown = set(rules) - set(RULES)
+        if unknown:
+            raise ValueError(f"Unknown normalization rule(s): {', '.join(sorted(unknown))}")
+        self.rules = tuple(rule for rule in RULES if rule in rules)
+        self._mailto = 'mailto' in self.rules
+        self._quotes = 'quotes' in self.rules
+        self._lowercase = 'lowercase' in self.rules
+        self._idna = 'idna' in self.rules
+        self._gmail = 'gmail' in self.rules
+
+    def __call__(self, email):
+        if self._mailto and email[:7].lower() == 'mailto:':
+            email = email[7:].split('?', 1)[0]
+        if self._quotes:
+            if '"' in email:
+                email = email.replace('"', '')
+            email = email.strip(" '<>")
+        if self._lowercase:
+            email = email.lower()
+        if self._idna or self._gmail:
+            local, at, domain = email.rpartition('@')
+            if at:
+                if self._idna and not domain.isascii():
+                    try:
+                        domain = domain.encode('idna').decode('ascii')
+                    except UnicodeError:
+                        pass
+                if self._gmail and domain.lower() in GMAIL_DOMAINS:
+                    local = local.split('+', 1)[0].replace('.', '')
+                    domain = 'gmail.com'
+                email = f"{local}@{domain}"
+        return email
+
+    def unchanged_bytes(self):
+        """Bytes an ASCII address may consist of and still be its own key, or ``None``
+
+        Used to skip normalising the many addresses that are already keys.
+        The gmail rule changes plain lowercase addresses too, so with it
+        every address has to be normalised.
+        """
+        if self._gmail:
+            return None
+        plain = bytes(range(0x21, 0x7f))
+        if self._mailto:
+            plain = plain.replace(b':', b'')
+        if self._quotes:
+            plain = plain.translate(None, b'"\'<>')
+        if self._lowercase:
+            plain = plain.translate(None, bytes(range(ord('A'), ord('Z') + 1)))
+        return plain
+
+    def __eq__(self, other):
+        return isinstance(other, Normalizer) and self.rules == other.rules
+
+    def __hash__(self):
+        return hash(self.rules)
+
+    def __repr__(self):
+        return f"Normalizer({self.rules!r})"
+
+
+def parse_rules(text):
+    """Parse ``none`` or a comma separated list of rule names (``default`` expands)"""
+    rules = []
+    for rule in text.lower().split(','):
+        rule = rule.strip()
+        if rule == 'default':
+            rules.extend(DEFAULT_RULES)
+        elif rule and rule != 'none':
+            rules.append(rule)
+    return Normalizer(rules).rules  # validates the names
+
+
+def make_normalizer(rules=DEFAULT_RULES):
+    """Build a ``Normalizer``, or ``None`` when no rules are enabled"""
+    return Normalizer(rules) if rules else None
@@ -0,0 +1,160 @@
+"""Multi-process sharded separation.
+
+Work is spread over a ``ProcessPoolExecutor`` in two rounds:
+
+1. every input file is split into line-aligned byte ranges and each worker
+   hash-partitions its range into per-shard temporary files;
+2. each worker loads the main and unwanted files of one shard into sets,
+   takes the difference and writes the shard's survivors.
+
+The shard outputs are then concatenated into the result file. Shards are
+chosen by a stable hash of the address, so an email always lands in the
+same shard for both lists and the per-shard differences add up to the
+exact overall difference. The output is grouped by shard, not sorted.
+Compressed inputs cannot be split, so each is partitioned by one worker.
+
+With a ``Normalizer`` addresses are sharded and matched by key, and main
+list lines carry their original form (``key NUL original``, as in the
+external engine) so the output keeps the addresses as written. Domain and
+wildcard rules are sent to the shard workers and applied to their survivors.
+"""
+
+import os
+import shutil
+import tempfile
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+from . import compress, core
+
+
+def default_shards():
+    """One shard per CPU core"""
+    return os.cpu_count() or 1
+
+
+def shard_of(email, shards):
+    """Stable shard index of an email (independent of ``PYTHONHASHSEED``)"""
+    return zlib.crc32(email.encode('utf-8')) % shards
+
+
+def _shard_path(work_dir, tag, part, shard):
+    return os.path.join(work_dir, f"{tag}_{part}_{shard}.txt")
+
+
+def _write_shards(emails, work_dir, tag, part, shards, normalizer=None):
+    """Hash-partition ``emails`` into one file per shard"""
+    keyed = normalizer is not None and tag == 'main'
+    if keyed:
+        emails = core.keyed_lines(emails, normalizer)
+    elif normalizer is not None:
+        emails = map(normalizer, emails)
+
+    buckets = [[] for _ in range(shards)]
+    files = [open(_shard_path(work_dir, tag, part, shard), 'w', encoding='utf-8', newline='\n')
+             for shard in range(shards)]
+    try:
+        for email in emails:
+            shard = shard_of(core.line_key(email) if keyed else email, shards)
+            bucket = buckets[shard]
+            bucket.append(email)
+            if len(bucket) >= 65536:
+                files[shard].write('\n'.join(bucket) + '\n')
+                bucket.clear()
+        for shard, bucket in enumerate(buckets):
+            if bucket:
+                files[shard].write('\n'.join(bucket) + '\n')
+    finally:
+        for f in files:
+            f.close()
+
+
+def _partition_range(file_path, start, end, work_dir, tag, part, shards, normalizer=None):
+    """Worker: partition one byte range of an input file"""
+    _write_shards(core.iter_emails(file_path, start=start, end=end), work_dir, tag, part, shards, normalizer)
+
+
+def _separate_shard(work_dir, shard, main_parts, unwanted_parts, keyed=False, rules=None):
+    """Worker: difference of one shard, written to its output file"""
+    unwanted_emails = set()
+    for part in unwanted_parts:
+        unwanted_emails.update(core.iter_emails(_shard_path(work_dir, 'unwanted', part, shard)))
+
+    if keyed:
+        # Key -> first original address seen for it
+        originals = {}
+        for part in main_parts:
+            for line in core.iter_emails(_shard_path(work_dir, 'main', part, shard)):
+                originals.setdefault(core.line_key(line), core.line_original(line))
+        main_count = len(originals)
+        remaining = [originals[key] for key in originals.keys() - unwanted_emails
+                     if not (rules and rules.matches(key))]
+    else:
+        main_emails = set()
+        for part in main_parts:
+            main_emails.update(core.iter_emails(_shard_path(work_dir, 'main', part, shard)))
+        main_count = len(main_emails)
+        remaining = main_emails - unwanted_emails
+        if rules:
+            remaining = rules.apply(remaining)
+
+    out_path = os.path.join(work_dir, f"out_{shard}.txt")
+    with open(out_path, 'w', encoding='utf-8', newline='\n') as f:
+        if remaining:
+            f.write('\n'.join(remaining) + '\n')
+    return main_count, len(unwanted_emails), len(remaining)
+
+
+def parallel_separate(main_sources, unwanted_sources, out_path, shards=None,
+                      workers=None, tmp_dir=None, progress=None, normalizer=None, rules=None):
+    """Separate with one process per shard and write the survivors to ``out_path``
+
+    Sources are file paths or in-memory iterables of emails (the latter are
+    partitioned in this process). Emails matching ``rules`` (a ``RuleSet``)
+    are left out as well. Returns a ``SeparationResult``.
+    """
+    shards = shards or default_shards()
+    workers = workers or min(shards, default_shards())
+
+    with tempfile.TemporaryDirectory(prefix='leadsievex_', dir=tmp_dir) as work_dir, \
+            ProcessPoolExecutor(max_workers=workers) as pool:
+        parts = {'main': [], 'unwanted': []}
+        jobs = []
+        for tag, sources in (('main', main_sources), ('unwanted', unwanted_sources)):
+            for source in sources:
+                if isinstance(source, str):
+                    for start, end in core.line_ranges(source, workers):
+                        part = len(parts[tag])
+                        parts[tag].append(part)
+                        jobs.append(pool.submit(_partition_range, source, start, end,
+                                                work_dir, tag, part, shards, normalizer))
+                else:
+                    part = len(parts[tag])
+                    parts[tag].append(part)
+                    _write_shards(source, work_dir, tag, part, shards, normalizer)
+
+        for done, job in enumerate(jobs, 1):
+            job.result()
+            if progress is not None:
+                progress(done * 50 // len(jobs))
+
+        jobs = [pool.submit(_separate_shard, work_dir, shard, parts['main'], parts['unwanted'],
+                            normalizer is not None, rules)
+                for shard in range(shards)]
+        main_count = unwanted_count = remaining_count = 0
+        for done, job in enumerate(jobs, 1):
+            shard_main, shard_unwanted, shard_remaining = job.result()
+            main_count += shard_main
+            unwanted_count += shard_unwanted
+            remaining_count += shard_remaining
+            if progress is not None:
+                progress(50 + done * 45 // len(jobs))
+
+        with compress.open_output(out_path, binary=True) as out:
+            for shard in range(shards):
+                with open(os.path.join(work_dir, f"out_{shard}.txt"), 'rb') as f:
+                    shutil.copyfileobj(f, out, core.CHUNK_SIZE)
+
+    if progress is not None:
+        progress(100)
+    return core.SeparationResult(main_count, unwanted_count, remaining_count, compress.bytes_written(out))
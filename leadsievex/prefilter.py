@@ -0,0 +1,246 @@
+"""Bloom-filter prefilter for very large suppression lists.
+
+Holding hundreds of millions of suppressed addresses in memory costs tens of
+GB. A ``SuppressionFilter`` keeps only a Bloom filter in memory (about one
+byte per entry with the default settings) and the exact keys in a sorted
+file on disk:
+
+1. every main list address is checked against the Bloom filter, using the
+   64-bit hashes the ``CompactEmailSet`` already holds, so nothing is
+   re-hashed;
+2. only the few addresses that might match (real matches plus ~2% false
+   positives) are looked up in the sorted key file, through a sparse
+   in-memory index of one key per ``BLOCK_LINES`` lines.
+
+Rule lines of the unwanted lists (``@example.com``, ``*.gov``, see ``rules``)
+are kept apart from the keys: they are stored in the filter header and
+applied to whatever passes the key check.
+
+A filter is two files: ``<name>.lsxbloom`` (header, sparse index and the
+filter bits) and ``<name>.lsxbloom.keys`` (the sorted, de-duplicated keys).
+The key file is built with the external sort, so building needs no more than
+``max_memory`` either.
+"""
+
+import json
+import os
+import struct
+import tempfile
+from bisect import bisect_right
+from itertools import islice
+
+import numpy as np
+
+from . import external, normalize
+from .rules import RuleSet
+from .store import CompactEmailSet, hash_many
+
+MAGIC = b'LSXBLM02'
+
+# Filters written before rule lines were stored apart; they must be built again
+_OLD_MAGICS = (b'LSXBLM01',)
+
+FILTER_SUFFIX = '.lsxbloom'
+KEYS_SUFFIX = '.keys'
+
+# 8 bits and 5 probes per entry: ~1 byte per entry, ~2% false positives
+BITS_PER_ENTRY = 8
+HASH_COUNT = 5
+
+# Lines of the key file per sparse index entry
+BLOCK_LINES = 4096
+
+# Keys hashed and written per batch while building (a multiple of BLOCK_LINES)
+_BUILD_BATCH = 16 * BLOCK_LINES
+
+# Main list hashes probed per step
+_PROBE_BLOCK = 1 << 20
+
+
+def _probe_positions(hashes, bit_count, hash_count):
+    """Bit positions of every hash, by double hashing the two 32-bit halves"""
+    hashes = np.asarray(hashes, dtype=np.uint64)
+    first = hashes & np.uint64(0xffffffff)
+    step = (hashes >> np.uint64(32)) | np.uint64(1)
+    bit_count = np.uint64(bit_count)
+    for i in range(hash_count):
+        yield (first + np.uint64(i) * step) % bit_count
+
+
+class SuppressionFilter:
+    """Bloom filter in memory, backed by a sorted key file for exact answers"""
+
+    def __init__(self, bits, hash_count, count, keys_path, index_keys, index_offsets, normalizer=None, rules=None):
+        self.bits = bits
+        self.hash_count = hash_count
+        self.count = count
+        self.keys_path = keys_path
+        self.index_keys = index_keys
+        self.index_offsets = index_offsets
+        self.normalizer = normalizer
+        # Rule lines of the unwanted lists, applied on top of the keys
+        self.rules = rules if rules is not None else RuleSet()
+
+    @property
+    def bit_count(self):
+        return len(self.bits) * 8
+
+    @property
+    def nbytes(self):
+        """Approximate memory used by the filter and its sparse index"""
+        return self.bits.nbytes + sum(len(key) + 56 for key in self.index_keys) + 8 * len(self.index_offsets)
+
+    def __len__(self):
+        return self.count
+
+    def __repr__(self):
+        return (f"<SuppressionFilter of {self.count:,} emails and {len(self.rules)} rules, "
+                f"{self.nbytes / (1024 * 1024):.1f} MB in memory>")
+
+    def _add(self, hashes):
+        for positions in _probe_positions(hashes, self.bit_count, self.hash_count):
+            np.bitwise_or.at(self.bits, positions >> np.uint64(3),
+                             np.left_shift(1, positions & np.uint64(7)).astype(np.uint8))
+
+    def might_contain(self, hashes):
+        """Boolean mask of the key hashes that may be in the filter (no false negatives)"""
+        mask = np.ones(len(hashes), dtype=bool)
+        for positions in _probe_positions(hashes, self.bit_count, self.hash_count):
+            mask &= ((self.bits[positions >> np.uint64(3)] >> (positions & np.uint64(7)).astype(np.uint8)) & 1) == 1
+        return mask
+
+    def contains_keys(self, keys):
+        """The subset of ``keys`` (already normalised) present in the key file"""
+        found = set()
+        current = -1
+        block = set()
+        with open(self.keys_path, 'rb') as f:
+            for key in sorted(keys):
+                i = bisect_right(self.index_keys, key) - 1
+                if i < 0:
+                    continue
+                if i != current:
+                    # Load the block of sorted keys that would contain ``key``
+                    f.seek(self.index_offsets[i])
+                    end = self.index_offsets[i + 1] if i + 1 < len(self.index_offsets) else None
+                    data = f.read() if end is None else f.read(end - self.index_offsets[i])
+                    block = set(data.decode('utf-8').split('\n'))
+                    current = i
+                if key in block:
+                    found.add(key)
+        return found
+
+    def separate(self, main_emails, progress=None):
+        """Emails of ``main_emails`` that are neither in the filter's key file nor matched by its rules"""
+        if not isinstance(main_emails, CompactEmailSet):
+            main_emails = CompactEmailSet(main_emails, self.normalizer)
+        elif main_emails.normalizer != self.normalizer:
+            raise ValueError('The main list was loaded with different normalization rules than the filter')
+
+        hashes = main_emails.hashes
+        maybe = np.zeros(len(hashes), dtype=bool)
+        for block in range(0, len(hashes), _PROBE_BLOCK):
+            maybe[block:block + _PROBE_BLOCK] = self.might_contain(hashes[block:block + _PROBE_BLOCK])
+            if progress is not None:
+                progress(min(block + _PROBE_BLOCK, len(hashes)) * 80 // max(len(hashes), 1))
+
+        # Exact check of the few candidates against the sorted file
+        candidates = np.flatnonzero(maybe)
+        keys = main_emails.keys_at(candidates)
+        found = self.contains_keys(keys)
+        keep = np.ones(len(hashes), dtype=bool)
+        keep[candidates[[key in found for key in keys]]] = False
+        remaining = self.rules.apply(main_emails.select(keep))
+        if progress is not None:
+            progress(100)
+        return remaining
+
+    def save(self, path):
+        """Write the filter header, sparse index and bits to ``path``"""
+        header = {
+            'count': self.count,
+            'hash_count': self.hash_count,
+            'bit_bytes': len(self.bits),
+            'rules': list(self.normalizer.rules) if self.normalizer is not None else [],
+            'suppression_rules': list(self.rules.rules),
+            'keys_file': os.path.basename(self.keys_path),
+            'index_keys': self.index_keys,
+            'index_offsets': self.index_offsets,
+        }
+        encoded = json.dumps(header).encode('utf-8')
+        with open(path, 'wb') as f:
+            f.write(MAGIC + struct.pack('<Q', len(encoded)) + encoded)
+            f.write(self.bits.tobytes())
+
+    @classmethod
+    def load(cls, path):
+        """Read a filter written by ``save`` (its key file must sit next to it)"""
+        with open(path, 'rb') as f:
+            magic = f.read(len(MAGIC))
+            if magic in _OLD_MAGICS:
+                raise ValueError(f"Suppression filter made by an older version, build it again: {path}")
+            if magic != MAGIC:
+                raise ValueError(f"Not a suppression filter: {path}")
+            (length,) = struct.unpack('<Q', f.read(8))
+            header = json.loads(f.read(length).decode('utf-8'))
+            bits = np.fromfile(f, dtype=np.uint8, count=header['bit_bytes'])
+        keys_path = os.path.join(os.path.dirname(os.path.abspath(path)), header['keys_file'])
+        return cls(bits, header['hash_count'], header['count'], keys_path, header['index_keys'],
+                   header['index_offsets'], normalize.make_normalizer(header['rules']),
+                   RuleSet(header['suppression_rules']))
+
+
+def build_filter(sources, path, normalizer=None, max_memory=external.DEFAULT_MAX_MEMORY, tmp_dir=None,
+                 progress=None, bits_per_entry=BITS_PER_ENTRY, hash_count=HASH_COUNT):
+    """Build a ``SuppressionFilter`` from unwanted sources and save it to ``path``
+
+    Sources are file paths or iterables of emails, as for the external
+    engine. The sorted key file is written to ``path + '.keys'``; rule
+    lines go to the filter's ``RuleSet`` instead.
+    """
+    keys_path = path + KEYS_SUFFIX
+    with tempfile.TemporaryDirectory(prefix='leadsievex_', dir=tmp_dir) as run_dir:
+        sort_progress = None if progress is None else (lambda p: progress(p * 60 // 100))
+        rule_lines = []
+        runs = external.sort_into_runs(sources, run_dir, max_memory, sort_progress, normalizer, originals=False,
+                                       rule_lines=rule_lines)
+        # An invalid rule raises ValueError before the key file is written
+        rules = RuleSet(rule_lines)
+        rule_keys = set(rule_lines)
+
+        # Size the filter for the run lines, an upper bound of the unique keys
+        upper_bound = max(sum(map(external.count_lines, runs)), 1)
+        bit_bytes = max(-(-upper_bound * bits_per_entry // 8), 8)
+        suppression = SuppressionFilter(np.zeros(bit_bytes, dtype=np.uint8), hash_count, 0, keys_path,
+                                        [], [], normalizer, rules)
+
+        keys = external.merge_runs(runs, run_dir)
+        offset = 0
+        with open(keys_path, 'wb') as f:
+            while True:
+                batch = list(islice(keys, _BUILD_BATCH))
+                if not batch:
+                    break
+                if rule_keys:
+                    batch = [key for key in batch if key not in rule_keys]
+                    if not batch:
+                        continue
+                encoded = [key.encode('utf-8') for key in batch]
+                lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+                starts = np.cumsum(lengths + 1) - (lengths + 1)
+                data = b'\n'.join(encoded) + b'\n'
+                suppression._add(hash_many(data, starts, lengths))
+
+                for i in range(0, len(batch), BLOCK_LINES):
+                    suppression.index_keys.append(batch[i])
+                    suppression.index_offsets.append(offset + int(starts[i]))
+                f.write(data)
+                offset += len(data)
+                suppression.count += len(batch)
+                if progress is not None:
+                    progress(60 + min(suppression.count * 40 // upper_bound, 39))
+
+    suppression.save(path)
+    if progress is not None:
+        progress(100)
+    return suppression
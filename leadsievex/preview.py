@@ -0,0 +1,71 @@
+"""Paged, searchable views of the result sets shown by the preview.
+
+The sets to preview can hold millions of addresses. ``EmailPages`` gives
+row-by-row access to them without copying: the rows of a
+``CompactEmailSet`` are its entries in hash order, and only the pages that
+are actually shown are gathered and decoded. ``EmailPages.search`` scans
+the addresses block by block for a piece of text and returns the matching
+rows as an index array, so a filtered view costs a few bytes per match.
+Other collections (small pasted lists) are sorted into a list once.
+"""
+
+import re
+
+import numpy as np
+
+from .store import CompactEmailSet
+
+# Rows decoded at a time for display
+PAGE_SIZE = 1000
+
+# Rows scanned by a search between two progress reports
+SEARCH_BLOCK = 65536
+
+
+class EmailPages:
+    """Addresses of a collection by row number, decoded a page at a time"""
+
+    def __init__(self, emails=()):
+        if isinstance(emails, CompactEmailSet):
+            self._compact, self._list = emails, None
+        else:
+            self._compact, self._list = None, sorted(emails)
+
+    def __len__(self):
+        return len(self._compact) if self._compact is not None else len(self._list)
+
+    def page(self, start, stop):
+        """Addresses of the rows ``start:stop``"""
+        if self._compact is None:
+            return self._list[start:stop]
+        block = self._compact.address_block(start, stop)[0]
+        return block.decode('utf-8', errors='replace').split('\n')[:-1]
+
+    def search(self, text, progress=None):
+        """Rows whose address contains ``text`` (ASCII case ignored), as an index array"""
+        total = len(self)
+        if not text:
+            return np.arange(total, dtype=np.int64)
+
+        found = []
+        if self._compact is None:
+            needle = text.lower()
+            for start in range(0, total, SEARCH_BLOCK):
+                rows = [row for row, email in enumerate(self._list[start:start + SEARCH_BLOCK], start)
+                        if needle in email.lower()]
+                found.append(np.array(rows, dtype=np.int64))
+                if progress is not None:
+                    progress(int(min(start + SEARCH_BLOCK, total) * 100 / total))
+        else:
+            pattern = re.compile(re.escape(text.encode('utf-8').lower()))
+            for start in range(0, total, SEARCH_BLOCK):
+                block, line_starts, _ = self._compact.address_block(start, start + SEARCH_BLOCK)
+                hits = np.fromiter((match.start() for match in pattern.finditer(block.lower())), dtype=np.int64)
+                if len(hits):
+                    # Every hit lies on the line that starts last before it
+                    found.append(np.unique(np.searchsorted(line_starts, hits, side='right') - 1) + start)
+                if progress is not None:
+                    progress(int(min(start + SEARCH_BLOCK, total) * 100 / total))
+        if progress is not None:
+            progress(100)
+        return np.concatenate(found) if found else np.zeros(0, dtype=np.int64)
@@ -0,0 +1,268 @@
+"""Domain, wildcard and local-part suppression rules.
+
+Besides exact addresses, the unwanted lists and the pasted text may hold
+rule lines:
+
+``@example.com``        every address at example.com
+``*.gov``               every address at a subdomain of gov (``@*.gov`` too)
+``abuse@*``             local part ``abuse`` at any domain
+``noreply*@*``          local parts starting with ``noreply`` at any domain
+``sales*@example.com``  a local part pattern at one domain (or ``*.suffix``)
+
+``*`` matches any run of characters in a local part; in a domain it is only
+allowed as the whole domain or as a leading ``*.`` label. Rules match the
+(normalised) keys case-insensitively.
+
+A ``RuleSet`` compiles its rules once, so every address is checked in about
+constant time however many rules there are: whole-domain rules become a set
+of domains and a set of domain suffixes (one lookup per label of the
+address's domain), local parts become a set of exact names plus one combined
+regex, and the verdict for a domain is cached.
+
+``mask`` works on a whole ``CompactEmailSet`` block by block: the domains
+and local parts of a block are located and hashed with NumPy, each distinct
+domain is judged once, exact local parts are looked up by hash and the
+local part regex runs once over the block. Only the resulting candidates
+are checked address by address.
+"""
+
+import re
+from functools import lru_cache
+
+import numpy as np
+
+from . import core
+from .store import CompactEmailSet, hash64, hash_many
+
+# Number of distinct domains whose verdict is cached per rule set
+DOMAIN_CACHE = 65536
+
+# Entries of a compact set matched per block by ``RuleSet.mask``
+RULE_BLOCK = 1 << 18
+
+# Lines starting (after quotes or brackets) with "@" in a block of text
+_AT_LINE = re.compile(r'^[ \t"\'<]*@', re.MULTILINE)
+
+
+def is_rule(text):
+    """True when a line of an unwanted list is a rule rather than an address"""
+    return text.startswith('@') or '*' in text
+
+
+def parse_rule(text):
+    """Split a rule into ``(local_pattern, domain_pattern)``, both lowercase
+
+    Raises ``ValueError`` for malformed rules and for rules that would match
+    every address.
+    """
+    rule = text.strip().lower()
+    local, at, domain = rule.rpartition('@')
+    if not at:
+        local, domain = '*', rule
+    local = local or '*'
+    suffix = domain[2:] if domain.startswith('*.') else domain
+    if domain != '*' and (not suffix or '*' in suffix):
+        raise ValueError(f"Unsupported domain pattern in rule: {text}")
+    if local.strip('*') == '' and domain == '*':
+        raise ValueError(f"Rule matches every address: {text}")
+    return local, domain
+
+
+def _glob_regex(glob):
+    return '.*'.join(map(re.escape, glob.split('*')))
+
+
+def _pattern(globs):
+    """One compiled regex matching any of the local part ``globs``"""
+    return re.compile('|'.join(map(_glob_regex, sorted(globs))))
+
+
+class RuleSet:
+    """Compiled suppression rules"""
+
+    def __init__(self, rules=()):
+        parsed = {}
+        for rule in rules:
+            parsed.setdefault(parse_rule(rule), rule.strip())
+        self.rules = tuple(sorted(parsed.values()))
+
+        # Whole domains and domain suffixes, for rules with any local part
+        self._domains = set()
+        self._suffixes = set()
+        # Local part rules at any domain: exact names and one regex
+        self._locals = set()
+        local_globs = set()
+        # Domain pattern -> local part globs restricted to it
+        scoped = {}
+        for local, domain in parsed:
+            if local.strip('*') == '':
+                if domain.startswith('*.'):
+                    self._suffixes.add(domain[2:])
+                else:
+                    self._domains.add(domain)
+            elif domain == '*':
+                if '*' in local:
+                    local_globs.add(local)
+                else:
+                    self._locals.add(local)
+            else:
+                scoped.setdefault(domain, set()).add(local)
+        self._local_pattern = _pattern(local_globs) if local_globs else None
+        # The same globs anchored at the start of the lines of a key block
+        self._line_pattern = None
+        if local_globs:
+            alternatives = '|'.join(map(_glob_regex, sorted(local_globs)))
+            self._line_pattern = re.compile(f"^(?:{alternatives})@".encode('utf-8'), re.MULTILINE)
+        self._local_hashes = np.array(sorted(hash64(local.encode('utf-8')) for local in self._locals),
+                                      dtype=np.uint64)
+        self._scoped = {domain: _pattern(globs) for domain, globs in scoped.items()}
+        self._verdict = lru_cache(maxsize=DOMAIN_CACHE)(self._domain_verdict)
+
+    def __len__(self):
+        return len(self.rules)
+
+    def __eq__(self, other):
+        return isinstance(other, RuleSet) and self.rules == other.rules
+
+    def __hash__(self):
+        return hash(self.rules)
+
+    def __repr__(self):
+        return f"<RuleSet of {len(self.rules)} rules>"
+
+    def __reduce__(self):
+        # Compiled again in worker processes (the domain cache does not pickle)
+        return RuleSet, (self.rules,)
+
+    def _domain_verdict(self, domain):
+        """``True`` when the whole domain is suppressed, else the local part patterns scoped to it"""
+        if domain in self._domains:
+            return True
+        labels = domain.split('.')
+        suffixes = ['.'.join(labels[i:]) for i in range(1, len(labels))]
+        if any(suffix in self._suffixes for suffix in suffixes):
+            return True
+        if not self._scoped:
+            return ()
+        return tuple(self._scoped[pattern] for pattern in [domain] + ['*.' + suffix for suffix in suffixes]
+                     if pattern in self._scoped)
+
+    def matches(self, key):
+        """True when an address (its matching key) is suppressed by a rule"""
+        local, at, domain = key.rpartition('@')
+        if not at:
+            return False
+        verdict = self._verdict(domain.lower())
+        if verdict is True:
+            return True
+        local = local.lower()
+        if local in self._locals:
+            return True
+        if self._local_pattern is not None and self._local_pattern.fullmatch(local):
+            return True
+        return any(pattern.fullmatch(local) for pattern in verdict)
+
+    def _candidates(self, block, line_starts, line_ends):
+        """Lines of a key block that may match a rule (a superset, confirmed by ``matches``)"""
+        candidates = np.zeros(len(line_starts), dtype=bool)
+        block = block.lower()
+        buffer = np.frombuffer(block, dtype=np.uint8)
+        ats = np.flatnonzero(buffer == ord('@'))
+        if not len(ats):
+            return candidates
+        # Last "@" of every line that has one
+        last = np.searchsorted(ats, line_ends) - 1
+        at = ats[np.maximum(last, 0)]
+        rows = np.flatnonzero((last >= 0) & (at >= line_starts))
+        at = at[rows]
+
+        if self._domains or self._suffixes or self._scoped:
+            # Judge every distinct domain of the block once
+            domain_hashes = hash_many(block, at + 1, line_ends[rows] - at - 1)
+            _, first, inverse = np.unique(domain_hashes, return_index=True, return_inverse=True)
+            hits = np.fromiter((self._verdict(block[start:end].decode('utf-8')) != ()
+                                for start, end in zip((at[first] + 1).tolist(), line_ends[rows[first]].tolist())),
+                               dtype=bool, count=len(first))
+            candidates[rows[hits[inverse]]] = True
+        if self._locals:
+            local_hashes = hash_many(block, line_starts[rows], at - line_starts[rows])
+            candidates[rows[np.isin(local_hashes, self._local_hashes)]] = True
+        if self._line_pattern is not None:
+            matched = [match.start() for match in self._line_pattern.finditer(block)]
+            candidates[np.searchsorted(line_starts, matched, side='right') - 1] = True
+        return candidates
+
+    def mask(self, emails, progress=None):
+        """Boolean mask over a ``CompactEmailSet`` of the entries suppressed by a rule"""
+        mask = np.zeros(len(emails), dtype=bool)
+        for block in range(0, len(emails), RULE_BLOCK):
+            keys, line_starts, line_ends = emails.key_block(block, block + RULE_BLOCK)
+            rows = np.flatnonzero(self._candidates(keys, line_starts, line_ends))
+            confirmed = [self.matches(keys[start:end].decode('utf-8'))
+                         for start, end in zip(line_starts[rows].tolist(), line_ends[rows].tolist())]
+            mask[block + rows[np.array(confirmed, dtype=bool)]] = True
+            if progress is not None:
+                progress(min(block + RULE_BLOCK, len(emails)) * 100 // len(emails))
+        return mask
+
+    def apply(self, emails, normalizer=None, progress=None):
+        """``emails`` without the addresses suppressed by a rule"""
+        if not self.rules:
+            return emails
+        if isinstance(emails, CompactEmailSet):
+            return emails.select(~self.mask(emails, progress))
+        key = normalizer if normalizer is not None else str
+        return {email for email in emails if not self.matches(key(email))}
+
+    def matching(self, emails, normalizer=None):
+        """The addresses of ``emails`` suppressed by a rule"""
+        if not self.rules:
+            return set()
+        if isinstance(emails, CompactEmailSet):
+            return set(emails.select(self.mask(emails)))
+        key = normalizer if normalizer is not None else str
+        return {email for email in emails if self.matches(key(email))}
+
+
+def rule_lines(emails, normalizer=None):
+    """The rule lines (as keys) among a loaded list or an iterable of lines"""
+    if not isinstance(emails, CompactEmailSet):
+        keys = map(normalizer, emails) if normalizer is not None else emails
+        return [key for key in keys if is_rule(key)]
+    if not len(emails):
+        return []
+
+    # Only entries starting with "@" (or a quote/bracket) or holding a "*"
+    # can be rules; find them in the raw buffer before decoding anything
+    buffer = np.frombuffer(emails._data, dtype=np.uint8)
+    starts = emails._starts.astype(np.int64)
+    candidates = np.isin(buffer[starts], np.frombuffer(b'@"\'<', dtype=np.uint8))
+    if emails._data.find(b'*') >= 0:
+        order = np.argsort(starts, kind='stable')
+        ends = starts[order] + emails._lengths[order].astype(np.int64)
+        for block in range(0, len(buffer), core.CHUNK_SIZE * 64):
+            stars = np.flatnonzero(buffer[block:block + core.CHUNK_SIZE * 64] == ord('*')) + block
+            entries = np.searchsorted(starts[order], stars, side='right') - 1
+            inside = (entries >= 0) & (stars < ends[np.maximum(entries, 0)])
+            candidates[order[entries[inside]]] = True
+    return [key for key in emails.keys_at(np.flatnonzero(candidates)) if is_rule(key)]
+
+
+def read_rule_lines(file_path, normalizer=None):
+    """The rule lines of a one-per-line file, skipping blocks that cannot hold any"""
+    lines = []
+    for block in core._iter_blocks(file_path):
+        if '*' in block or _AT_LINE.search(block):
+            lines.extend(rule_lines(core._split_emails(block), normalizer))
+    return lines
+
+
+def from_sources(sources, normalizer=None):
+    """``RuleSet`` of the rule lines in unwanted sources (file paths, compact sets or iterables)"""
+    lines = []
+    for source in sources:
+        if isinstance(source, str):
+            lines.extend(read_rule_lines(source, normalizer))
+        else:
+            lines.extend(rule_lines(source, normalizer))
+    return RuleSet(lines)
@@ -0,0 +1,115 @@
+"""Incremental statistics of the emails pasted next to the loaded lists.
+
+Re-counting a large paste from scratch normalises every line and looks it up
+in the unwanted list. ``PastedStats`` keeps per-line and per-key counters
+instead, so each update only normalises and looks up the lines that were
+added or removed since the previous one. Pasted rule lines (``@domain``,
+``*.tld``) are counted apart from the emails.
+"""
+
+from collections import Counter
+
+from .core import split_lines
+from .rules import is_rule
+from .store import CompactEmailSet
+
+# From this many new keys, look them up in one vectorised pass
+BATCH_LOOKUP = 1000
+
+
+def pasted_lines(text):
+    """Multiset of the non-empty stripped lines of a block of text"""
+    return Counter(line for line in map(str.strip, split_lines(text)) if line)
+
+
+class PastedStats:
+    """Counts of pasted emails, maintained line by line"""
+
+    def __init__(self, unwanted_emails=(), normalizer=None):
+        self.unwanted_emails = unwanted_emails
+        self.normalizer = normalizer
+        self._text = ''
+        self._lines = Counter()
+        self._keys = Counter()
+        self._rules = Counter()
+        # Distinct pasted email keys that are not already in ``unwanted_emails``
+        self.extra_count = 0
+
+    @property
+    def pasted_count(self):
+        """Number of distinct pasted emails (after normalization), rules left out"""
+        return len(self._keys)
+
+    @property
+    def rule_count(self):
+        """Number of distinct pasted rule lines"""
+        return len(self._rules)
+
+    def _key(self, line):
+        return self.normalizer(line) if self.normalizer is not None else line
+
+    def _unwanted_among(self, keys):
+        """The ``keys`` that are in the unwanted list"""
+        if isinstance(self.unwanted_emails, CompactEmailSet) and len(keys) >= BATCH_LOOKUP:
+            # Keys are already normalised, so the probe set needs no normalizer
+            return set(CompactEmailSet(keys).intersection(self.unwanted_emails))
+        return {key for key in keys if key in self.unwanted_emails}
+
+    def _changed_lines(self, text):
+        """``(removed, added)`` line multisets between the previous text and ``text``"""
+        previous = self._text
+        cut = previous.rfind('\n') + 1
+        if text.startswith(previous[:cut]):
+            # Typing or pasting at the end: only the lines after the unchanged part can differ
+            old, new = pasted_lines(previous[cut:]), pasted_lines(text[cut:])
+        else:
+            old, new = self._lines, pasted_lines(text)
+        return old - new, new - old
+
+    def update(self, text):
+        """Bring the counts up to date with the current text; returns the number of changed lines"""
+        removed, added = self._changed_lines(text)
+        if len(removed) > len(self._lines) // 2:
+            # Most of the paste was replaced: counting the new text afresh is cheaper
+            self._lines, self._keys, self._rules, self.extra_count = Counter(), Counter(), Counter(), 0
+            removed, added = Counter(), pasted_lines(text)
+
+        removed_keys = {}
+        for line, times in removed.items():
+            key = self._key(line)
+            if is_rule(key):
+                self._rules.subtract({key: times})
+            else:
+                removed_keys[key] = removed_keys.get(key, 0) + times
+        added_keys = {}
+        for line, times in added.items():
+            key = self._key(line)
+            if is_rule(key):
+                self._rules[key] += times
+            else:
+                added_keys[key] = added_keys.get(key, 0) + times
+        self._rules = +self._rules
+
+        # Keys whose presence in the paste may flip, looked up together
+        vanishing = [key for key, times in removed_keys.items()
+                     if self._keys[key] - times + added_keys.get(key, 0) <= 0]
+        appearing = [key for key in added_keys if key not in self._keys]
+        unwanted = self._unwanted_among(vanishing + appearing)
+
+        for key, times in removed_keys.items():
+            self._keys[key] -= times
+        for key, times in added_keys.items():
+            self._keys[key] += times
+        self.extra_count -= sum(1 for key in vanishing if key not in unwanted)
+        self.extra_count += sum(1 for key in appearing if key not in unwanted)
+        for key in vanishing:
+            del self._keys[key]
+
+        for line, times in removed.items():
+            if self._lines[line] > times:
+                self._lines[line] -= times
+            else:
+                del self._lines[line]
+        self._lines.update(added)
+        self._text = text
+        return sum(removed.values()) + sum(added.values())
@@ -0,0 +1,885 @@
+"""Compact, array-backed email set.
+
+A Python ``set`` of ``str`` costs well over 100 bytes per address once the
+string object and hash table slot are counted. ``CompactEmailSet`` keeps the
+UTF-8 bytes of every address in one contiguous buffer and describes them with
+three NumPy arrays sorted by a stable 64-bit hash:
+
+* ``hashes``  - stable 64-bit hash of each address (uint64)
+* ``starts``  - offset of the address in the buffer (uint32, or uint64 for
+  buffers over 4 GB)
+* ``lengths`` - byte length of the address (uint8, uint16 when one is
+  longer than 255 bytes, uint32 for odd lines longer than 64 KB)
+
+That is 13 bytes of bookkeeping plus the address itself, against roughly
+110 bytes for a ``set`` entry. Sets derived with ``-`` or ``&`` share the
+buffer of the set they came from, so a result only costs its arrays. Every hash match is confirmed by comparing the two
+keys byte for byte, 8 bytes at a time with NumPy for all the matches of a
+block at once; keys are only normalised for addresses written differently.
+Only a genuine collision, where the key may be a later entry with the same
+hash, is looked up one by one.
+
+The buffer is filled in input order and duplicates keep their first
+occurrence, so sorting the entries by ``starts`` gives the original input
+order back. Sets loaded from a file with ``numbered=True`` also keep the
+first-seen line number of every address (uint32, uint64 past 4G lines) in a
+fourth array, for the removed-lines report.
+
+With a ``Normalizer`` the hashes and comparisons use the normalised keys
+while the buffer keeps the addresses as written, so iterating (and thus
+exporting) yields the original form of the first occurrence of each key.
+Sets combined with each other must use the same normalisation rules.
+
+``from_file`` parses without creating a ``str`` per line: the file is
+memory-mapped (compressed files are decompressed into memory), newlines are located with NumPy block by block, lines are
+stripped by looking at their first and last bytes, and the hashes are
+computed straight from the bytes. Only lines with non-ASCII bytes are
+decoded (to validate them and strip Unicode spaces), and only lines the
+normalizer could change are normalised. The set then copies only its
+unique, stripped addresses out of the mapping and closes it. Addresses are
+decoded to ``str`` when they are iterated, i.e. for the ones that reach the
+output.
+"""
+
+import mmap
+import os
+from array import array
+
+import numpy as np
+
+from . import compress, core
+from .metrics import phase as timed
+
+# Number of addresses decoded per block while iterating
+_ITER_BLOCK = 65536
+
+# Number of entries matched per block by difference / intersection
+MASK_BLOCK = 1 << 20
+
+# Hash matches whose keys are compared per step
+_COMPARE_BLOCK = 65536
+
+# Hashes looked up per binary search; each search is narrowed to the part
+# of the other set's hashes that the window spans, which stays in cache
+_SEARCH_WINDOW = 4096
+
+# Bytes ``str.strip`` removes from the ends of an ASCII line
+_ASCII_SPACE = np.zeros(256, dtype=bool)
+_ASCII_SPACE[np.frombuffer(b' \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f', dtype=np.uint8)] = True
+
+# Spaces trimmed per line end with NumPy; longer runs are stripped as ``str``
+_TRIM_ROUNDS = 4
+
+
+def _smallest(values, small, large, limit):
+    """Cast ``values`` to the ``small`` dtype when they all fit below ``limit``"""
+    if not len(values) or int(values.max()) < limit:
+        return values.astype(small)
+    return values.astype(large)
+
+
+def _lengths_of(lengths):
+    """Address lengths as uint8 when they all fit, else uint16 or uint32"""
+    if not len(lengths) or int(lengths.max()) < 2 ** 8:
+        return lengths.astype(np.uint8)
+    return _smallest(lengths, np.uint16, np.uint32, 2 ** 16)
+
+
+# 64-bit FNV-1a parameters, followed by the murmur3 finaliser for avalanche
+_FNV_OFFSET = 0xcbf29ce484222325
+_FNV_PRIME = 0x100000001b3
+_MASK64 = (1 << 64) - 1
+
+# Only the first bytes of an address feed the hashes (plus its full length)
+HASH_PREFIX = 256
+
+
+def hash64(data):
+    """Stable 64-bit hash of one encoded address (same value as ``hash_many``)"""
+    h = _FNV_OFFSET
+    for byte in data[:HASH_PREFIX]:
+        h = ((h ^ byte) * _FNV_PRIME) & _MASK64
+    h ^= len(data)
+    h ^= h >> 33
+    h = (h * 0xff51afd7ed558ccd) & _MASK64
+    h ^= h >> 33
+    h = (h * 0xc4ceb9fe1a85ec53) & _MASK64
+    h ^= h >> 33
+    return h
+
+
+def hash_many(data, starts, lengths):
+    """Hash every address of a buffer at once, one vectorised step per byte position
+
+    ``data`` holds the encoded addresses, ``starts`` and ``lengths`` locate
+    them. Returns a uint64 array in the same order.
+    """
+    buffer = np.frombuffer(data, dtype=np.uint8)
+    full_lengths = np.asarray(lengths, dtype=np.uint64)
+    prefix = np.minimum(np.asarray(lengths, dtype=np.int64), HASH_PREFIX)
+
+    # Longest addresses first, so the ones still being hashed at byte k are
+    # always a prefix of the arrays
+    order = np.argsort(-prefix, kind='stable')
+    positions = np.asarray(starts, dtype=np.int64)[order]
+    remaining = np.searchsorted(-prefix[order], -np.arange(1, HASH_PREFIX + 1), side='right')
+
+    hashes = np.full(len(order), _FNV_OFFSET, dtype=np.uint64)
+    prime = np.uint64(_FNV_PRIME)
+    for k, count in enumerate(remaining.tolist()):
+        if not count:
+            break
+        active = hashes[:count]
+        active ^= buffer[positions[:count] + k]
+        active *= prime
+
+    result = np.empty_like(hashes)
+    result[order] = hashes
+    result ^= full_lengths
+    shift = np.uint64(33)
+    result ^= result >> shift
+    result *= np.uint64(0xff51afd7ed558ccd)
+    result ^= result >> shift
+    result *= np.uint64(0xc4ceb9fe1a85ec53)
+    result ^= result >> shift
+    return result
+
+
+def _map_file(file_path):
+    """Memory-map a file read-only (``b''`` for an empty file)"""
+    with open(file_path, 'rb') as f:
+        if not os.fstat(f.fileno()).st_size:
+            return b''
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def scan_lines(data, chunk_size=core.CHUNK_SIZE, progress=None):
+    """Locate the stripped, non-empty lines of a buffer without decoding it
+
+    Returns ``(starts, lengths, line_numbers)`` arrays; lines end in
+    ``\\n``, ``\\r\\n`` or a lone ``\\r`` and line numbers are 1-based, as in
+    ``core.iter_numbered_emails``. Lines holding non-ASCII bytes are decoded
+    one by one, which validates them as UTF-8 and strips Unicode spaces like
+    ``str.strip`` does.
+    """
+    buffer = np.frombuffer(data, dtype=np.uint8)
+    size = len(buffer)
+    all_starts, all_lengths, all_numbers = [], [], []
+    lines_before = 0
+    begin = 0
+    view = buffer
+    while begin < size:
+        # Blocks end on a line boundary, never between the \r and \n of a CRLF
+        limit = min(begin + chunk_size, size)
+        end = max(data.rfind(b'\n', begin, limit), data.rfind(b'\r', begin, limit)) + 1
+        if end <= begin:
+            ends = [found + 1 for found in (data.find(b'\n', begin), data.find(b'\r', begin)) if found >= 0]
+            end = min(ends) if ends else size
+        if end < size and data[end - 1:end + 1] == b'\r\n':
+            end += 1
+        view = buffer[begin:end]
+        breaks = view == ord('\n')
+        if data.find(b'\r', begin, end) >= 0:
+            # A lone \r ends a line; the \r of a CRLF is trimmed as a space below
+            breaks |= (view == ord('\r')) & np.append(view[1:] != ord('\n'), True)
+        newlines = np.flatnonzero(breaks)
+        starts = np.concatenate(([0], newlines + 1))
+        ends = np.append(newlines, len(view))
+        if starts[-1] == len(view):
+            starts, ends = starts[:-1], ends[:-1]
+        numbers = np.arange(lines_before + 1, lines_before + 1 + len(starts), dtype=np.uint64)
+        lines_before += len(newlines)
+
+        # Lines with non-ASCII bytes are stripped as ``str`` below
+        slow = np.zeros(len(starts), dtype=bool)
+        slow[np.searchsorted(starts, np.flatnonzero(view >= 0x80), side='right') - 1] = True
+
+        # Trim ASCII spaces (e.g. the \r of CRLF files) one byte per round
+        lengths = ends - starts
+        last_index = len(view) - 1
+        for _ in range(_TRIM_ROUNDS):
+            trim = (lengths > 0) & _ASCII_SPACE[view[np.maximum(starts + lengths - 1, 0)]]
+            if not trim.any():
+                break
+            lengths -= trim
+        for _ in range(_TRIM_ROUNDS):
+            trim = (lengths > 0) & _ASCII_SPACE[view[np.minimum(starts, last_index)]]
+            if not trim.any():
+                break
+            starts += trim
+            lengths -= trim
+        slow |= (lengths > 0) & (_ASCII_SPACE[view[np.maximum(starts + lengths - 1, 0)]]
+                                 | _ASCII_SPACE[view[np.minimum(starts, last_index)]])
+
+        keep = lengths > 0
+        for i in np.flatnonzero(slow & keep).tolist():
+            start = int(starts[i])
+            text = bytes(view[start:start + int(lengths[i])]).decode('utf-8')
+            stripped = text.strip()
+            if stripped:
+                starts[i] = start + len(text[:len(text) - len(text.lstrip())].encode('utf-8'))
+                lengths[i] = len(stripped.encode('utf-8'))
+            else:
+                keep[i] = False
+
+        all_starts.append(starts[keep] + begin)
+        all_lengths.append(lengths[keep])
+        all_numbers.append(numbers[keep])
+        begin = end
+        if progress is not None:
+            progress(begin * 100 // size)
+    del buffer, view
+
+    if not all_starts:
+        return np.zeros(0, dtype=np.uint64), np.zeros(0, dtype=np.uint32), np.zeros(0, dtype=np.uint64)
+    return (np.concatenate(all_starts).astype(np.uint64), np.concatenate(all_lengths).astype(np.uint32),
+            np.concatenate(all_numbers))
+
+
+def _record_line_numbers(numbered_emails, line_numbers):
+    """Yield the emails of ``(line_number, email)`` pairs, appending the numbers"""
+    append = line_numbers.append
+    for line_number, email in numbered_emails:
+        append(line_number)
+        yield email
+
+
+def _search_sorted(haystack, needles):
+    """``np.searchsorted(haystack, needles)``, window by window
+
+    Each window is searched in the part of ``haystack`` between its
+    smallest and largest needle, which is small when the needles are sorted.
+    """
+    found = np.empty(len(needles), dtype=np.intp)
+    for window in range(0, len(needles), _SEARCH_WINDOW):
+        values = needles[window:window + _SEARCH_WINDOW]
+        low = int(np.searchsorted(haystack, values.min()))
+        high = int(np.searchsorted(haystack, values.max(), side='right'))
+        found[window:window + _SEARCH_WINDOW] = np.searchsorted(haystack[low:high], values) + low
+    return found
+
+
+def _words(data):
+    """The 8 byte word starting at every byte offset of ``data``, as an unaligned uint64 view"""
+    return np.ndarray((max(len(data) - 7, 0),), dtype='<u8', buffer=data, strides=(1,))
+
+
+def _equal_spans(left, left_starts, right, right_starts, lengths):
+    """Boolean mask of the spans of ``lengths`` bytes that are equal in the buffers ``left`` and ``right``
+
+    Spans are compared 8 bytes at a time; the last word of a span is the
+    one ending with it, so no word reaches past the span. Spans shorter
+    than a word are compared byte by byte.
+    """
+    left_starts = np.asarray(left_starts, dtype=np.int64)
+    right_starts = np.asarray(right_starts, dtype=np.int64)
+    equal = np.ones(len(lengths), dtype=bool)
+
+    left_words, right_words = _words(left), _words(right)
+    long = np.flatnonzero(lengths >= 8)
+    if len(long):
+        # Shortest spans first (a radix sort of the narrow lengths), so the
+        # ones with a word k besides the last are a suffix
+        order = long[np.argsort(lengths[long], kind='stable')]
+        sorted_lengths = lengths[order]
+        ends = sorted_lengths.astype(np.int64) - 8
+        equal[order] = left_words[left_starts[order] + ends] == right_words[right_starts[order] + ends]
+        firsts = np.searchsorted(sorted_lengths, np.arange(9, int(sorted_lengths[-1]) + 1, 8))
+        for k, first in enumerate(firsts.tolist()):
+            rows = order[first:]
+            equal[rows] &= left_words[left_starts[rows] + 8 * k] == right_words[right_starts[rows] + 8 * k]
+
+    short = np.flatnonzero(lengths < 8)
+    if len(short):
+        left_bytes = np.frombuffer(left, dtype=np.uint8)
+        right_bytes = np.frombuffer(right, dtype=np.uint8)
+        for k in range(7):
+            rows = short[lengths[short] > k]
+            if not len(rows):
+                break
+            equal[rows] &= left_bytes[left_starts[rows] + k] == right_bytes[right_starts[rows] + k]
+    return equal
+
+
+def _same_keys(left, left_rows, right, right_rows):
+    """Boolean mask of the pairs of entries whose matching keys are equal, byte for byte
+
+    ``left_rows`` of the set ``left`` are compared with ``right_rows`` of
+    ``right``. Addresses written the same way have the same key, so the
+    buffers are compared first; only pairs written differently are
+    normalised, a block of pairs at a time.
+    """
+    lengths = left._lengths[left_rows]
+    same = lengths == right._lengths[right_rows]
+    same[same] = _equal_spans(left._data, left._starts[left_rows[same]], right._data,
+                              right._starts[right_rows[same]], lengths[same])
+    if left._normalizer is None and right._normalizer is None:
+        return same
+
+    rest = np.flatnonzero(~same) if left._normalizer == right._normalizer else np.arange(len(same))
+    for block in range(0, len(rest), _COMPARE_BLOCK):
+        pairs = rest[block:block + _COMPARE_BLOCK]
+        left_keys, left_starts, left_ends = left._keys_of(left_rows[pairs])
+        right_keys, right_starts, right_ends = right._keys_of(right_rows[pairs])
+        key_lengths = left_ends - left_starts
+        equal = key_lengths == right_ends - right_starts
+        equal[equal] = _equal_spans(left_keys, left_starts[equal], right_keys, right_starts[equal],
+                                    key_lengths[equal])
+        same[pairs] = equal
+    return same
+
+
+class CompactEmailSet:
+    """Immutable set of emails stored in one bytes buffer plus sorted hash arrays"""
+
+    __slots__ = ('_data', '_hashes', '_starts', '_lengths', '_line_numbers', '_normalizer')
+
+    def __init__(self, emails=(), normalizer=None, numbered=False):
+        """Build from an iterable of emails, or of ``(line_number, email)`` pairs when ``numbered``"""
+        data = bytearray()
+        starts = array('Q')
+        lengths = array('I')
+        line_numbers = array('Q') if numbered else None
+        self._normalizer = normalizer
+        if numbered:
+            emails = _record_line_numbers(emails, line_numbers)
+
+        if normalizer is None:
+            for email in emails:
+                encoded = email.encode('utf-8')
+                starts.append(len(data))
+                lengths.append(len(encoded))
+                data += encoded
+            keys, key_starts, key_lengths = None, starts, lengths
+        else:
+            # Normalise in the same pass; the keys only live until hashed
+            keys = bytearray()
+            key_starts = array('Q')
+            key_lengths = array('I')
+            for email in emails:
+                encoded = email.encode('utf-8')
+                starts.append(len(data))
+                lengths.append(len(encoded))
+                data += encoded
+                key = normalizer(email).encode('utf-8')
+                key_starts.append(len(keys))
+                key_lengths.append(len(key))
+                keys += key
+
+        self._data = bytes(data)
+        del data
+        starts = np.array(starts, dtype=np.uint64)
+        lengths = np.array(lengths, dtype=np.uint32)
+        if keys is None:
+            hashes = hash_many(self._data, starts, lengths)
+        else:
+            hashes = hash_many(bytes(keys), np.array(key_starts, dtype=np.uint64),
+                               np.array(key_lengths, dtype=np.uint32))
+            del keys, key_starts, key_lengths
+        if line_numbers is not None:
+            line_numbers = np.array(line_numbers, dtype=np.uint64)
+        self._assign(hashes, starts, lengths, line_numbers)
+
+    def _assign(self, hashes, starts, lengths, line_numbers=None):
+        """Sort the entries of ``self._data`` by hash and drop the duplicates"""
+        order = np.argsort(hashes, kind='stable')
+        self._hashes = hashes[order]
+        self._starts = _smallest(starts[order], np.uint32, np.uint64, 2 ** 32)
+        self._lengths = _lengths_of(lengths[order])
+        self._line_numbers = None
+        if line_numbers is not None:
+            self._line_numbers = _smallest(line_numbers[order], np.uint32, np.uint64, 2 ** 32)
+        self._drop_duplicates()
+
+    @classmethod
+    def from_file(cls, file_path, chunk_size=core.CHUNK_SIZE, progress=None, normalizer=None, metrics=None,
+                  numbered=False):
+        """Load a one-per-line email file straight into a compact set
+
+        With ``numbered`` the first-seen line number of every address is
+        kept too. ``metrics`` (a ``metrics.Metrics``) receives the bytes read
+        and the time spent reading, parsing, normalising, hashing and
+        de-duplicating.
+        """
+        if compress.codec_of(file_path) is not None:
+            # Decompressed straight into the buffer the set keeps
+            read_progress = None if progress is None else (lambda p: progress(p * 80 // 100))
+            with timed(metrics, 'io_wait'):
+                data = compress.read_all(file_path, chunk_size, read_progress)
+            scan_progress = None if progress is None else (lambda p: progress(80 + p // 5))
+        else:
+            # Parsed straight from the mapping, see the copy below
+            data = _map_file(file_path)
+            scan_progress = progress
+        with timed(metrics, 'parse'):
+            starts, lengths, line_numbers = scan_lines(data, chunk_size, scan_progress)
+        if metrics is not None:
+            metrics.count('bytes_read', os.path.getsize(file_path))
+        store = cls.from_lines(data, starts, lengths, line_numbers if numbered else None, normalizer, metrics)
+        if isinstance(data, mmap.mmap):
+            # The set keeps a copy of only the unique, stripped addresses, so
+            # the source may be overwritten (or deleted on Windows) while it lives
+            with timed(metrics, 'io_wait'):
+                store._copy_buffer()
+            data.close()
+        if progress is not None:
+            progress(100)
+        return store
+
+    @classmethod
+    def from_lines(cls, data, starts, lengths, line_numbers=None, normalizer=None, metrics=None):
+        """Compact set of the lines of ``data`` found by ``scan_lines``, keeping ``data`` as its buffer"""
+        store = cls._from_arrays(data, None, None, None, normalizer)
+        hashes = store._hash_lines(starts, lengths, metrics)
+        with timed(metrics, 'dedupe'):
+            store._assign(hashes, starts, lengths, line_numbers)
+        if metrics is not None:
+            metrics.count('lines_parsed', len(starts))
+            metrics.count('rows', len(starts))
+            metrics.count('emails', len(store))
+            metrics.count('duplicates_dropped', len(starts) - len(store))
+        return store
+
+    @classmethod
+    def view(cls, data, starts, lengths, normalizer=None):
+        """The lines of ``data`` found by ``scan_lines`` in their own order, neither sorted nor de-duplicated
+
+        A view is only meant for ``isin`` and ``RuleSet.mask``, to match the
+        lines of a stream against a set. It holds the matching keys, so hash
+        matches are confirmed without normalising the lines again.
+        """
+        if normalizer is not None:
+            lines = cls._from_arrays(data, None, starts, lengths, normalizer)
+            data, starts, ends = lines.key_block()
+            lengths = ends - starts
+        return cls._from_arrays(data, hash_many(data, starts, lengths), starts, lengths, None)
+
+    def _hash_lines(self, starts, lengths, metrics=None):
+        """Hashes of the matching keys of the stripped lines at ``starts`` / ``lengths``
+
+        ``starts`` must be ascending, as returned by ``scan_lines``.
+        """
+        if self._normalizer is None or not len(starts):
+            with timed(metrics, 'hash'):
+                return hash_many(self._data, starts, lengths)
+
+        # Lines made only of bytes the normalizer keeps are their own key.
+        # Each line is checked up to the next one's start; the bytes in
+        # between are line breaks and spaces, which never count.
+        with timed(metrics, 'normalize'):
+            unchanged = self._normalizer.unchanged_bytes()
+            changed = np.ones(len(starts), dtype=bool)
+            if unchanged is not None:
+                table = ~_ASCII_SPACE
+                table[np.frombuffer(unchanged, dtype=np.uint8)] = False
+                buffer = np.frombuffer(self._data, dtype=np.uint8)
+                for block in range(0, len(starts), MASK_BLOCK):
+                    first = int(starts[block])
+                    stop = int(starts[block + MASK_BLOCK]) if block + MASK_BLOCK < len(starts) else len(buffer)
+                    offsets = (starts[block:block + MASK_BLOCK] - np.uint64(first)).astype(np.int64)
+                    changed[block:block + MASK_BLOCK] = np.logical_or.reduceat(table[buffer[first:stop]], offsets)
+                del buffer
+            rows = np.flatnonzero(changed)
+            if len(rows):
+                data = self._data
+                keys = [self._as_key(data[start:start + length])
+                        for start, length in zip(starts[rows].tolist(), lengths[rows].tolist())]
+                key_lengths = np.fromiter(map(len, keys), dtype=np.int64, count=len(keys))
+                key_starts = np.cumsum(key_lengths) - key_lengths
+
+        with timed(metrics, 'hash'):
+            hashes = np.empty(len(starts), dtype=np.uint64)
+            hashes[~changed] = hash_many(self._data, starts[~changed], lengths[~changed])
+            if len(rows):
+                hashes[rows] = hash_many(b''.join(keys), key_starts, key_lengths)
+        return hashes
+
+    @classmethod
+    def _from_arrays(cls, data, hashes, starts, lengths, normalizer, line_numbers=None):
+        store = cls.__new__(cls)
+        store._data = data
+        store._hashes = hashes
+        store._starts = starts
+        store._lengths = lengths
+        store._line_numbers = line_numbers
+        store._normalizer = normalizer
+        return store
+
+    @property
+    def line_numbers(self):
+        """First-seen line number of every entry (1-based), or ``None`` when not tracked"""
+        return self._line_numbers
+
+    @property
+    def hashes(self):
+        """Sorted stable 64-bit hashes of the matching keys (see ``hash64``)"""
+        return self._hashes
+
+    def keys_at(self, indices):
+        """Matching keys (``str``) of the entries at ``indices``"""
+        data = self._data
+        return [self._as_key(data[start:start + length]).decode('utf-8')
+                for start, length in zip(self._starts[indices].tolist(), self._lengths[indices].tolist())]
+
+    def _gather(self, rows):
+        """Addresses of the entries ``rows`` (a slice or index array) as one newline-joined uint8 array
+
+        Returns ``(raw, line_starts, line_ends)``. The addresses are gathered
+        with NumPy, without slicing the buffer per address.
+        """
+        starts = self._starts[rows].astype(np.int64)
+        lengths = self._lengths[rows].astype(np.int64)
+        line_starts = np.cumsum(lengths + 1) - (lengths + 1)
+        line_ends = line_starts + lengths
+        if not len(starts):
+            return np.zeros(0, dtype=np.uint8), line_starts, line_ends
+        buffer = np.frombuffer(self._data, dtype=np.uint8)
+        positions = np.repeat(starts - line_starts, lengths + 1) + np.arange(int(line_ends[-1]) + 1)
+        raw = buffer[np.minimum(positions, len(buffer) - 1)]
+        raw[line_ends] = ord('\n')
+        return raw, line_starts, line_ends
+
+    def address_block(self, start=0, stop=None):
+        """Addresses of the entries ``start:stop`` as one newline-joined bytes block
+
+        Returns ``(block, line_starts, line_ends)`` like ``key_block``, with
+        the addresses as read rather than their keys.
+        """
+        raw, line_starts, line_ends = self._gather(slice(start, stop))
+        return raw.tobytes(), line_starts, line_ends
+
+    def key_block(self, start=0, stop=None):
+        """Matching keys of the entries ``start:stop`` as one newline-joined bytes block
+
+        Returns ``(block, line_starts, line_ends)``. The raw addresses are
+        gathered with NumPy; only those the normalizer could change are
+        normalised one by one.
+        """
+        return self._keys_of(slice(start, stop))
+
+    def _keys_of(self, rows):
+        """``key_block`` of the entries ``rows`` (a slice or index array)"""
+        raw, line_starts, line_ends = self._gather(rows)
+        if not len(raw):
+            return b'', line_starts, line_ends
+        if self._normalizer is None:
+            return raw.tobytes(), line_starts, line_ends
+
+        unchanged = self._normalizer.unchanged_bytes()
+        if unchanged is None:
+            plain = np.zeros(len(line_starts), dtype=bool)
+        else:
+            table = np.zeros(256, dtype=bool)
+            table[np.frombuffer(unchanged + b'\n', dtype=np.uint8)] = True
+            plain = np.logical_and.reduceat(table[raw], line_starts)
+        if plain.all():
+            return raw.tobytes(), line_starts, line_ends
+
+        raw = raw.tobytes()
+        keys = [raw[begin:end] if keep else self._as_key(raw[begin:end])
+                for begin, end, keep in zip(line_starts.tolist(), line_ends.tolist(), plain.tolist())]
+        lengths = np.fromiter(map(len, keys), dtype=np.int64, count=len(keys))
+        line_starts = np.cumsum(lengths + 1) - (lengths + 1)
+        return b'\n'.join(keys) + b'\n', line_starts, line_starts + lengths
+
+    def select(self, mask):
+        """Entries picked by a boolean mask over ``hashes``, sharing this set's buffer"""
+        return self._take(mask)
+
+    def compacted(self):
+        """Copy whose buffer holds only this set's addresses (line numbers are not kept)
+
+        Sets derived with ``-``, ``&`` or ``select`` share the buffer of the
+        set they came from; a copy lets that buffer be freed.
+        """
+        raw, line_starts, line_ends = self._gather(slice(None))
+        return self._from_arrays(raw.tobytes(), self._hashes, _smallest(line_starts, np.uint32, np.uint64, 2 ** 32),
+                                 _lengths_of(line_ends - line_starts), self._normalizer)
+
+    def _copy_buffer(self):
+        """Move the addresses into a buffer of their own, kept in input order
+
+        The buffer is an anonymous mapping filled in place, so the copy
+        never exists twice. The bytes are picked window by window with a
+        mask of the address spans instead of one slice per address.
+        """
+        order = np.argsort(self._starts, kind='stable')
+        total = int(self._lengths.sum(dtype=np.int64))
+        copy = mmap.mmap(-1, total) if total else b''
+        copy_starts = np.empty(len(order), dtype=np.int64)
+        if total:
+            source = np.frombuffer(self._data, dtype=np.uint8)
+            target = np.frombuffer(copy, dtype=np.uint8)
+            at = 0
+            for block in range(0, len(order), _ITER_BLOCK):
+                rows = order[block:block + _ITER_BLOCK]
+                starts = self._starts[rows].astype(np.int64)
+                lengths = self._lengths[rows].astype(np.int64)
+                first, last = int(starts[0]), int(starts[-1] + lengths[-1])
+                # +1 where an address starts, -1 where it ends: the running
+                # sum is 1 on the bytes to keep (addresses never touch)
+                edges = np.zeros(last - first + 1, dtype=np.int8)
+                edges[starts - first] = 1
+                edges[starts + lengths - first] -= 1
+                keep = np.cumsum(edges[:-1], dtype=np.int8).view(bool)
+                copy_starts[rows] = np.cumsum(lengths) - lengths + at
+                at += int(lengths.sum())
+                target[copy_starts[rows[0]]:at] = source[first:last][keep]
+            del source, target
+        self._data = copy
+        self._starts = _smallest(copy_starts, np.uint32, np.uint64, 2 ** 32)
+
+    def input_order_block(self):
+        """The addresses in input order as one bytes block, each followed by a line break"""
+        return self._gather(np.argsort(self._starts, kind='stable'))[0].tobytes()
+
+    @property
+    def normalizer(self):
+        """The ``Normalizer`` the keys were built with, or ``None``"""
+        return self._normalizer
+
+    def _entry(self, i):
+        start = int(self._starts[i])
+        return bytes(self._data[start:start + int(self._lengths[i])])
+
+    def _as_key(self, encoded):
+        """Matching key of an encoded address as stored in the buffer"""
+        if self._normalizer is None:
+            return encoded
+        return self._normalizer(encoded.decode('utf-8')).encode('utf-8')
+
+    def _key_of(self, email):
+        """Encoded matching key of an address given as ``str``"""
+        if self._normalizer is not None:
+            email = self._normalizer(email)
+        return email.encode('utf-8')
+
+    def _drop_duplicates(self):
+        """Remove repeated addresses (they sit next to each other after sorting)"""
+        same = np.flatnonzero(self._hashes[1:] == self._hashes[:-1]) + 1
+        if not len(same):
+            return
+
+        # Index of the first entry of the equal-hash run each entry belongs to
+        heads = np.arange(len(self._hashes))
+        heads[same] = 0
+        heads = np.maximum.accumulate(heads)[same]
+
+        keep = np.ones(len(self._hashes), dtype=bool)
+        # Same key as the first entry of the run: a repeat
+        repeat = _same_keys(self, same, self, heads)
+        keep[same[repeat]] = False
+        for i, head in zip(same[~repeat].tolist(), heads[~repeat].tolist()):
+            # Genuine hash collision in the run: compare with the others too
+            entry = self._as_key(self._entry(i))
+            if any(keep[j] and self._as_key(self._entry(j)) == entry for j in range(head + 1, i)):
+                keep[i] = False
+        self._hashes = self._hashes[keep]
+        self._starts = self._starts[keep]
+        self._lengths = self._lengths[keep]
+        if self._line_numbers is not None:
+            self._line_numbers = self._line_numbers[keep]
+
+    def _take(self, mask):
+        """New set with the selected entries, sharing this set's buffer"""
+        # Index once instead of re-scanning the mask for every array
+        mask = np.flatnonzero(mask)
+        line_numbers = self._line_numbers[mask] if self._line_numbers is not None else None
+        return self._from_arrays(self._data, self._hashes[mask], self._starts[mask], self._lengths[mask],
+                                 self._normalizer, line_numbers)
+
+    def _find(self, key, digest=None):
+        """Index of an encoded matching key, or -1"""
+        if digest is None:
+            digest = hash64(key)
+        i = int(np.searchsorted(self._hashes, np.uint64(digest)))
+        while i < len(self._hashes) and int(self._hashes[i]) == digest:
+            if self._as_key(self._entry(i)) == key:
+                return i
+            i += 1
+        return -1
+
+    def _member_mask(self, other, progress=None):
+        """Boolean mask of the entries of this set that are also in ``other``
+
+        The work is done in blocks of ``MASK_BLOCK`` entries so progress can
+        be reported on large sets.
+        """
+        if not isinstance(other, CompactEmailSet):
+            other = CompactEmailSet(other, self._normalizer)
+        mask = np.zeros(len(self), dtype=bool)
+        if not len(other):
+            if progress is not None:
+                progress(100)
+            return mask
+
+        last = len(other) - 1
+        for block in range(0, len(self), MASK_BLOCK):
+            hashes = self._hashes[block:block + MASK_BLOCK]
+            # Both hash arrays are sorted, so a binary search finds the candidates
+            found = _search_sorted(other._hashes, hashes)
+            block_mask = other._hashes[np.minimum(found, last)] == hashes
+
+            # Confirm every hash match by comparing the keys with the first
+            # entry of that hash. On a genuine collision the key may be a
+            # later entry with the same hash, so those few are looked up
+            candidates = np.flatnonzero(block_mask)
+            same = _same_keys(self, candidates + block, other, found[candidates])
+            for i in (candidates[~same] + block).tolist():
+                if other._find(self._as_key(self._entry(i)), int(self._hashes[i])) < 0:
+                    block_mask[i - block] = False
+            mask[block:block + MASK_BLOCK] = block_mask
+
+            if progress is not None:
+                progress(min(block + MASK_BLOCK, len(self)) * 100 // len(self))
+        return mask
+
+    def isin(self, other, progress=None):
+        """Boolean mask, in entry order, of the entries that are also in ``other``"""
+        return self._member_mask(other, progress)
+
+    @property
+    def nbytes(self):
+        """Approximate memory used by this set, in bytes"""
+        line_bytes = self._line_numbers.nbytes if self._line_numbers is not None else 0
+        return len(self._data) + self._hashes.nbytes + self._starts.nbytes + self._lengths.nbytes + line_bytes
+
+    def __len__(self):
+        return len(self._hashes)
+
+    def __contains__(self, email):
+        return self._find(self._key_of(email)) >= 0
+
+    def __iter__(self):
+        data = self._data
+        for block in range(0, len(self._hashes), _ITER_BLOCK):
+            starts = self._starts[block:block + _ITER_BLOCK].tolist()
+            lengths = self._lengths[block:block + _ITER_BLOCK].tolist()
+            for start, length in zip(starts, lengths):
+                yield data[start:start + length].decode('utf-8')
+
+    def in_input_order(self):
+        """Iterate the emails in the order they were first read"""
+        data = self._data
+        order = np.argsort(self._starts, kind='stable')
+        for block in range(0, len(order), _ITER_BLOCK):
+            rows = order[block:block + _ITER_BLOCK]
+            for start, length in zip(self._starts[rows].tolist(), self._lengths[rows].tolist()):
+                yield data[start:start + length].decode('utf-8')
+
+    def numbered(self):
+        """Iterate ``(line_number, email)`` pairs in input order (needs tracked line numbers)"""
+        if self._line_numbers is None:
+            raise ValueError('Line numbers were not tracked for this list')
+        data = self._data
+        order = np.argsort(self._starts, kind='stable')
+        for block in range(0, len(order), _ITER_BLOCK):
+            rows = order[block:block + _ITER_BLOCK]
+            for line_number, start, length in zip(self._line_numbers[rows].tolist(),
+                                                  self._starts[rows].tolist(), self._lengths[rows].tolist()):
+                yield line_number, data[start:start + length].decode('utf-8')
+
+    def __repr__(self):
+        return f"<CompactEmailSet of {len(self):,} emails, {self.nbytes / (1024 * 1024):.1f} MB>"
+
+    def difference(self, other, progress=None):
+        """Emails of this set that are not in ``other``"""
+        return self._take(~self._member_mask(other, progress))
+
+    def intersection(self, other, progress=None):
+        """Emails of this set that are also in ``other``"""
+        return self._take(self._member_mask(other, progress))
+
+    def union(self, other):
+        """Emails in either set"""
+        extra = other if isinstance(other, CompactEmailSet) else CompactEmailSet(other, self._normalizer)
+        extra = extra.difference(self)
+        if not len(extra):
+            return self
+        if not len(self):
+            return extra
+
+        # Append the new addresses' bytes and merge the sorted arrays
+        data = b''.join([self._data, extra._data])  # either buffer may be a memory-mapped index
+        hashes = np.concatenate([self._hashes, extra._hashes])
+        starts = np.concatenate([self._starts.astype(np.uint64),
+                                 extra._starts.astype(np.uint64) + np.uint64(len(self._data))])
+        starts = _smallest(starts, np.uint32, np.uint64, 2 ** 32)
+        lengths = np.concatenate([self._lengths.astype(np.uint32), extra._lengths.astype(np.uint32)])
+        lengths = _lengths_of(lengths)
+        order = np.argsort(hashes, kind='stable')
+        line_numbers = None
+        if self._line_numbers is not None and extra._line_numbers is not None:
+            # Numbers of the added entries refer to the other set's input
+            line_numbers = np.concatenate([self._line_numbers.astype(np.uint64),
+                                           extra._line_numbers.astype(np.uint64)])
+            line_numbers = _smallest(line_numbers[order], np.uint32, np.uint64, 2 ** 32)
+        return self._from_arrays(data, hashes[order], starts[order], lengths[order], self._normalizer,
+                                 line_numbers)
+
+    def without(self, emails):
+        """This set minus ``emails``, found by lookup (cost grows with ``emails``, not the set)"""
+        drop = [i for i in (self._find(self._key_of(email)) for email in emails) if i >= 0]
+        if not drop:
+            return self
+        keep = np.ones(len(self), dtype=bool)
+        keep[drop] = False
+        return self._take(keep)
+
+    def with_members_of(self, source, emails):
+        """This set plus the entries of ``source`` that match ``emails``
+
+        Meant for sets derived from ``source`` (e.g. ``source - unwanted``):
+        the entries are then inserted by lookup and share the buffer. Other
+        sets fall back to a regular union.
+        """
+        if source._data is not self._data:
+            return self.union(source.intersection(emails))
+        add = []
+        for email in emails:
+            key = self._key_of(email)
+            i = source._find(key)
+            if i >= 0 and self._find(key, int(source._hashes[i])) < 0:
+                add.append(i)
+        if not add:
+            return self
+        add = np.unique(np.array(add, dtype=np.int64))
+        positions = np.searchsorted(self._hashes, source._hashes[add])
+        line_numbers = None
+        if self._line_numbers is not None and source._line_numbers is not None:
+            line_numbers = np.insert(self._line_numbers, positions,
+                                     source._line_numbers[add].astype(self._line_numbers.dtype))
+        return self._from_arrays(self._data,
+                                 np.insert(self._hashes, positions, source._hashes[add]),
+                                 np.insert(self._starts, positions, source._starts[add].astype(self._starts.dtype)),
+                                 np.insert(self._lengths, positions, source._lengths[add].astype(self._lengths.dtype)),
+                                 self._normalizer, line_numbers)
+
+    def removed_in(self, derived):
+        """Entries of this set that ``derived`` (e.g. ``self - unwanted``) no longer has
+
+        Entries of a derived set share this set's buffer, so they are matched
+        by position without hashing or comparing any address.
+        """
+        if derived._data is not self._data:
+            return self.difference(derived)
+        return self._take(~np.isin(self._starts, derived._starts))
+
+    __sub__ = difference
+    __and__ = intersection
+    __or__ = union
+
+    def __rsub__(self, other):
+        return {email for email in other if email not in self}
+
+    def __rand__(self, other):
+        return {email for email in other if email in self}
+
+    def __ror__(self, other):
+        return self.union(other)
+
+
+def load_compact(file_path, chunk_size=core.CHUNK_SIZE, progress=None, normalizer=None, metrics=None,
+                 numbered=False):
+    """Load a one-per-line email file into a ``CompactEmailSet`` (with line numbers when ``numbered``)"""
+    return CompactEmailSet.from_file(file_path, chunk_size, progress, normalizer, metrics, numbered)
@@ -0,0 +1,135 @@
+"""Single-pass separation: load, separate and export the main list at once.
+
+When the unwanted list is small and the main list huge, the main list never
+has to be held in memory. ``stream_separate`` reads the main files block by
+block; every block is parsed like ``CompactEmailSet.from_file`` parses a
+file (line breaks found with NumPy, addresses hashed from the bytes), its
+repeated addresses are dropped, the rest are matched against the unwanted
+set and the rules, and the survivors are written straight to the output.
+
+Repeats across blocks are caught by a ``SeenFilter`` holding the addresses
+written so far, so memory grows with the unwanted list and the unique
+survivors only. The output is what an ``as-is`` export of the hash engine's
+result holds: every surviving address once, as first written, in input
+order.
+"""
+
+import os
+from collections import namedtuple
+
+import numpy as np
+
+from . import compress, core
+from .metrics import phase as timed
+from .store import CompactEmailSet, scan_lines
+
+# Size of the blocks the main files are read in (4 MB)
+STREAM_BLOCK = 4 * 1024 * 1024
+
+# Non-empty main list lines read, unwanted emails, emails written and bytes
+# written before compression
+StreamResult = namedtuple('StreamResult', 'row_count unwanted_count remaining_count nbytes')
+
+
+class SeenFilter:
+    """Addresses written so far, to drop their repeats exactly
+
+    The addresses are copied out of their blocks into compact sets of
+    roughly doubling size, like the levels of a log-structured merge tree:
+    adding a block merges a few small sets now and then instead of
+    rebuilding everything seen, and a lookup is one binary search per
+    level. Hash matches are confirmed like in ``CompactEmailSet``.
+    """
+
+    def __init__(self):
+        self._levels = []
+
+    def __len__(self):
+        return sum(map(len, self._levels))
+
+    @property
+    def nbytes(self):
+        """Approximate memory used by the filter, in bytes"""
+        return sum(level.nbytes for level in self._levels)
+
+    def add_new(self, emails):
+        """Entries of ``emails`` (a ``CompactEmailSet``) not seen before; they are remembered"""
+        seen = np.zeros(len(emails), dtype=bool)
+        for level in self._levels:
+            seen |= emails.isin(level)
+        if seen.any():
+            emails = emails.select(~seen)
+        if len(emails):
+            self._levels.append(emails.compacted())
+            while len(self._levels) > 1 and len(self._levels[-2]) <= 2 * len(self._levels[-1]):
+                newest = self._levels.pop()
+                self._levels[-1] = self._levels[-1].union(newest)
+        return emails
+
+
+def stream_separate(main_files, unwanted_emails, out_path, rules=None, suppression=None, normalizer=None,
+                    chunk_size=STREAM_BLOCK, progress=None, metrics=None):
+    """Write the addresses of ``main_files`` missing from ``unwanted_emails``, reading each file once
+
+    ``unwanted_emails`` is a ``CompactEmailSet`` (whose normalizer is used)
+    or a collection of emails, matched with ``normalizer``. Addresses
+    matching ``rules`` (a ``RuleSet``) or found in ``suppression`` (a
+    ``prefilter.SuppressionFilter``) are left out as well. Returns a
+    ``StreamResult``; ``metrics`` receives the counts and the time spent
+    reading, parsing, hashing, matching, de-duplicating and writing.
+    """
+    if isinstance(unwanted_emails, CompactEmailSet):
+        normalizer = unwanted_emails.normalizer
+    else:
+        unwanted_emails = CompactEmailSet(unwanted_emails, normalizer)
+    seen = SeenFilter()
+    total_size = sum(os.path.getsize(path) for path in main_files) or 1
+    done_size = 0
+    row_count = remaining_count = 0
+
+    with compress.open_output(out_path, binary=True) as out:
+        for path in main_files:
+            file_progress = None
+            if progress is not None:
+                base, span = done_size, os.path.getsize(path)
+                file_progress = (lambda p, base=base, span=span:
+                                 progress(int((base + span * p / 100) * 100 / total_size)))
+            blocks = core.iter_byte_blocks(path, chunk_size, file_progress)
+            while True:
+                with timed(metrics, 'io_wait'):
+                    block = next(blocks, None)
+                if block is None:
+                    break
+                with timed(metrics, 'parse'):
+                    starts, lengths, _ = scan_lines(block, len(block) + 1)
+                if not len(starts):
+                    continue
+                with timed(metrics, 'hash'):
+                    # Sorted by hash, repeats within the block dropped
+                    emails = CompactEmailSet.from_lines(block, starts, lengths, normalizer=normalizer)
+                with timed(metrics, 'match'):
+                    kept = emails.difference(unwanted_emails)
+                if rules:
+                    with timed(metrics, 'rules'):
+                        kept = rules.apply(kept)
+                if suppression is not None:
+                    with timed(metrics, 'prefilter'):
+                        kept = suppression.separate(kept)
+                with timed(metrics, 'dedupe'):
+                    fresh = seen.add_new(kept)
+                data = fresh.input_order_block()
+                with timed(metrics, 'io_wait'):
+                    out.write(data)
+
+                row_count += len(starts)
+                remaining_count += len(fresh)
+            done_size += os.path.getsize(path)
+
+    if metrics is not None:
+        metrics.count('bytes_read', total_size)
+        metrics.count('bytes_written', compress.bytes_written(out))
+        metrics.count('lines_parsed', row_count)
+        metrics.count_separation(row_count, len(unwanted_emails), remaining_count)
+    if progress is not None:
+        progress(100)
+    return StreamResult(row_count, len(unwanted_emails), remaining_count, compress.bytes_written(out))
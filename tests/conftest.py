@@ -0,0 +1,15 @@
+"""Fixtures shared by the tests."""
+
+import numpy as np
+import pytest
+
+from leadsievex import store
+
+
+@pytest.fixture
+def weak_hash(monkeypatch):
+    """Make the hash take only 4 values, so nearly every lookup collides"""
+    hash_many, hash64 = store.hash_many, store.hash64
+    monkeypatch.setattr(store, 'hash_many',
+                        lambda data, starts, lengths: hash_many(data, starts, lengths) & np.uint64(3))
+    monkeypatch.setattr(store, 'hash64', lambda data: hash64(data) & 3)
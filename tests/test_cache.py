@@ -0,0 +1,46 @@
+"""Binary index cache."""
+
+import os
+
+from leadsievex import cache
+
+
+def test_save_and_open_index_round_trip(tmp_path):
+    source = tmp_path / 'list.txt'
+    source.write_text('b@x.com\n a@x.com\nb@x.com\n\nc@y.org\n', encoding='utf-8')
+    cache_dir = str(tmp_path / 'cache')
+
+    emails, from_cache = cache.load(str(source), cache_dir=cache_dir)
+    assert not from_cache and emails.line_numbers is None
+    cached, from_cache = cache.load(str(source), cache_dir=cache_dir)
+    assert from_cache
+    assert list(cached.in_input_order()) == ['b@x.com', 'a@x.com', 'c@y.org']
+    assert 'a@x.com' in cached and 'z@x.com' not in cached
+    assert set(cached - emails) == set()
+
+    # An index without line numbers is rebuilt when they are asked for
+    numbered, from_cache = cache.load(str(source), cache_dir=cache_dir, numbered=True)
+    assert not from_cache
+    cached, from_cache = cache.load(str(source), cache_dir=cache_dir, numbered=True)
+    assert from_cache
+    assert list(cached.numbered()) == list(numbered.numbered()) == [(1, 'b@x.com'), (2, 'a@x.com'), (5, 'c@y.org')]
+    assert cache.load(str(source), cache_dir=cache_dir)[0].line_numbers is None
+
+
+def test_stale_fingerprint_is_rejected(tmp_path):
+    source = tmp_path / 'list.txt'
+    source.write_text('a@x.com\nb@x.com\n', encoding='utf-8')
+    cache_dir = str(tmp_path / 'cache')
+    cache.load(str(source), cache_dir=cache_dir)
+    index_file = cache.index_path(str(source), cache_dir=cache_dir)
+    assert cache.open_index(index_file, str(source)) is not None
+
+    # Same size and modification time, different content
+    stat = os.stat(source)
+    source.write_text('a@x.com\nc@x.com\n', encoding='utf-8')
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert cache.open_index(index_file, str(source)) is None
+
+    emails, from_cache = cache.load(str(source), cache_dir=cache_dir)
+    assert not from_cache
+    assert sorted(emails) == ['a@x.com', 'c@x.com']
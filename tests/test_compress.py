@@ -0,0 +1,45 @@
+"""Compressed input and output."""
+
+import importlib.util
+
+import pytest
+
+from leadsievex import compress, core
+from leadsievex.store import CompactEmailSet
+
+EMAILS = sorted(f"user{i}@example.com" for i in range(5000))
+
+# zstandard is optional
+HAS_ZSTD = importlib.util.find_spec('zstandard') is not None
+
+EXTENSIONS = ['.txt', '.txt.gz', '.txt.bz2',
+              pytest.param('.txt.zst', marks=pytest.mark.skipif(not HAS_ZSTD, reason='zstandard is not installed'))]
+
+
+@pytest.mark.parametrize('ext', EXTENSIONS)
+def test_export_and_load_round_trip(tmp_path, ext):
+    path = str(tmp_path / ('emails' + ext))
+    written = core.export_emails(EMAILS, path)
+    text_size = sum(len(email) + 1 for email in EMAILS)
+    assert written == core.WriteResult(len(EMAILS), text_size)
+    if ext != '.txt':
+        assert (tmp_path / ('emails' + ext)).stat().st_size < text_size
+
+    assert list(core.iter_emails(path, chunk_size=4096)) == EMAILS
+    assert sorted(CompactEmailSet.from_file(path)) == EMAILS
+    assert bytes(compress.read_all(path, 4096)) == ''.join(email + '\n' for email in EMAILS).encode('utf-8')
+
+
+def test_concatenated_zstd_frames_are_read_whole(tmp_path):
+    zstandard = pytest.importorskip('zstandard')
+    path = tmp_path / 'emails.txt.zst'
+    compressor = zstandard.ZstdCompressor()
+    path.write_bytes(compressor.compress(b'a@example.com\n') + compressor.compress(b'b@example.com\n'))
+    assert list(core.iter_emails(str(path))) == ['a@example.com', 'b@example.com']
+
+
+def test_split_ext_keeps_the_compression_suffix():
+    assert compress.split_ext('out/result.txt.gz') == ('out/result', '.txt.gz')
+    assert compress.split_ext('result.CSV.ZST') == ('result', '.CSV.ZST')
+    assert compress.split_ext('result.txt') == ('result', '.txt')
+    assert compress.codec_of('list.tar') is None
@@ -0,0 +1,42 @@
+"""Line splitting shared by the loaders and engines."""
+
+import pytest
+
+from leadsievex import core, engines, external, parallel, stream
+from leadsievex.store import CompactEmailSet
+
+MAIN = ['a@example.com', 'b@example.com', 'c@example.com', 'd@example.com', 'e@example.com']
+UNWANTED = ['b@example.com', 'd@example.com']
+
+
+def _write(path, lines, newline):
+    path.write_bytes(newline.join(lines).encode('utf-8') + newline.encode('utf-8'))
+    return str(path)
+
+
+@pytest.mark.parametrize('newline', ['\n', '\r\n', '\r'])
+def test_engines_agree_on_lf_crlf_and_cr_files(tmp_path, newline):
+    # A form feed inside a line does not split it, unlike ``str.splitlines``
+    main = MAIN + ['odd\x0cline@example.com']
+    main_path = _write(tmp_path / 'main.txt', main, newline)
+    unwanted_path = _write(tmp_path / 'unwanted.txt', UNWANTED, newline)
+    expected = sorted(set(main) - set(UNWANTED))
+
+    # Chunks of a few bytes end between the \r and \n of CRLF lines
+    assert list(core.iter_emails(main_path, chunk_size=7)) == main
+    assert list(core.iter_numbered_emails(main_path, chunk_size=7)) == list(enumerate(main, 1))
+    compact = CompactEmailSet.from_file(main_path, chunk_size=7, numbered=True)
+    assert list(compact.numbered()) == list(enumerate(main, 1))
+
+    unwanted = core.load_emails(unwanted_path)
+    for engine in engines.ENGINES:
+        assert sorted(engines.separate(core.load_emails(main_path), unwanted, engine)) == expected
+        assert sorted(engines.separate(compact, CompactEmailSet.from_file(unwanted_path), engine)) == expected
+
+    outputs = {name: str(tmp_path / f'{name}.txt') for name in ('external', 'parallel', 'stream')}
+    external.external_separate([main_path], [unwanted_path], outputs['external'], tmp_dir=str(tmp_path))
+    parallel.parallel_separate([main_path], [unwanted_path], outputs['parallel'], workers=1, tmp_dir=str(tmp_path))
+    stream.stream_separate([main_path], unwanted, outputs['stream'], chunk_size=7)
+    for name, path in outputs.items():
+        with open(path, encoding='utf-8', newline='\n') as f:
+            assert sorted(f.read().split('\n')[:-1]) == expected, name
@@ -0,0 +1,41 @@
+"""CSV / TSV lists."""
+
+import csv
+
+from leadsievex import delimited
+
+TABLE = (
+    'Id,Name,Email,Notes\r\n'
+    '1,"Smith, Ann",ann@x.com,plain\r\n'
+    '2,Bob,"bob@x.com","says ""hi"""\r\n'
+    '3,"Multi\nLine",carl@y.org,"first line\nsecond line"\r\n'
+    '4,Dora,"dora@y.org","a, b\n""c"""\r\n'
+    '5,Eve,,no address\r\n'
+)
+
+
+def test_filter_rows_keeps_quoted_and_multi_line_rows(tmp_path):
+    path = tmp_path / 'list.csv'
+    path.write_bytes(TABLE.encode('utf-8'))
+    out_path = tmp_path / 'out.csv'
+
+    table = delimited.resolve(str(path))
+    assert table == delimited.TableFormat(2, ',', True)
+    result = delimited.filter_rows(str(path), table, str(out_path), remove={'bob@x.com', 'dora@y.org'})
+
+    with open(out_path, newline='', encoding='utf-8') as f:
+        rows = list(csv.reader(f))
+    assert rows == [
+        ['Id', 'Name', 'Email', 'Notes'],
+        ['1', 'Smith, Ann', 'ann@x.com', 'plain'],
+        ['3', 'Multi\nLine', 'carl@y.org', 'first line\nsecond line'],
+    ]
+    assert result.written_count == 2
+    assert result.nbytes == out_path.stat().st_size
+
+
+def test_load_column_reads_quoted_fields(tmp_path):
+    path = tmp_path / 'list.csv'
+    path.write_bytes(TABLE.encode('utf-8'))
+    emails = delimited.load_column(str(path), delimited.resolve(str(path)))
+    assert sorted(emails) == ['ann@x.com', 'bob@x.com', 'carl@y.org', 'dora@y.org']
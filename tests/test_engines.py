@@ -0,0 +1,36 @@
+"""In-memory engines and incremental re-separation."""
+
+from leadsievex import engines, normalize
+from leadsievex.store import CompactEmailSet
+
+MAIN = [f"user{i}@example.com" for i in range(200)] + ['Mixed.Case@Example.com']
+BEFORE = [f"user{i}@example.com" for i in range(0, 200, 3)] + ['nobody@example.org']
+AFTER = [f"user{i}@example.com" for i in range(0, 200, 5)] + ['mixed.case@example.com']
+
+
+def _changes(before, after, normalizer=None):
+    key = normalizer if normalizer is not None else str
+    before_keys, after_keys = set(map(key, before)), set(map(key, after))
+    return sorted(after_keys - before_keys), sorted(before_keys - after_keys)
+
+
+def test_update_separation_matches_a_full_separation():
+    newly_unwanted, no_longer_unwanted = _changes(BEFORE, AFTER)
+    remaining = engines.separate(set(MAIN), set(BEFORE), 'set')
+    updated = engines.update_separation(remaining, set(MAIN), newly_unwanted, no_longer_unwanted)
+    assert updated == set(MAIN) - set(AFTER)
+
+
+def test_update_separation_of_compact_sets_uses_the_normalised_keys():
+    normalizer = normalize.make_normalizer()
+    main = CompactEmailSet(MAIN, normalizer)
+    newly_unwanted, no_longer_unwanted = _changes(BEFORE, AFTER, normalizer)
+    remaining = engines.separate(main, CompactEmailSet(BEFORE, normalizer), 'hash')
+    updated = engines.update_separation(remaining, main, newly_unwanted, no_longer_unwanted)
+
+    expected = engines.separate(main, CompactEmailSet(AFTER, normalizer), 'hash')
+    assert sorted(updated) == sorted(expected)
+    assert 'Mixed.Case@Example.com' not in set(updated)
+    # Put back and dropped again: the result is the first separation
+    restored = engines.update_separation(updated, main, no_longer_unwanted, newly_unwanted)
+    assert sorted(restored) == sorted(remaining)
@@ -0,0 +1,56 @@
+"""Out-of-core separation."""
+
+import pytest
+
+from leadsievex import core, external, jobs
+
+
+def _write(path, lines):
+    path.write_text(''.join(line + '\n' for line in lines), encoding='utf-8')
+    return str(path)
+
+
+def test_external_separate_with_many_runs_and_merge_passes(tmp_path, monkeypatch):
+    # Two runs merged at a time forces intermediate merge passes
+    monkeypatch.setattr(external, 'MAX_FAN_IN', 2)
+    main = [f"user{i}@example.com" for i in range(2000)] + [f"user{i}@example.com" for i in range(0, 2000, 7)]
+    unwanted = [f"user{i}@example.com" for i in range(0, 3000, 3)] + ['@blocked.org']
+    main += ['someone@blocked.org']
+    main_path = _write(tmp_path / 'main.txt', main)
+    unwanted_path = _write(tmp_path / 'unwanted.txt', unwanted)
+    out_path = str(tmp_path / 'out.txt')
+    max_memory = 4096
+
+    run_dir = tmp_path / 'runs'
+    run_dir.mkdir()
+    assert len(external.sort_into_runs([main_path], str(run_dir), max_memory)) > 2 * external.MAX_FAN_IN
+
+    result = external.external_separate([main_path], [unwanted_path], out_path, max_memory=max_memory,
+                                        tmp_dir=str(tmp_path))
+    expected = sorted(set(main) - set(unwanted) - {'someone@blocked.org'})
+    with open(out_path, encoding='utf-8') as f:
+        assert f.read().splitlines() == expected
+    assert result.main_count == len(set(main))
+    assert result.remaining_count == len(expected)
+    assert result.unwanted_count == len(set(unwanted))
+
+
+def test_progress_is_reported_while_merging_and_exporting(tmp_path, monkeypatch):
+    monkeypatch.setattr(core, 'WRITE_BLOCK', 100)
+    main = [f"user{i}@example.com" for i in range(1000)]
+    main_path = _write(tmp_path / 'main.txt', main)
+    unwanted_path = _write(tmp_path / 'unwanted.txt', main[:990])
+
+    # Few emails remain, so only the merge loop can notice the cancel
+    def cancel_when_merging(percent):
+        if 90 < percent < 100:
+            raise jobs.Cancelled()
+
+    with pytest.raises(jobs.Cancelled):
+        external.external_separate([main_path], [unwanted_path], str(tmp_path / 'out.txt'), tmp_dir=str(tmp_path),
+                                   progress=cancel_when_merging)
+
+    reported = []
+    external.export_sorted(main, str(tmp_path / 'sorted.txt'), tmp_dir=str(tmp_path), progress=reported.append)
+    assert [percent for percent in reported if percent < 50] == list(range(5, 50, 5))
+    assert reported[-1] == 100
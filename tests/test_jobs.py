@@ -0,0 +1,77 @@
+"""Cooperative cancel, pause and progress throttling."""
+
+import threading
+
+import pytest
+
+from leadsievex import jobs
+
+
+def test_progress_is_throttled():
+    emitted = []
+    control = jobs.JobControl(emitted.append, interval=3600)
+    for percent in (0, 10, 20, 20, 99, 100, 100):
+        control.progress(percent)
+    # The first report and 100 always pass; repeats never do
+    assert emitted == [0, 100]
+
+    emitted.clear()
+    control = jobs.JobControl(emitted.append, interval=0)
+    for percent in (5, 5, 6):
+        control.progress(percent)
+    assert emitted == [5, 6]
+
+
+def test_cancel_stops_at_the_next_report():
+    control = jobs.JobControl()
+    control.progress(10)
+    control.cancel()
+    assert control.cancelled
+    with pytest.raises(jobs.Cancelled):
+        control.progress(20)
+    with pytest.raises(jobs.Cancelled):
+        control.check()
+
+
+def test_pause_blocks_until_resumed_or_cancelled():
+    control = jobs.JobControl()
+    control.pause()
+    assert control.paused
+    started, resumed, go_on = threading.Event(), threading.Event(), threading.Event()
+    outcome = []
+
+    def work():
+        started.set()
+        try:
+            control.progress(50)
+            outcome.append('resumed')
+            resumed.set()
+            go_on.wait()
+            control.progress(60)
+            outcome.append('resumed again')
+        except jobs.Cancelled:
+            outcome.append('cancelled')
+
+    worker = threading.Thread(target=work)
+    worker.start()
+    started.wait()
+    worker.join(0.2)
+    assert worker.is_alive() and outcome == []
+    control.resume()
+    assert resumed.wait(5)
+
+    control.pause()
+    go_on.set()
+    worker.join(0.2)
+    assert worker.is_alive() and outcome == ['resumed']
+    # Cancelling wakes a paused job, which then stops
+    control.cancel()
+    worker.join(5)
+    assert not worker.is_alive() and outcome == ['resumed', 'cancelled']
+
+
+def test_remove_partial(tmp_path):
+    partial = tmp_path / 'out.txt'
+    partial.write_text('half', encoding='utf-8')
+    jobs.remove_partial(str(partial), str(tmp_path / 'missing.txt'), None)
+    assert not partial.exists()
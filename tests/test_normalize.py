@@ -0,0 +1,57 @@
+"""Email normalisation rules."""
+
+import pytest
+
+from leadsievex import normalize
+from leadsievex.store import CompactEmailSet
+
+SAMPLES = [
+    ('mailto:John@Example.COM?subject=Hi', 'john@example.com'),
+    ('"John"@Example.com', 'john@example.com'),
+    ("<'jane@example.com'>", 'jane@example.com'),
+    ('MAILTO:<Jane@Example.com>', 'jane@example.com'),
+    ('user@Bücher.example', 'user@xn--bcher-kva.example'),
+    ('J.Doe+news@GMail.com', 'j.doe+news@gmail.com'),
+    ('plain@example.com', 'plain@example.com'),
+]
+
+
+@pytest.mark.parametrize('email, key', SAMPLES)
+def test_default_rules(email, key):
+    assert normalize.make_normalizer()(email) == key
+
+
+def test_gmail_rule_folds_dots_and_tags():
+    normalizer = normalize.make_normalizer(normalize.DEFAULT_RULES + ('gmail',))
+    assert normalizer('J.Doe+news@GMail.com') == 'jdoe@gmail.com'
+    assert normalizer('j.doe@googlemail.com') == 'jdoe@gmail.com'
+    assert normalizer('j.doe+x@example.com') == 'j.doe+x@example.com'
+
+
+def test_rules_apply_only_when_enabled():
+    assert normalize.make_normalizer(('lowercase',))('"A"@B.com') == '"a"@b.com'
+    assert normalize.make_normalizer(('quotes',))('mailto:"A"@B.com') == 'mailto:A@B.com'
+    assert normalize.make_normalizer(()) is None
+
+
+def test_parse_rules():
+    assert normalize.parse_rules('default, gmail') == normalize.RULES
+    assert normalize.parse_rules('none') == ()
+    assert normalize.parse_rules('gmail,LOWERCASE') == ('lowercase', 'gmail')
+    with pytest.raises(ValueError):
+        normalize.parse_rules('lowercase,soundex')
+
+
+@pytest.mark.parametrize('rules', [normalize.DEFAULT_RULES, ('lowercase',), ('mailto', 'quotes'), normalize.RULES])
+def test_compact_keys_match_the_normalizer(rules, tmp_path):
+    # The loaders skip normalising addresses made of ``unchanged_bytes`` only
+    normalizer = normalize.make_normalizer(rules)
+    emails = [email for email, _ in SAMPLES] + ['already@key.com', 'Upper@Case.com', "o'neil@example.com"]
+    path = tmp_path / 'emails.txt'
+    path.write_text('\n'.join(emails) + '\n', encoding='utf-8')
+    for compact in (CompactEmailSet(emails, normalizer), CompactEmailSet.from_file(str(path), normalizer=normalizer)):
+        assert sorted(compact.keys_at(range(len(compact)))) == sorted(set(map(normalizer, emails)))
+    plain = normalizer.unchanged_bytes()
+    for email in emails:
+        if plain is not None and email.isascii() and not email.encode('ascii').translate(None, plain):
+            assert normalizer(email) == email
@@ -0,0 +1,46 @@
+"""Bloom-filter prefilter."""
+
+from leadsievex import engines, prefilter, rules, stream
+from leadsievex.store import CompactEmailSet
+
+
+def test_suppression_filter_has_no_false_negatives(tmp_path):
+    unwanted = [f"blocked{i}@example.com" for i in range(5000)]
+    others = [f"keep{i}@example.com" for i in range(5000)]
+    path = str(tmp_path / ('filter' + prefilter.FILTER_SUFFIX))
+    # A few bits per entry give many false positives, which the key file must resolve
+    suppression = prefilter.build_filter([unwanted], path, max_memory=64 * 1024, tmp_dir=str(tmp_path),
+                                         bits_per_entry=2)
+
+    assert suppression.might_contain(CompactEmailSet(unwanted).hashes).all()
+    loaded = prefilter.SuppressionFilter.load(path)
+    for candidate in (suppression, loaded):
+        remaining = candidate.separate(CompactEmailSet(unwanted + others))
+        assert sorted(remaining) == sorted(others)
+
+
+def test_filter_applies_the_rule_lines_of_its_lists(tmp_path):
+    unwanted = ['blocked@example.com', '@competitor.com', '*.gov', 'noreply*@*']
+    main = ['keep@example.com', 'blocked@example.com', 'sales@competitor.com', 'clerk@city.gov',
+            'noreply-7@example.org', 'gov@example.com', 'ok@competitor.com.au']
+    unwanted_path = tmp_path / 'unwanted.txt'
+    unwanted_path.write_text('\n'.join(unwanted) + '\n', encoding='utf-8')
+    main_path = tmp_path / 'main.txt'
+    main_path.write_text('\n'.join(main) + '\n', encoding='utf-8')
+    path = str(tmp_path / ('filter' + prefilter.FILTER_SUFFIX))
+    suppression = prefilter.build_filter([str(unwanted_path)], path, tmp_dir=str(tmp_path))
+
+    # Rules are kept out of the key file and the Bloom bits
+    assert len(suppression) == 1
+    assert len(suppression.rules) == 3
+
+    unwanted_emails = CompactEmailSet.from_file(str(unwanted_path))
+    expected = sorted(engines.separate(CompactEmailSet(main), unwanted_emails, 'hash',
+                                       rules=rules.from_sources([unwanted_emails])))
+    assert expected == ['gov@example.com', 'keep@example.com', 'ok@competitor.com.au']
+    for candidate in (suppression, prefilter.SuppressionFilter.load(path)):
+        assert sorted(candidate.separate(CompactEmailSet(main))) == expected
+
+    out_path = tmp_path / 'out.txt'
+    stream.stream_separate([str(main_path)], CompactEmailSet(), str(out_path), suppression=suppression)
+    assert sorted(out_path.read_text(encoding='utf-8').split()) == expected
@@ -0,0 +1,58 @@
+"""Domain, wildcard and local-part suppression rules."""
+
+import pytest
+
+from leadsievex import normalize, rules
+from leadsievex.store import CompactEmailSet
+
+RULES = ['@Competitor.com', '*.gov', 'abuse@*', 'noreply*@*', 'sales*@*.example.org']
+
+EMAILS = {
+    'anyone@competitor.com': True,
+    'anyone@sub.competitor.com': False,
+    'clerk@city.gov': True,
+    'clerk@gov': False,
+    'ABUSE@example.net': True,
+    'abuser@example.net': False,
+    'noreply@example.net': True,
+    'noreply-42@example.net': True,
+    'sales-eu@shop.example.org': True,
+    'sales@example.org': False,
+    'support@shop.example.org': False,
+    'not-an-address': False,
+}
+
+
+def test_parse_rule():
+    assert rules.parse_rule('@Example.com') == ('*', 'example.com')
+    assert rules.parse_rule('*.gov') == ('*', '*.gov')
+    assert rules.parse_rule('@*.gov') == ('*', '*.gov')
+    assert rules.parse_rule('abuse@*') == ('abuse', '*')
+    for bad in ('*@*', '@*', 'x@ex*ample.com', 'x@*.'):
+        with pytest.raises(ValueError):
+            rules.parse_rule(bad)
+
+
+def test_matches_and_mask_agree():
+    rule_set = rules.RuleSet(RULES)
+    assert {email: rule_set.matches(email) for email in EMAILS} == EMAILS
+
+    # The vectorised mask must find the same entries as ``matches``
+    compact = CompactEmailSet(list(EMAILS) * 3)
+    matched = {email for email, hit in zip(compact.keys_at(range(len(compact))), rule_set.mask(compact)) if hit}
+    assert matched == {email for email, hit in EMAILS.items() if hit}
+    assert sorted(rule_set.apply(compact)) == sorted(email for email, hit in EMAILS.items() if not hit)
+    assert rule_set.apply(set(EMAILS)) == {email for email, hit in EMAILS.items() if not hit}
+
+
+def test_rule_lines_of_lists_and_files(tmp_path):
+    normalizer = normalize.make_normalizer()
+    lines = ['a@example.com', '<@Blocked.org>', '*.gov', 'x*y@example.com', 'b@example.com']
+    expected = ['*.gov', '@blocked.org', 'x*y@example.com']
+    path = tmp_path / 'unwanted.txt'
+    path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+
+    assert sorted(rules.rule_lines(lines, normalizer)) == expected
+    assert sorted(rules.rule_lines(CompactEmailSet(lines, normalizer))) == expected
+    assert sorted(rules.read_rule_lines(str(path), normalizer)) == expected
+    assert rules.from_sources([str(path)], normalizer) == rules.RuleSet(expected)
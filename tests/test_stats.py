@@ -0,0 +1,49 @@
+"""Incremental counts of the pasted emails."""
+
+import pytest
+
+from leadsievex import normalize, stats
+from leadsievex.store import CompactEmailSet
+
+UNWANTED = [f"known{i}@example.com" for i in range(50)]
+
+EDITS = [
+    'a@example.com\nKnown1@Example.com\n',
+    # Typing at the end
+    'a@example.com\nKnown1@Example.com\nb@exam',
+    'a@example.com\nKnown1@Example.com\nb@example.com\n@blocked.org\n',
+    # The same key twice, then one copy removed
+    'a@example.com\nKnown1@Example.com\nb@example.com\n@blocked.org\nA@Example.com\n',
+    'Known1@Example.com\nb@example.com\n@blocked.org\nA@Example.com\n',
+    # Edited in the middle, then mostly replaced
+    'Known1@Example.com\nc@example.com\n@blocked.org\nA@Example.com\n',
+    '\n'.join(f"known{i}@example.com" for i in range(40)) + '\nnew@example.com\n*.gov\n',
+    '',
+]
+
+
+def _counts(pasted):
+    return pasted.pasted_count, pasted.extra_count, pasted.rule_count
+
+
+@pytest.mark.parametrize('compact', [False, True])
+def test_updates_match_counting_from_scratch(compact, monkeypatch):
+    # Look keys up in vectorised batches even for these few lines
+    monkeypatch.setattr(stats, 'BATCH_LOOKUP', 2)
+    normalizer = normalize.make_normalizer()
+    unwanted = CompactEmailSet(UNWANTED, normalizer) if compact else set(map(normalizer, UNWANTED))
+    pasted = stats.PastedStats(unwanted, normalizer)
+    for text in EDITS:
+        pasted.update(text)
+        fresh = stats.PastedStats(unwanted, normalizer)
+        fresh.update(text)
+        assert _counts(pasted) == _counts(fresh)
+
+    pasted = stats.PastedStats(unwanted, normalizer)
+    pasted.update(EDITS[2])
+    # a and b are new; Known1 is already unwanted once normalised
+    assert _counts(pasted) == (3, 2, 1)
+
+
+def test_pasted_lines_split_like_the_loaders():
+    assert stats.pasted_lines(' a@x.com \r\nb@x.com\ra@x.com\n\n') == {'a@x.com': 2, 'b@x.com': 1}
@@ -0,0 +1,66 @@
+"""Hash matching of ``CompactEmailSet``."""
+
+import numpy as np
+
+from leadsievex import normalize, store
+from leadsievex.store import CompactEmailSet
+
+MAIN = [f"user{i}@example{i % 7}.com" for i in range(400)] + ["user1@example1.com", "Long" * 80 + "@x.com"]
+UNWANTED = [f"user{i}@example{i % 7}.com" for i in range(0, 800, 3)] + ["Long" * 80 + "@x.com"]
+
+
+def _assert_matches(main, unwanted):
+    expected_kept = set(main) - set(unwanted)
+    expected_common = set(main) & set(unwanted)
+    assert len(main) == len(set(MAIN))
+    assert set(main - unwanted) == expected_kept
+    assert set(main & unwanted) == expected_common
+    assert main.isin(unwanted).sum() == len(expected_common)
+
+
+def test_member_mask_without_collisions():
+    _assert_matches(CompactEmailSet(MAIN), CompactEmailSet(UNWANTED))
+
+
+def test_member_mask_with_forced_hash_collisions(weak_hash):
+    main, unwanted = CompactEmailSet(MAIN), CompactEmailSet(UNWANTED)
+    assert len(np.unique(main.hashes)) <= 4
+    _assert_matches(main, unwanted)
+    assert sorted(CompactEmailSet(MAIN + MAIN[::-1])) == sorted(set(MAIN))
+    assert "user3@example3.com" in unwanted
+    assert "user1@example1.com" not in unwanted
+
+
+def test_keys_differing_in_one_byte_are_told_apart(weak_hash):
+    base = 'abcdefghijklmnopqrstuvw@example.com'
+    variants = [base[:i] + '#' + base[i + 1:] for i in range(len(base))]
+    for size in (1, 7, 8, 9, 16, 17, len(base)):
+        lines = [variant[:size] for variant in [base] + variants]
+        assert len(CompactEmailSet(lines + lines[::-1])) == len(set(lines))
+        assert sorted(CompactEmailSet(lines[1:]) - CompactEmailSet(lines[:1])) == sorted(set(lines[1:]) - {lines[0]})
+
+
+def test_normalised_keys_are_compared_with_forced_hash_collisions(weak_hash):
+    normalizer = normalize.Normalizer()
+    main = CompactEmailSet(['Ann@X.com', 'bob@x.com', '<ann@x.com>', 'Carl@Y.org'], normalizer)
+    unwanted = CompactEmailSet(['mailto:ANN@x.com', 'carl@y.org', 'dora@y.org'], normalizer)
+    assert sorted(main) == ['Ann@X.com', 'Carl@Y.org', 'bob@x.com']
+    assert sorted(main - unwanted) == ['bob@x.com']
+
+
+def test_from_file_keeps_only_unique_stripped_addresses(tmp_path):
+    path = tmp_path / 'main.txt'
+    path.write_bytes(b'  a@b.com  \r\n\n\nc@d.org\t\n  a@b.com\n')
+    emails = CompactEmailSet.from_file(str(path), numbered=True)
+    path.write_bytes(b'overwritten\n')
+    assert list(emails.numbered()) == [(1, 'a@b.com'), (4, 'c@d.org')]
+    assert len(emails._data) == len('a@b.comc@d.org')
+
+
+def test_view_in_input_order_matches_like_a_sorted_set():
+    lines = [f"user{i}@example.com" for i in range(20000, 0, -1)]
+    data = ''.join(line + '\n' for line in lines).encode('utf-8')
+    starts, lengths, _ = store.scan_lines(data)
+    view = CompactEmailSet.view(data, starts, lengths)
+    unwanted = CompactEmailSet(lines[::5])
+    assert view.isin(unwanted).tolist() == [i % 5 == 0 for i in range(len(lines))]
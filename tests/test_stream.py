@@ -0,0 +1,52 @@
+"""Single-pass separation and the filter of addresses already written."""
+
+import pytest
+
+from leadsievex import engines, normalize, rules, stream
+from leadsievex.store import CompactEmailSet
+
+MAIN = [f"user{i % 300}@Example{i % 7}.com" for i in range(1200)] + ['sales@competitor.com', 'USER5@example5.com']
+UNWANTED = [f"user{i}@example{i % 7}.com" for i in range(0, 300, 4)] + ['@competitor.com']
+
+
+def _first_seen(emails, normalizer):
+    seen = {}
+    for email in emails:
+        seen.setdefault(normalizer(email), email)
+    return seen
+
+
+@pytest.mark.parametrize('collide', [False, True])
+def test_stream_writes_the_hash_result_in_input_order(tmp_path, request, collide):
+    if collide:
+        request.getfixturevalue('weak_hash')
+    normalizer = normalize.make_normalizer()
+    main_path = tmp_path / 'main.txt'
+    main_path.write_text('\n'.join(MAIN) + '\n', encoding='utf-8')
+    unwanted = CompactEmailSet(UNWANTED, normalizer)
+    rule_set = rules.from_sources([unwanted])
+    out_path = tmp_path / 'out.txt'
+
+    # Blocks of about 20 lines, so most repeats are in earlier blocks
+    result = stream.stream_separate([str(main_path)], unwanted, str(out_path), rules=rule_set, chunk_size=512)
+
+    main = CompactEmailSet.from_file(str(main_path), normalizer=normalizer)
+    remaining = engines.separate(main, unwanted, 'hash', rules=rule_set)
+    written = out_path.read_text(encoding='utf-8').split('\n')[:-1]
+    assert written == list(remaining.in_input_order())
+    expected = {key: email for key, email in _first_seen(MAIN, normalizer).items()
+                if key not in set(unwanted.keys_at(range(len(unwanted)))) and not rule_set.matches(key)}
+    assert written == list(expected.values())
+    assert result == stream.StreamResult(len(MAIN), len(unwanted), len(written), out_path.stat().st_size)
+
+
+def test_seen_filter_returns_each_address_once(weak_hash):
+    seen = stream.SeenFilter()
+    fresh = []
+    for block in range(0, len(MAIN), 50):
+        fresh.extend(seen.add_new(CompactEmailSet(MAIN[block:block + 50])))
+    assert sorted(fresh) == sorted(set(MAIN))
+    assert len(seen) == len(set(MAIN))
+    # Merged into a few levels of roughly doubling size
+    assert len(seen._levels) <= 6
+    assert not len(seen.add_new(CompactEmailSet(MAIN[::-1])))